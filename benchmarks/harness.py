@@ -0,0 +1,327 @@
+"""
+Load generation for the benchmark management commands.
+
+Requests are sent straight to Django's WSGIHandler from a pool of threads,
+so request_started/request_finished fire and database connections are
+opened, reused and closed exactly as they are under gunicorn's threaded
+workers. Everything runs against the configured (non-test) database.
+"""
+
+import asyncio
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+from invoices.serializers import create_invoices
+from users.serializers import CustomTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+@contextmanager
+def bench_users(count, invoices=20, items=3, password=None):
+    """Create ``count`` throwaway users owning ``invoices`` invoices each
+
+    Yields a list of ``(user, access_token)``. Every user gets ``password``
+    (random by default), hashed once. The users and everything they own
+    are deleted on exit.
+    """
+    suffix = uuid.uuid4().hex[:12]
+    hashed = make_password(password or uuid.uuid4().hex)
+    users = []
+    try:
+        for n in range(count):
+            user = User.objects.create(
+                username=f'bench-{suffix}-{n}',
+                email=f'bench-{suffix}-{n}@example.com',
+                password=hashed,
+            )
+            users.append(user)
+            create_invoices(user, [
+                {
+                    'reference': f'BENCH-{suffix}-{n}-{i}',
+                    'customer_name': 'Benchmark Customer',
+                    'items': [
+                        {'name': f'Item {j}', 'quantity': 1, 'price': Decimal('10.00')}
+                        for j in range(items)
+                    ],
+                }
+                for i in range(invoices)
+            ])
+        yield [(user, str(CustomTokenObtainPairSerializer.get_token(user).access_token)) for user in users]
+    finally:
+        User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+
+@contextmanager
+def bench_user(invoices=20, items=3):
+    """Create a throwaway user owning ``invoices`` invoices and yield ``(user, access_token)``
+
+    The user and everything it owns is deleted on exit.
+    """
+    with bench_users(1, invoices, items) as users:
+        yield users[0]
+
+
+class LoadResult:
+    """Latencies (seconds) and failures collected by run_load
+
+    ``samples`` holds ``(index, seconds, status)`` per request, for
+    breaking the results down with ``by_label``.
+    """
+
+    def __init__(self, latencies, errors, elapsed, connections_opened, samples=()):
+        self.latencies = latencies
+        self.errors = errors
+        self.elapsed = elapsed
+        self.connections_opened = connections_opened
+        self.samples = samples
+
+    def summary(self):
+        latencies = sorted(self.latencies) or [0.0]
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return {
+            'requests': len(self.latencies),
+            'errors': self.errors,
+            'rps': len(self.latencies) / self.elapsed if self.elapsed else 0.0,
+            'p50_ms': cuts[49] * 1000,
+            'p95_ms': cuts[94] * 1000,
+            'p99_ms': cuts[98] * 1000,
+            'connections_opened': self.connections_opened,
+        }
+
+    def by_label(self, label_for):
+        """Split into one LoadResult per ``label_for(index)``, in first-seen order
+
+        Each part keeps the run's elapsed time, so its rps is that
+        endpoint's share of the throughput. Connections aren't attributed
+        (``connections_opened`` is None).
+        """
+        groups = {}
+        for index, seconds, status in self.samples:
+            groups.setdefault(label_for(index), []).append((index, seconds, status))
+        return {
+            label: LoadResult(
+                [seconds for _, seconds, _ in samples],
+                sum(status >= 400 for _, _, status in samples),
+                self.elapsed,
+                None,
+                samples,
+            )
+            for label, samples in groups.items()
+        }
+
+
+def run_load(request_for, total, concurrency):
+    """Send ``total`` requests from ``concurrency`` threads through WSGIHandler
+
+    ``request_for(index)`` returns ``(method, path, headers, body)`` for the
+    index-th request, with ``body`` sent as JSON unless it is None. A
+    response with status >= 400 counts as an error.
+    """
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    latencies, samples, errors, opened = [], [], [0], [0]
+    lock = threading.Lock()
+    statuses = threading.local()
+
+    def count_connection(sender, connection, **kwargs):
+        with lock:
+            opened[0] += 1
+
+    def start_response(status, headers, exc_info=None):
+        statuses.status = int(status.split(' ', 1)[0])
+
+    def worker(indexes):
+        timings = []
+        recorded = []
+        failed = 0
+        try:
+            for index in indexes:
+                method, path, headers, body = request_for(index)
+                data = json.dumps(body) if body is not None else ''
+                environ = factory.generic(method, path, data, 'application/json', **headers).environ
+                start = time.perf_counter()
+                response = handler(environ, start_response)
+                b''.join(response)
+                response.close()
+                timings.append(time.perf_counter() - start)
+                recorded.append((index, timings[-1], statuses.status))
+                failed += statuses.status >= 400
+        finally:
+            connections.close_all()
+            with lock:
+                latencies.extend(timings)
+                samples.extend(recorded)
+                errors[0] += failed
+
+    threads = [
+        threading.Thread(target=worker, args=(range(i, total, concurrency),))
+        for i in range(min(concurrency, total))
+    ]
+
+    connection_created.connect(count_connection)
+    try:
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        connection_created.disconnect(count_connection)
+    return LoadResult(latencies, errors[0], elapsed, opened[0], samples)
+
+
+async def run_clients(call, request_for, total, clients):
+    """Send ``total`` requests from ``clients`` concurrent clients on one event loop
+
+    ``call(method, path, headers, body)`` is awaited for each request and
+    returns the response status. Latency is measured from the client's side,
+    so it includes any time spent queued behind busy server threads.
+    """
+    latencies, samples, errors, opened = [], [], [0], [0]
+    indexes = iter(range(total))
+
+    def count_connection(sender, connection, **kwargs):
+        opened[0] += 1
+
+    async def client():
+        for index in indexes:
+            start = time.perf_counter()
+            response_status = await call(*request_for(index))
+            latencies.append(time.perf_counter() - start)
+            samples.append((index, latencies[-1], response_status))
+            errors[0] += response_status >= 400
+
+    connection_created.connect(count_connection)
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(min(clients, total))))
+        elapsed = time.perf_counter() - start
+    finally:
+        connection_created.disconnect(count_connection)
+    return LoadResult(latencies, errors[0], elapsed, opened[0], samples)
+
+
+def asgi_caller():
+    """Return ``(call, close)`` serving run_clients requests with Django's ASGIHandler"""
+    handler = ASGIHandler()
+
+    async def call(method, path, headers, body):
+        url = urlsplit(path)
+        content = json.dumps(body).encode() if body is not None else b''
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': url.path,
+            'raw_path': url.path.encode(),
+            'query_string': url.query.encode(),
+            'root_path': '',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(content)).encode()),
+            ] + [
+                (key[5:].replace('_', '-').lower().encode(), value.encode())
+                for key, value in headers.items()
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        messages = [{
+            'type': 'http.request',
+            'body': content,
+            'more_body': False,
+        }]
+        disconnected = asyncio.Event()
+        response = {}
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # Stay connected until the handler has responded
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+
+        await handler(scope, receive, send)
+        disconnected.set()
+        return response['status']
+
+    async def close():
+        await sync_to_async(connections.close_all)()
+
+    return call, close
+
+
+def wsgi_caller(threads):
+    """Return ``(call, close)`` serving run_clients requests with WSGIHandler on ``threads`` threads
+
+    This models a gunicorn worker with ``--threads``: clients beyond the
+    thread count wait for a free thread.
+    """
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    executor = ThreadPoolExecutor(max_workers=threads)
+
+    def serve(method, path, headers, body):
+        statuses = []
+        data = json.dumps(body) if body is not None else ''
+        environ = factory.generic(method, path, data, 'application/json', **headers).environ
+        response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        b''.join(response)
+        response.close()
+        return int(statuses[0].split(' ', 1)[0])
+
+    async def call(method, path, headers, body):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, serve, method, path, headers, body)
+
+    async def close():
+        # Run one close_all() on every worker thread, then stop the pool
+        barrier = threading.Barrier(threads)
+
+        def close_thread_connections():
+            barrier.wait()
+            connections.close_all()
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, close_thread_connections) for _ in range(threads)))
+        executor.shutdown()
+
+    return call, close
+
+
+def format_summary(name, summary):
+    """One aligned line per benchmark run for command output"""
+    line = (
+        f'{name:<16} requests={summary["requests"]} errors={summary["errors"]} '
+        f'rps={summary["rps"]:.1f} p50={summary["p50_ms"]:.2f}ms '
+        f'p95={summary["p95_ms"]:.2f}ms p99={summary["p99_ms"]:.2f}ms'
+    )
+    if summary['connections_opened'] is not None:
+        line += f' connections={summary["connections_opened"]}'
+    return line
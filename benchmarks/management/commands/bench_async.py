@@ -0,0 +1,54 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from benchmarks.harness import asgi_caller, bench_user, format_summary, run_clients, wsgi_caller
+
+# endpoint name -> (sync DRF path, async path)
+ENDPOINTS = {
+    'invoices': ('/api/invoices/', '/api/async/invoices/'),
+    'invoice': ('/api/invoices/{id}/', '/api/async/invoices/{id}/'),
+    'transactions': ('/api/transactions/', '/api/async/transactions/'),
+    'profile': ('/api/users/profile/', '/api/async/users/profile/'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the same reads to many concurrent clients from the sync DRF views '
+        'on a threaded WSGI worker and from the async views on the ASGI handler'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='invoices')
+        parser.add_argument('--clients', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument(
+            '--threads', type=int, default=16,
+            help='Threads of the WSGI worker (gunicorn --threads)'
+        )
+    
+    def handle(self, *args, **options):
+        # Compare the views themselves, not the sync endpoint's response cache
+        with override_settings(INVOICE_CACHE_TIMEOUT=0), bench_user() as (user, token):
+            invoice_id = user.created_invoices.values_list('id', flat=True).first()
+            headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+            stacks = [
+                ('wsgi-threads', ENDPOINTS[options['endpoint']][0], lambda: wsgi_caller(options['threads'])),
+                ('asgi-async', ENDPOINTS[options['endpoint']][1], asgi_caller),
+            ]
+            for name, path, make_caller in stacks:
+                path = path.format(id=invoice_id)
+                summary = asyncio.run(self.run(
+                    make_caller, lambda index, path=path: ('GET', path, headers, None), options
+                ))
+                self.stdout.write(format_summary(name, summary))
+    
+    async def run(self, make_caller, request_for, options):
+        call, close = make_caller()
+        try:
+            result = await run_clients(call, request_for, options['requests'], options['clients'])
+        finally:
+            await close()
+        return result.summary()
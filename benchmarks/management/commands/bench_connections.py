@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from benchmarks.harness import bench_user, format_summary, run_load
+
+
+def pool_available():
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return connections['default'].vendor == 'postgresql'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare request latency with a new database connection per request, '
+        'persistent connections (CONN_MAX_AGE) and, on PostgreSQL with psycopg 3, '
+        "Django's connection pool"
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/invoices/', help='GET endpoint to load')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--conn-max-age', type=int, default=60,
+            help='CONN_MAX_AGE used for the persistent run'
+        )
+    
+    def handle(self, *args, **options):
+        settings_dict = connections.settings['default']
+        original = (settings_dict['CONN_MAX_AGE'], dict(settings_dict.get('OPTIONS', {})))
+        base_options = {key: value for key, value in original[1].items() if key != 'pool'}
+        
+        modes = [
+            ('per-request', 0, base_options),
+            ('persistent', options['conn_max_age'], base_options),
+        ]
+        if pool_available():
+            pool = original[1].get('pool') or True
+            modes.append(('pooled', 0, {**base_options, 'pool': pool}))
+        else:
+            self.stdout.write('Skipping pooled run: needs PostgreSQL with psycopg[pool] installed.')
+        
+        with bench_user() as (user, token):
+            headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+            
+            def request_for(index):
+                return 'GET', options['path'], headers, None
+            
+            try:
+                for name, conn_max_age, db_options in modes:
+                    self.configure(settings_dict, conn_max_age, db_options)
+                    result = run_load(request_for, options['requests'], options['concurrency'])
+                    self.stdout.write(format_summary(name, result.summary()))
+            finally:
+                self.configure(settings_dict, *original)
+    
+    def configure(self, settings_dict, conn_max_age, db_options):
+        connections.close_all()
+        connection = connections['default']
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+        settings_dict['CONN_MAX_AGE'] = conn_max_age
+        settings_dict['OPTIONS'] = db_options
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from benchmarks.harness import bench_user, format_summary, run_load
+
+
+class Command(BaseCommand):
+    help = (
+        'Create invoices from concurrent threads with SQLite in its default '
+        'rollback-journal mode and with the DB_SQLITE_TUNED profile'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--items', type=int, default=3, help='Items per invoice')
+    
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError('bench_sqlite_writes only runs against the SQLite backend.')
+        
+        settings_dict = connections.settings['default']
+        original_options = settings_dict.get('OPTIONS', {})
+        with connection.cursor() as cursor:
+            original_journal_mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+        
+        profiles = [
+            ('default', {'init_command': 'PRAGMA journal_mode=DELETE'}),
+            ('tuned', settings.SQLITE_TUNED_OPTIONS),
+        ]
+        
+        with bench_user(invoices=0) as (user, token):
+            headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+            items = [
+                {'name': f'Item {n}', 'quantity': 1, 'price': '10.00'}
+                for n in range(options['items'])
+            ]
+            try:
+                for name, db_options in profiles:
+                    connections.close_all()
+                    settings_dict['OPTIONS'] = db_options
+                    
+                    def request_for(index, name=name):
+                        return 'POST', '/api/invoices/', headers, {
+                            'reference': f'{user.username}-{name}-{index}',
+                            'customer_name': 'Benchmark Customer',
+                            'items': items,
+                        }
+                    
+                    result = run_load(request_for, options['requests'], options['concurrency'])
+                    self.stdout.write(format_summary(name, result.summary()))
+            finally:
+                connections.close_all()
+                settings_dict['OPTIONS'] = original_options
+                with connections['default'].cursor() as cursor:
+                    cursor.execute(f'PRAGMA journal_mode={original_journal_mode}')
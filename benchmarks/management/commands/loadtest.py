@@ -0,0 +1,192 @@
+import asyncio
+import json
+import math
+import random
+import uuid
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.harness import asgi_caller, bench_users, format_summary, run_clients, run_load
+
+User = get_user_model()
+
+# Relative weight of each call in the default workload
+DEFAULT_MIX = {
+    'register': 1,
+    'token': 2,
+    'invoice-create': 3,
+    'invoice-list': 8,
+    'invoice-pay': 2,
+    'transaction-list': 4,
+}
+
+
+def parse_mix(value):
+    """Parse ``name=weight,...`` into a weights dict over DEFAULT_MIX names"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise CommandError(f'Unknown call "{name}"; choose from {", ".join(DEFAULT_MIX)}')
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise CommandError(f'Weight of "{name}" must be an integer')
+    if not any(mix.values()):
+        raise CommandError('The mix needs at least one call with a positive weight')
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed users and invoices, replay a mix of register, token, invoice create/list/pay '
+        'and transaction-list calls against the in-process app, and report latency '
+        'percentiles and throughput per call'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Seeded users the calls are spread over')
+        parser.add_argument('--invoices', type=int, default=20, help='Seeded invoices per user')
+        parser.add_argument('--items', type=int, default=3, help='Items per seeded or created invoice')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=8, help='Client threads (wsgi) or clients (asgi)')
+        parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi')
+        parser.add_argument(
+            '--mix', default=','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items()),
+            help='Call weights, e.g. "invoice-list=8,invoice-pay=2" (default: %(default)s)'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the call sequence')
+        parser.add_argument('--output', default='loadtest.json', help='JSON file the results are written to')
+        parser.add_argument('--compare', help='Earlier --output file to print rps and p95 changes against')
+    
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['requests'] < 1:
+            raise CommandError('--users and --requests must be at least 1')
+        
+        mix = parse_mix(options['mix'])
+        names, weights = zip(*mix.items())
+        calls = random.Random(options['seed']).choices(names, weights, k=options['requests'])
+        
+        # Every pay needs its own PENDING invoice
+        invoices = max(options['invoices'], math.ceil(calls.count('invoice-pay') / options['users']))
+        password = uuid.uuid4().hex
+        run = uuid.uuid4().hex[:8]
+        
+        self.stdout.write(f'Seeding {options["users"]} users with {invoices} invoices each...')
+        with bench_users(options['users'], invoices, options['items'], password) as users:
+            try:
+                plan = self.plan(calls, users, password, run, options['items'])
+                result = self.run(plan, options)
+            finally:
+                User.objects.filter(username__startswith=f'load-{run}-').delete()
+        
+        report = {
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+            'server': options['server'],
+            'database': connection.vendor,
+            'options': {
+                key: options[key]
+                for key in ('users', 'items', 'requests', 'concurrency', 'seed')
+            },
+            'total': result.summary(),
+            'calls': {
+                label: part.summary()
+                for label, part in sorted(result.by_label(lambda index: calls[index]).items())
+            },
+        }
+        report['options'].update(invoices=invoices, mix=mix)
+        
+        self.stdout.write(format_summary('total', report['total']))
+        for label, summary in report['calls'].items():
+            self.stdout.write(format_summary(label, summary))
+        if options['compare']:
+            self.compare(report, options['compare'])
+        
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+    
+    def plan(self, calls, users, password, run, items):
+        """Build ``(method, path, headers, body)`` for every call up front"""
+        auth = [{'HTTP_AUTHORIZATION': f'Bearer {token}'} for _, token in users]
+        # Round-robin over the users' PENDING invoices, each paid once
+        pending_ids = [
+            list(user.created_invoices.filter(status='PENDING').order_by('id').values_list('id', flat=True))
+            for user, _ in users
+        ]
+        pending = iter([
+            (owner, ids[position])
+            for position in range(max(map(len, pending_ids)))
+            for owner, ids in enumerate(pending_ids)
+            if position < len(ids)
+        ])
+        
+        plan = []
+        for index, call in enumerate(calls):
+            owner = index % len(users)
+            if call == 'register':
+                username = f'load-{run}-{index}'
+                plan.append(('POST', '/api/users/register/', {}, {
+                    'username': username,
+                    'email': f'{username}@example.com',
+                    'password': password,
+                    'password_confirm': password,
+                }))
+            elif call == 'token':
+                plan.append(('POST', '/api/token/', {}, {
+                    'username': users[owner][0].username,
+                    'password': password,
+                }))
+            elif call == 'invoice-create':
+                plan.append(('POST', '/api/invoices/', auth[owner], {
+                    'reference': f'LOAD-{run}-{index}',
+                    'customer_name': 'Load Test Customer',
+                    'items': [{'name': f'Item {n}', 'quantity': 1, 'price': '10.00'} for n in range(items)],
+                }))
+            elif call == 'invoice-list':
+                plan.append(('GET', '/api/invoices/', auth[owner], None))
+            elif call == 'invoice-pay':
+                payer, invoice_id = next(pending)
+                plan.append(('PATCH', f'/api/invoices/{invoice_id}/pay/', auth[payer], None))
+            elif call == 'transaction-list':
+                plan.append(('GET', '/api/transactions/', auth[owner], None))
+        return plan
+    
+    def run(self, plan, options):
+        if options['server'] == 'wsgi':
+            return run_load(plan.__getitem__, len(plan), options['concurrency'])
+        return asyncio.run(self.run_asgi(plan, options))
+    
+    async def run_asgi(self, plan, options):
+        call, close = asgi_caller()
+        try:
+            return await run_clients(call, plan.__getitem__, len(plan), options['concurrency'])
+        finally:
+            await close()
+    
+    def compare(self, report, path):
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        
+        self.stdout.write(f'Compared with {path}:')
+        rows = [('total', report['total'], baseline.get('total'))] + [
+            (label, summary, baseline.get('calls', {}).get(label))
+            for label, summary in report['calls'].items()
+        ]
+        for label, current, previous in rows:
+            if not previous:
+                continue
+            self.stdout.write(
+                f'{label:<16} rps {change(current["rps"], previous["rps"])} '
+                f'p95 {change(current["p95_ms"], previous["p95_ms"])}'
+            )
+
+
+def change(current, previous):
+    if not previous:
+        return 'n/a'
+    return f'{(current - previous) / previous:+.1%}'
@@ -0,0 +1,129 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, time as day_start
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from benchmarks.seeding import Catalog, DatasetSpec, insert_chunk
+from customers import balances
+from invoices.models import Invoice
+from reports import rollups
+
+User = get_user_model()
+
+
+def seed_chunk(spec, index):
+    """Worker entry point: insert one chunk on this process's own connection"""
+    try:
+        return insert_chunk(spec, Catalog(spec), index)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic dataset of invoices, items and transactions '
+        'with bulk inserts, one transaction per chunk, optionally from parallel worker processes'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--invoices', type=int, default=100_000)
+        parser.add_argument('--users', type=int, default=50, help='Owners the invoices are spread over (seed-<n>)')
+        parser.add_argument('--customers', type=int, default=5000)
+        parser.add_argument('--max-items', type=int, default=10)
+        parser.add_argument('--paid-ratio', type=float, default=0.7)
+        parser.add_argument('--days', type=int, default=365, help='Length of the created_at range')
+        parser.add_argument(
+            '--end', type=datetime.fromisoformat,
+            help='Last day of the range as YYYY-MM-DD (default: today); fix it for identical reruns'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='SEED', help='Invoice reference prefix; must not be in use')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Invoices per transaction')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Worker processes; on SQLite they only overlap generation, writes are serialized'
+        )
+    
+    def handle(self, *args, **options):
+        if options['invoices'] < 1 or options['users'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--invoices, --users and --chunk-size must be at least 1')
+        if not 0 <= options['paid_ratio'] <= 1:
+            raise CommandError('--paid-ratio must be between 0 and 1')
+        if Invoice.objects.filter(reference__startswith=f'{options["prefix"]}-').exists():
+            raise CommandError(f'Invoices with the prefix {options["prefix"]} already exist; pass another --prefix')
+        
+        end = (options['end'] or datetime.now()).date()
+        spec = DatasetSpec(
+            invoices=options['invoices'],
+            owner_ids=tuple(self.owners(options['users'])),
+            end=timezone.make_aware(datetime.combine(end, day_start.max)),
+            seed=options['seed'],
+            prefix=options['prefix'],
+            days=options['days'],
+            customers=options['customers'],
+            max_items=options['max_items'],
+            paid_ratio=options['paid_ratio'],
+            chunk_size=options['chunk_size'],
+        )
+        
+        workers = self.workers(options['workers'])
+        started = time.perf_counter()
+        done = 0
+        for inserted in self.insert(spec, workers):
+            done += inserted
+            self.stdout.write(f'{done}/{spec.invoices} invoices ({done / (time.perf_counter() - started):.0f}/s)')
+        
+        self.stdout.write('Rebuilding reporting rollups and customer balances...')
+        rollups.rebuild()
+        balances.rebuild()
+        
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {spec.invoices} invoices over {len(spec.owner_ids)} users in {elapsed:.1f}s '
+            f'with {workers} worker(s).'
+        ))
+    
+    def owners(self, count):
+        """Ids of the seed-<n> users, creating the missing ones without a usable password"""
+        usernames = [f'seed-{n}' for n in range(count)]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        User.objects.bulk_create([
+            User(username=username, email=f'{username}@example.com', password=make_password(None))
+            for username in usernames
+            if username not in existing
+        ])
+        ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        return [ids[username] for username in usernames]
+    
+    def workers(self, requested):
+        if requested <= 1:
+            return 1
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.stderr.write('Worker processes need the fork start method; seeding in-process.')
+            return 1
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.stderr.write('An in-memory SQLite database cannot be shared with workers; seeding in-process.')
+            return 1
+        return requested
+    
+    def insert(self, spec, workers):
+        """Insert every chunk, yielding the invoice count of each as it commits"""
+        if workers == 1:
+            catalog = Catalog(spec)
+            for index in range(spec.chunks):
+                yield insert_chunk(spec, catalog, index)
+            return
+        
+        # Children must not inherit this process's open connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [executor.submit(seed_chunk, spec, index) for index in range(spec.chunks)]
+            for future in as_completed(futures):
+                yield future.result()
@@ -0,0 +1,191 @@
+"""
+Deterministic synthetic invoices, items and transactions for benchmarks.
+
+The dataset is split into chunks of consecutive invoices. Each chunk is
+generated from its own random stream (seeded by the dataset seed and the
+chunk index), so the rows are the same whether the chunks are inserted by
+one process or spread over several. Chunks are chronological: invoice i of
+n is created ``i/n`` of the way through the date range, which keeps ids
+roughly in created_at order as they would be in production.
+
+Distributions:
+
+- customers and owners are Zipf-distributed, so a few account for most
+  invoices;
+- item counts are geometric (mostly 1-3), drawn from a catalog with
+  Zipf-distributed popularity;
+- each invoice is paid with probability ``paid_ratio``, after an
+  exponentially distributed delay. Invoices whose payment would fall
+  after ``end`` stay PENDING.
+
+Every chunk is one database transaction of bulk inserts, customers
+included. The Sale and Payment transactions are inserted directly rather
+than through Transaction.objects.record: updating the rollups and customer
+balances row by row would take most of the run time, so the command
+rebuilds them once at the end instead.
+"""
+
+import math
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db import transaction
+
+from customers.models import Customer
+from invoices.models import Invoice, InvoiceItem
+from transactions.models import Transaction
+
+CENTS = Decimal('0.01')
+
+PRODUCTS = [
+    'Widget', 'Gadget', 'Sprocket', 'Bracket', 'Fastener', 'Cable', 'Adapter', 'Sensor',
+    'Valve', 'Bearing', 'Filter', 'Gasket', 'Hinge', 'Switch', 'Relay', 'Panel',
+]
+FINISHES = ['Standard', 'Pro', 'Mini', 'XL', 'Steel', 'Brass', 'Plastic', 'Carbon']
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Parameters that fully determine a generated dataset"""
+    invoices: int
+    owner_ids: tuple
+    end: datetime
+    seed: int = 0
+    prefix: str = 'SEED'
+    days: int = 365
+    customers: int = 5000
+    max_items: int = 10
+    paid_ratio: float = 0.7
+    chunk_size: int = 5000
+
+    @property
+    def chunks(self):
+        return math.ceil(self.invoices / self.chunk_size)
+
+
+def zipf_weights(count, exponent=1.1):
+    """Cumulative Zipf weights for random.choices(cum_weights=...)"""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class Catalog:
+    """Products and weighted pools shared by every chunk of a dataset"""
+
+    def __init__(self, spec):
+        rng = random.Random(spec.seed)
+        self.products = [
+            (f'{finish} {product}', Decimal(str(round(rng.lognormvariate(3, 1), 2))).max(CENTS))
+            for product in PRODUCTS
+            for finish in FINISHES
+        ]
+        rng.shuffle(self.products)
+        self.product_weights = zipf_weights(len(self.products))
+        self.customer_weights = zipf_weights(spec.customers)
+        self.owner_weights = zipf_weights(len(spec.owner_ids), exponent=0.8)
+        # P(n items) halves with every extra item
+        self.item_count_weights = list(accumulate(0.5 ** n for n in range(spec.max_items)))
+
+
+def customer(number):
+    """Deterministic contact details of customer ``number``; some lack an email or phone"""
+    return {
+        'customer_name': f'Customer {number:05d}',
+        'customer_email': f'billing{number}@customer{number}.example.com' if number % 5 else None,
+        'customer_phone': f'+1555{number:07d}' if number % 3 else None,
+    }
+
+
+def generate_chunk(spec, catalog, index):
+    """Build unsaved (invoices, items per invoice, paid_at per invoice) for chunk ``index``"""
+    rng = random.Random(f'{spec.seed}:{index}')
+    span = timedelta(days=spec.days).total_seconds()
+    start = spec.end - timedelta(days=spec.days)
+
+    invoices, items, paid = [], [], []
+    first = index * spec.chunk_size
+    for number in range(first, min(first + spec.chunk_size, spec.invoices)):
+        created_at = start + timedelta(seconds=span * (number + rng.random()) / spec.invoices)
+
+        count = rng.choices(range(1, spec.max_items + 1), cum_weights=catalog.item_count_weights)[0]
+        invoice_items = []
+        for name, price in rng.choices(catalog.products, cum_weights=catalog.product_weights, k=count):
+            quantity = rng.choices((1, 2, 3, 5, 10), cum_weights=(50, 75, 87, 95, 100))[0]
+            invoice_items.append(InvoiceItem(name=name, quantity=quantity, price=price))
+
+        paid_at = None
+        if rng.random() < spec.paid_ratio:
+            paid_at = created_at + timedelta(days=rng.expovariate(1 / 7))
+            if paid_at > spec.end:
+                paid_at = None
+
+        customer_number = rng.choices(range(spec.customers), cum_weights=catalog.customer_weights)[0]
+        owner_id = rng.choices(spec.owner_ids, cum_weights=catalog.owner_weights)[0]
+        invoices.append(Invoice(
+            reference=f'{spec.prefix}-{number:08d}',
+            total_amount=sum(item.quantity * item.price for item in invoice_items),
+            status='PAID' if paid_at else 'PENDING',
+            created_by_id=owner_id,
+            created_at=created_at,
+            updated_at=paid_at or created_at,
+            **customer(customer_number),
+        ))
+        items.append(invoice_items)
+        paid.append(paid_at)
+    return invoices, items, paid
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let bulk_create keep the given created_at/updated_at/date values
+
+    Switches auto_now/auto_now_add off on the model fields for the duration,
+    so it must not be used in a process that also serves requests.
+    """
+    fields = [
+        Invoice._meta.get_field('created_at'),
+        Invoice._meta.get_field('updated_at'),
+        Transaction._meta.get_field('date'),
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def insert_chunk(spec, catalog, index):
+    """Generate and insert chunk ``index`` in one transaction; returns the number of invoices"""
+    invoices, items, paid = generate_chunk(spec, catalog, index)
+    with explicit_timestamps(), transaction.atomic():
+        customer_ids = Customer.objects.resolve([
+            (invoice.created_by_id, invoice.customer_name, invoice.customer_email, invoice.customer_phone)
+            for invoice in invoices
+        ])
+        for invoice, customer_id in zip(invoices, customer_ids):
+            invoice.customer_id = customer_id
+        Invoice.objects.bulk_create(invoices)
+        for invoice, invoice_items in zip(invoices, items):
+            for item in invoice_items:
+                item.invoice = invoice
+        InvoiceItem.objects.bulk_create([item for invoice_items in items for item in invoice_items])
+
+        ledger = []
+        for invoice, paid_at in zip(invoices, paid):
+            ledger.append(Transaction(
+                invoice=invoice, owner_id=invoice.created_by_id, transaction_type='Sale',
+                amount=invoice.total_amount, date=invoice.created_at,
+            ))
+            if paid_at:
+                ledger.append(Transaction(
+                    invoice=invoice, owner_id=invoice.created_by_id, transaction_type='Payment',
+                    amount=invoice.total_amount, date=paid_at,
+                ))
+        Transaction.objects.bulk_create(ledger)
+    return len(invoices)
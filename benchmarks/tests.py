@@ -0,0 +1,158 @@
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TransactionTestCase
+
+from customers.models import Customer
+from invoices.models import Invoice
+from reports.models import DailySummary
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class BenchConnectionsCommandTestCase(TransactionTestCase):
+    """Smoke test for the bench_connections command"""
+    
+    def test_reports_each_mode(self):
+        """Test that every mode completes without errors and cleans up after itself"""
+        stdout = io.StringIO()
+        call_command('bench_connections', requests=8, concurrency=2, stdout=stdout)
+        
+        lines = stdout.getvalue().splitlines()
+        for mode in ('per-request', 'persistent'):
+            line = next(line for line in lines if line.startswith(mode))
+            self.assertIn('requests=8 errors=0', line)
+        self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+
+
+class BenchAsyncCommandTestCase(TransactionTestCase):
+    """Smoke test for the bench_async command"""
+    
+    def test_reports_both_stacks(self):
+        """Test that the WSGI and ASGI runs both serve every request"""
+        for endpoint in ('invoices', 'profile'):
+            stdout = io.StringIO()
+            call_command('bench_async', endpoint=endpoint, requests=6, clients=3, threads=2, stdout=stdout)
+            
+            lines = stdout.getvalue().splitlines()
+            for stack in ('wsgi-threads', 'asgi-async'):
+                line = next(line for line in lines if line.startswith(stack))
+                self.assertIn('requests=6 errors=0', line)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Compares SQLite journal modes')
+class BenchSQLiteWritesCommandTestCase(TransactionTestCase):
+    """Smoke test for the bench_sqlite_writes command"""
+    
+    def test_reports_each_profile(self):
+        """Test that both profiles create every invoice and the journal mode is restored"""
+        with connection.cursor() as cursor:
+            journal_mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+        
+        stdout = io.StringIO()
+        call_command('bench_sqlite_writes', requests=6, concurrency=3, stdout=stdout)
+        
+        lines = stdout.getvalue().splitlines()
+        for profile in ('default', 'tuned'):
+            line = next(line for line in lines if line.startswith(profile))
+            self.assertIn('requests=6 errors=0', line)
+        self.assertFalse(Invoice.objects.exists())
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA journal_mode').fetchone()[0], journal_mode)
+
+
+class LoadTestCommandTestCase(TransactionTestCase):
+    """Smoke test for the loadtest command"""
+    
+    def test_reports_each_call(self):
+        """Test that every call in the mix succeeds, results are written and seed data is removed"""
+        with tempfile.TemporaryDirectory() as directory:
+            first, second = os.path.join(directory, 'first.json'), os.path.join(directory, 'second.json')
+            for server, output, extra in (('wsgi', first, {}), ('asgi', second, {'compare': first})):
+                stdout = io.StringIO()
+                call_command(
+                    'loadtest', users=2, invoices=2, requests=30, concurrency=3, server=server,
+                    mix='register=1,token=1,invoice-create=1,invoice-list=1,invoice-pay=1,transaction-list=1',
+                    output=output, stdout=stdout, **extra
+                )
+                
+                with open(output) as results_file:
+                    results = json.load(results_file)
+                self.assertEqual(results['server'], server)
+                self.assertEqual(results['total']['requests'], 30)
+                self.assertEqual(
+                    set(results['calls']),
+                    {'register', 'token', 'invoice-create', 'invoice-list', 'invoice-pay', 'transaction-list'}
+                )
+                for call, summary in results['calls'].items():
+                    self.assertEqual(summary['errors'], 0, call)
+            
+            self.assertIn('Compared with', stdout.getvalue())
+        self.assertFalse(User.objects.exists())
+
+
+class SeedDataCommandTestCase(TransactionTestCase):
+    """Smoke test for the seed_data command"""
+    
+    def seed(self, **options):
+        call_command(
+            'seed_data', invoices=120, users=3, customers=20, chunk_size=50, end=datetime(2026, 6, 30),
+            seed=7, stdout=io.StringIO(), **options
+        )
+        return list(
+            Invoice.objects.order_by('reference')
+            .values_list('reference', 'customer_name', 'total_amount', 'status', 'created_at', 'created_by__username')
+        )
+    
+    def test_seeds_consistent_rows(self):
+        """Test that every invoice has items summing to its total and a matching ledger"""
+        self.seed()
+        
+        self.assertEqual(Invoice.objects.count(), 120)
+        self.assertEqual(User.objects.filter(username__startswith='seed-').count(), 3)
+        for invoice in Invoice.objects.prefetch_related('items', 'invoice_transactions'):
+            self.assertTrue(invoice.items.all())
+            self.assertEqual(sum(item.quantity * item.price for item in invoice.items.all()), invoice.total_amount)
+            types = sorted(transaction.transaction_type for transaction in invoice.invoice_transactions.all())
+            self.assertEqual(types, ['Payment', 'Sale'] if invoice.status == 'PAID' else ['Sale'])
+        self.assertEqual(Transaction.objects.count(), 120 + Invoice.objects.filter(status='PAID').count())
+        
+        summaries = DailySummary.objects.aggregate(sales=Sum('sales_amount'), payments=Sum('payments_amount'))
+        ledger = {
+            row['transaction_type']: row['total']
+            for row in Transaction.objects.values('transaction_type').annotate(total=Sum('amount'))
+        }
+        self.assertEqual(summaries, {'sales': ledger['Sale'], 'payments': ledger['Payment']})
+        
+        self.assertFalse(Invoice.objects.filter(customer__isnull=True).exists())
+        self.assertEqual(Customer.objects.aggregate(total=Sum('invoice_count'))['total'], 120)
+        self.assertEqual(
+            Customer.objects.aggregate(total=Sum('outstanding_amount'))['total'],
+            ledger['Sale'] - ledger['Payment']
+        )
+    
+    def test_deterministic(self):
+        """Test that the same seed reproduces the same rows, in-process or from workers"""
+        first = self.seed()
+        Invoice.objects.all().delete()
+        self.assertEqual(self.seed(), first)
+        
+        if not connection.is_in_memory_db():
+            Invoice.objects.all().delete()
+            self.assertEqual(self.seed(workers=2), first)
+    
+    def test_prefix_in_use(self):
+        """Test that seeding over an existing prefix is refused"""
+        self.seed()
+        with self.assertRaisesMessage(CommandError, 'already exist'):
+            self.seed()
+        self.assertEqual(Invoice.objects.count(), 120)
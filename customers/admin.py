@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Customer
+
+
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    """Admin interface for Customer"""
+    list_display = ['name', 'email', 'owner', 'invoice_count', 'invoiced_amount', 'outstanding_amount']
+    search_fields = ['name', 'email', 'owner__username']
+    readonly_fields = ['invoice_count', 'invoiced_amount', 'outstanding_amount', 'created_at']
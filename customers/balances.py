@@ -0,0 +1,137 @@
+"""
+Incremental maintenance of the per-customer invoice count and balances.
+
+A Sale adds its amount to the customer's invoiced and outstanding amounts;
+a Payment takes it off the outstanding amount. Transactions are mapped to
+customers through their invoice, using the invoice already attached to the
+transaction when there is one and a single query for the rest.
+
+Deleting an invoice takes all of its transactions off in one aggregate
+query and one UPDATE (see remove_invoice); transactions deleted on their
+own are not tracked and need ``rebuild_balances``.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+
+from invoices.models import Invoice
+from transactions.models import Transaction
+from .models import Customer
+
+BALANCE_FIELDS = ['invoice_count', 'invoiced_amount', 'outstanding_amount']
+
+
+def _customer_ids(transactions):
+    """Map invoice id to customer id for the invoices of ``transactions``"""
+    customers = {}
+    missing = set()
+    for entry in transactions:
+        if Transaction.invoice.is_cached(entry):
+            customers[entry.invoice_id] = entry.invoice.customer_id
+        else:
+            missing.add(entry.invoice_id)
+    if missing:
+        customers.update(Invoice.objects.filter(pk__in=missing).values_list('id', 'customer_id'))
+    return customers
+
+
+def _deltas(transactions, sign):
+    """Group transactions into {customer_id: {field: delta}}"""
+    customers = _customer_ids(transactions)
+    deltas = defaultdict(lambda: defaultdict(int))
+    for entry in transactions:
+        customer_id = customers.get(entry.invoice_id)
+        if customer_id is None:
+            continue
+        changes = deltas[customer_id]
+        if entry.transaction_type == 'Sale':
+            changes['invoice_count'] += sign
+            changes['invoiced_amount'] += sign * entry.amount
+            changes['outstanding_amount'] += sign * entry.amount
+        else:
+            changes['outstanding_amount'] -= sign * entry.amount
+    return deltas
+
+
+def apply_transactions(transactions, sign=1):
+    """Add (or with ``sign=-1`` remove) transactions to their customers' balances
+    
+    Issues one UPDATE per affected customer.
+    """
+    for customer_id, changes in _deltas(transactions, sign).items():
+        Customer.objects.filter(pk=customer_id).update(
+            **{field: F(field) + value for field, value in changes.items()}
+        )
+
+
+def remove_invoice(invoice):
+    """Take a deleted invoice's transactions off its customer's balances"""
+    if invoice.customer_id is None:
+        return
+    changes = defaultdict(int)
+    aggregates = (
+        Transaction.objects
+        .order_by()
+        .filter(invoice=invoice)
+        .values('transaction_type')
+        .annotate(count=Count('id'), amount=Sum('amount'))
+    )
+    for aggregate in aggregates:
+        if aggregate['transaction_type'] == 'Sale':
+            changes['invoice_count'] -= aggregate['count']
+            changes['invoiced_amount'] -= aggregate['amount']
+            changes['outstanding_amount'] -= aggregate['amount']
+        else:
+            changes['outstanding_amount'] += aggregate['amount']
+    if changes:
+        Customer.objects.filter(pk=invoice.customer_id).update(
+            **{field: F(field) + value for field, value in changes.items()}
+        )
+
+
+def rebuild():
+    """Recompute every customer's count and balances from the transactions table
+    
+    Returns the number of customers with transactions.
+    """
+    totals = defaultdict(lambda: {
+        'invoice_count': 0,
+        'invoiced_amount': Decimal('0.00'),
+        'outstanding_amount': Decimal('0.00'),
+    })
+    aggregates = (
+        Transaction.objects
+        .order_by()
+        .filter(invoice__customer__isnull=False)
+        .values('invoice__customer_id', 'transaction_type')
+        .annotate(count=Count('id'), amount=Sum('amount'))
+    )
+    for aggregate in aggregates:
+        row = totals[aggregate['invoice__customer_id']]
+        if aggregate['transaction_type'] == 'Sale':
+            row['invoice_count'] = aggregate['count']
+            row['invoiced_amount'] = aggregate['amount']
+            row['outstanding_amount'] += aggregate['amount']
+        else:
+            row['outstanding_amount'] -= aggregate['amount']
+    
+    # One prepared UPDATE per customer; bulk_update() would build a CASE
+    # expression per row, which costs far more than the statements
+    fields = [Customer._meta.get_field(name) for name in BALANCE_FIELDS]
+    quote = connection.ops.quote_name
+    sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+        quote(Customer._meta.db_table),
+        ', '.join(f'{quote(field.column)} = %s' for field in fields),
+        quote(Customer._meta.pk.column),
+    )
+    with transaction.atomic():
+        Customer.objects.update(**{name: 0 for name in BALANCE_FIELDS})
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [
+                [field.get_db_prep_save(row[field.name], connection) for field in fields] + [pk]
+                for pk, row in totals.items()
+            ])
+    return len(totals)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from customers.balances import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-customer invoice counts and balances from the transactions table'
+    
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt balances of {count} customers.'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(editable=False, max_length=64)),
+                ('name', models.CharField(max_length=200)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('phone', models.CharField(blank=True, max_length=50, null=True)),
+                ('invoice_count', models.PositiveIntegerField(default=0)),
+                ('invoiced_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'customers',
+                'ordering': ['name', 'id'],
+                'indexes': [models.Index(fields=['owner', 'name', 'id'], name='customers_owner_name_idx'), models.Index(fields=['owner', '-outstanding_amount'], name='customers_owner_owed_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'key'), name='customers_owner_key_uniq')],
+            },
+        ),
+    ]
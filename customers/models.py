@@ -0,0 +1,100 @@
+import hashlib
+
+from django.db import models
+from django.conf import settings
+
+
+def customer_key(name, email):
+    """Identity of a customer within an owner's book
+    
+    The email address when there is one, otherwise the name, both
+    compared case-insensitively. Stored as a sha256 hexdigest because
+    casefold() can make the normalised text longer than the input.
+    """
+    if email and email.strip():
+        key = f'email:{email.strip().lower()}'
+    else:
+        key = f'name:{name.strip().casefold()}'
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class CustomerQuerySet(models.QuerySet):
+    """QuerySet helpers shared by the customer API views and invoice writes"""
+    
+    def for_user(self, user):
+        """Restrict to the customers the given user is allowed to see"""
+        if user.is_anonymous:
+            return self.none()
+        if user.is_staff:
+            return self
+        return self.filter(owner_id=user.pk)
+    
+    def resolve(self, contacts):
+        """Customer ids for ``(owner_id, name, email, phone)`` tuples, in input order
+        
+        Missing customers are created from the first contact seen with their
+        key. Two queries whatever the number of contacts: an INSERT that
+        skips keys that already exist (including ones created concurrently)
+        and a SELECT of the ids.
+        """
+        keys = [(owner_id, customer_key(name, email)) for owner_id, name, email, _ in contacts]
+        new = {}
+        for (owner_id, key), (_, name, email, phone) in zip(keys, contacts):
+            if (owner_id, key) not in new:
+                new[owner_id, key] = self.model(owner_id=owner_id, key=key, name=name, email=email, phone=phone)
+        self.bulk_create(new.values(), ignore_conflicts=True)
+        
+        ids = {
+            (owner_id, key): pk
+            for pk, owner_id, key in self.filter(
+                owner_id__in={owner_id for owner_id, _ in keys},
+                key__in={key for _, key in keys},
+            ).values_list('id', 'owner_id', 'key')
+        }
+        return [ids[key] for key in keys]
+
+
+class Customer(models.Model):
+    """A customer of one user, shared by every invoice billed to them
+    
+    Invoices keep their own copy of the contact details as billed; the
+    customer holds the details of the first invoice. The invoice count and
+    balances are maintained incrementally by customers.balances whenever
+    transactions are recorded, so they are read without scanning invoices.
+    Rebuild them with `manage.py rebuild_balances`.
+    """
+    
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='customers')
+    # customer_key(name, email), unique per owner
+    key = models.CharField(max_length=64, editable=False)
+    name = models.CharField(max_length=200)
+    email = models.EmailField(blank=True, null=True)
+    phone = models.CharField(max_length=50, blank=True, null=True)
+    
+    invoice_count = models.PositiveIntegerField(default=0)
+    invoiced_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = CustomerQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['name', 'id']
+        db_table = 'customers'
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'key'], name='customers_owner_key_uniq'),
+        ]
+        indexes = [
+            # Per-user listing by name
+            models.Index(fields=['owner', 'name', 'id'], name='customers_owner_name_idx'),
+            # Largest outstanding balances first
+            models.Index(fields=['owner', '-outstanding_amount'], name='customers_owner_owed_idx'),
+        ]
+    
+    def __str__(self):
+        return self.name
+    
+    def save(self, *args, **kwargs):
+        self.key = customer_key(self.name, self.email)
+        super().save(*args, **kwargs)
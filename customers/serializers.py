@@ -0,0 +1,14 @@
+from rest_framework import serializers
+from .models import Customer
+
+
+class CustomerSerializer(serializers.ModelSerializer):
+    """Serializer for Customer with its maintained invoice count and balances"""
+    
+    class Meta:
+        model = Customer
+        fields = [
+            'id', 'name', 'email', 'phone',
+            'invoice_count', 'invoiced_amount', 'outstanding_amount', 'created_at'
+        ]
+        read_only_fields = fields
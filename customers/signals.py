@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from invoices.models import Invoice
+from transactions.models import Transaction
+from transactions.signals import transactions_recorded
+from .balances import apply_transactions, remove_invoice
+
+User = get_user_model()
+
+
+@receiver(transactions_recorded, sender=Transaction)
+def add_to_balances(sender, transactions, **kwargs):
+    apply_transactions(transactions)
+
+
+@receiver(pre_delete, sender=Invoice)
+def remove_from_balances(sender, instance, origin=None, **kwargs):
+    # Deleting a user deletes their customers along with the invoices
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if model is not User:
+        remove_invoice(instance)
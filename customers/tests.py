@@ -0,0 +1,213 @@
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from decimal import Decimal
+from io import StringIO
+from invoices.models import Invoice
+from sales_invoice.testing import InvoiceFixturesMixin, QueryDetectorMixin
+from transactions.models import Transaction
+from .models import Customer, customer_key
+
+
+class CustomerFixturesMixin(InvoiceFixturesMixin):
+    """Shared setup for customer tests"""
+    
+    def create_invoice(self, reference, price, name='Acme Corp', email='billing@acme.example.com', **fields):
+        return super().create_invoice(reference, price, customer_name=name, customer_email=email, **fields)
+
+
+@override_settings(INVOICE_CACHE_TIMEOUT=0)
+class CustomerTestCase(CustomerFixturesMixin, TestCase):
+    """Test cases for customer deduplication and maintained balances"""
+    
+    def test_invoices_share_customer(self):
+        """Test that invoices are grouped by email, or by name when there is none"""
+        first = self.create_invoice('CUST-1', '100.00')
+        second = self.create_invoice('CUST-2', '50.00', name='ACME Corporation', email='Billing@Acme.example.com')
+        unnamed = self.create_invoice('CUST-3', '10.00', name='Acme Corp', email=None)
+        self.assertEqual(first.customer_id, second.customer_id)
+        self.assertNotEqual(first.customer_id, unnamed.customer_id)
+        self.assertEqual(self.create_invoice('CUST-4', '10.00', name=' acme corp', email='').customer_id, unnamed.customer_id)
+        
+        # The customer keeps the details of its first invoice
+        customer = first.customer
+        self.assertEqual((customer.name, customer.owner), ('Acme Corp', self.user))
+        self.assertEqual(customer.key, customer_key('Acme Corp', 'billing@acme.example.com'))
+        
+        # The same customer of another user is a different record
+        self.client.force_authenticate(user=self.other_user)
+        self.assertNotEqual(self.create_invoice('CUST-5', '10.00').customer_id, first.customer_id)
+    
+    def test_key_fits_names_that_grow_when_casefolded(self):
+        """Test that a name longer than the key column once casefolded still gets a customer"""
+        invoice = self.create_invoice('CUST-1', '10.00', name='Straße' * 33, email=None)
+        self.assertEqual(invoice.customer.key, customer_key('STRASSE' * 33, None))
+        self.assertEqual(len(invoice.customer.key), 64)
+    
+    def test_balances_follow_create_and_pay(self):
+        """Test that recording Sale and Payment transactions updates the customer"""
+        first = self.create_invoice('CUST-1', '100.00')
+        second = self.create_invoice('CUST-2', '50.00')
+        third = self.create_invoice('CUST-3', '25.00')
+        self.client.patch(f'/api/invoices/{first.id}/pay/')
+        self.client.post('/api/invoices/pay/', {'ids': [second.id]}, format='json')
+        
+        customer = Customer.objects.get(pk=first.customer_id)
+        self.assertEqual(customer.invoice_count, 3)
+        self.assertEqual(customer.invoiced_amount, Decimal('175.00'))
+        self.assertEqual(customer.outstanding_amount, Decimal('25.00'))
+        
+        self.client.delete(f'/api/invoices/{third.id}/')
+        customer.refresh_from_db()
+        self.assertEqual(customer.invoice_count, 2)
+        self.assertEqual(customer.outstanding_amount, Decimal('0.00'))
+    
+    def test_invoice_created_paid_is_not_outstanding(self):
+        """Test that an invoice created as PAID adds nothing to the outstanding balance"""
+        self.create_invoice('CUST-PAID', '10.00', status='PAID')
+        
+        customer = Customer.objects.get()
+        self.assertEqual(customer.invoiced_amount, Decimal('10.00'))
+        self.assertEqual(customer.outstanding_amount, Decimal('0.00'))
+        self.assertEqual(self.client.get('/api/customers/?outstanding=true').data['results'], [])
+    
+    def test_paid_invoice_cannot_be_reopened(self):
+        """Test that PAID -> PENDING is refused, so paying again can't record a second Payment"""
+        invoice = self.create_invoice('CUST-1', '10.00')
+        self.client.patch(f'/api/invoices/{invoice.id}/pay/')
+        
+        response = self.client.patch(f'/api/invoices/{invoice.id}/', {'status': 'PENDING'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(f'/api/invoices/{invoice.id}/', {'status': 'PAID'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, 'PAID')
+        self.assertEqual(Transaction.objects.filter(invoice=invoice, transaction_type='Payment').count(), 1)
+        self.assertEqual(Customer.objects.get().outstanding_amount, Decimal('0.00'))
+    
+    def test_invoice_delete_updates_customer_once(self):
+        """Test that deleting an invoice adjusts its customer with a single UPDATE"""
+        invoice = self.create_invoice('CUST-1', '100.00')
+        self.create_invoice('CUST-2', '50.00')
+        self.client.patch(f'/api/invoices/{invoice.id}/pay/')
+        
+        with CaptureQueriesContext(connection) as context:
+            invoice.delete()
+        customer_queries = [q for q in context.captured_queries if 'UPDATE "customers"' in q['sql']]
+        self.assertEqual(len(customer_queries), 1)
+        
+        customer = Customer.objects.get()
+        self.assertEqual(customer.invoice_count, 1)
+        self.assertEqual(customer.invoiced_amount, Decimal('50.00'))
+        self.assertEqual(customer.outstanding_amount, Decimal('50.00'))
+    
+    def test_user_delete_skips_balances(self):
+        """Test that deleting a user removes their customers without adjusting them first"""
+        self.create_invoice('CUST-1', '100.00')
+        self.create_invoice('CUST-2', '50.00', name='Beta Ltd', email=None)
+        
+        with CaptureQueriesContext(connection) as context:
+            self.user.delete()
+        self.assertFalse([q for q in context.captured_queries if 'UPDATE "customers"' in q['sql']])
+        self.assertFalse(Customer.objects.exists())
+    
+    def test_orm_created_invoice_gets_customer(self):
+        """Test that invoices saved outside the API are linked too"""
+        invoice = Invoice.objects.create(
+            reference='CUST-ORM',
+            customer_name='Acme Corp',
+            customer_email='billing@acme.example.com',
+            total_amount=Decimal('10.00'),
+            created_by=self.user
+        )
+        self.assertEqual(invoice.customer_id, self.create_invoice('CUST-1', '10.00').customer_id)
+    
+    def test_rebuild_matches_incremental_balances(self):
+        """Test that rebuild_balances reproduces the incrementally maintained values"""
+        first = self.create_invoice('CUST-1', '100.00')
+        self.create_invoice('CUST-2', '50.00', name='Other', email=None)
+        self.client.patch(f'/api/invoices/{first.id}/pay/')
+        expected = list(Customer.objects.order_by('id').values())
+        
+        # Transactions written directly bypass the balances until a rebuild
+        Transaction.objects.create(invoice=first, transaction_type='Sale', amount=Decimal('1.00'))
+        Customer.objects.update(invoice_count=0, invoiced_amount=0, outstanding_amount=0)
+        
+        out = StringIO()
+        call_command('rebuild_balances', stdout=out)
+        self.assertIn('Rebuilt balances of 2 customers', out.getvalue())
+        
+        expected[0].update(invoice_count=2, invoiced_amount=Decimal('101.00'), outstanding_amount=Decimal('1.00'))
+        self.assertEqual(list(Customer.objects.order_by('id').values()), expected)
+
+
+@override_settings(INVOICE_CACHE_TIMEOUT=0)
+class CustomerAPITestCase(QueryDetectorMixin, CustomerFixturesMixin, TestCase):
+    """Test cases for /api/customers/ and /api/customers/{id}/invoices/"""
+    
+    def test_list_is_scoped_to_user(self):
+        """Test that users only see their own customers, with their balances"""
+        invoice = self.create_invoice('CUST-1', '100.00')
+        self.create_invoice('CUST-2', '20.00', name='Beta Ltd', email=None)
+        self.client.force_authenticate(user=self.other_user)
+        self.create_invoice('CUST-3', '30.00')
+        
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/customers/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['name'] for row in response.data['results']], ['Acme Corp', 'Beta Ltd'])
+        self.assertEqual(response.data['results'][0]['outstanding_amount'], '100.00')
+        
+        response = self.client.get(f'/api/customers/{invoice.customer_id}/')
+        self.assertEqual(response.data['invoice_count'], 1)
+        
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(f'/api/customers/{invoice.customer_id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_outstanding_filter(self):
+        """Test that ?outstanding=true lists customers owing money, largest balance first"""
+        paid = self.create_invoice('CUST-1', '500.00')
+        self.create_invoice('CUST-2', '20.00', name='Beta Ltd', email=None)
+        self.create_invoice('CUST-3', '80.00', name='Gamma Inc', email=None)
+        self.client.patch(f'/api/invoices/{paid.id}/pay/')
+        
+        response = self.client.get('/api/customers/?outstanding=true')
+        self.assertEqual([row['name'] for row in response.data['results']], ['Gamma Inc', 'Beta Ltd'])
+    
+    def test_customer_invoices(self):
+        """Test that the endpoint lists only the customer's invoices, newest first"""
+        first = self.create_invoice('CUST-1', '100.00')
+        second = self.create_invoice('CUST-2', '50.00')
+        self.create_invoice('CUST-3', '10.00', name='Beta Ltd', email=None)
+        self.client.patch(f'/api/invoices/{first.id}/pay/')
+        
+        url = f'/api/customers/{first.customer_id}/invoices/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['reference'] for row in response.data['results']], ['CUST-2', 'CUST-1'])
+        self.assertEqual(response.data['results'][0]['customer'], first.customer_id)
+        self.assertEqual(response.data['results'][0]['items'][0]['name'], 'Product')
+        
+        response = self.client.get(url + '?status=PENDING')
+        self.assertEqual([row['id'] for row in response.data['results']], [second.id])
+        
+        with override_settings(FAST_READ_SERIALIZERS=True):
+            fast = self.client.get(url)
+        self.assertEqual(fast.json(), self.client.get(url).json())
+        
+        self.client.force_authenticate(user=self.other_user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_customer_invoices_query_count(self):
+        """Test that listing a customer's invoices runs a fixed number of queries"""
+        for i in range(5):
+            self.create_invoice(f'CUST-{i}', '10.00')
+        customer_id = Invoice.objects.first().customer_id
+        
+        with self.assertNoRepeatedQueries(threshold=1):
+            response = self.client.get(f'/api/customers/{customer_id}/invoices/')
+        self.assertEqual(len(response.data['results']), 5)
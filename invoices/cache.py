@@ -0,0 +1,128 @@
+"""
+Per-user response cache for invoice reads.
+
+Serialized list pages and invoice details are cached under a key that
+embeds a version number per scope (one per user, plus one shared by
+admins). Any write to a user's invoices bumps that user's version and the
+admin version once it commits, so stale entries are simply never read again and expire on
+their own. The cache backend is chosen with INVOICE_CACHE_ALIAS.
+
+ETag / Last-Modified revalidation happens before the cache is consulted,
+see sales_invoice.conditional.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+ADMIN_SCOPE = 'all'
+
+
+class CacheStats:
+    """Process-wide hit/miss counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[settings.INVOICE_CACHE_ALIAS]
+
+
+def scope_for(user):
+    """Admins share one scope since they all see every invoice"""
+    return ADMIN_SCOPE if user.is_staff else f'user:{user.pk}'
+
+
+def _version_key(scope):
+    return f'invoices:version:{scope}'
+
+
+def get_version(scope):
+    """Current version of a scope, initialised to a timestamp if missing
+    
+    Starting from a timestamp rather than 1 means an evicted counter can
+    never come back at a value that old entries were stored under.
+    """
+    cache = get_cache()
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(scopes):
+    cache = get_cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate(owner_ids):
+    """Bump the versions of the given users and of the admin scope
+    
+    The bump waits for the surrounding transaction to commit: bumped
+    earlier, a concurrent read could cache pre-commit data under the new
+    version and keep serving it until the next write.
+    """
+    scopes = {f'user:{owner_id}' for owner_id in owner_ids} | {ADMIN_SCOPE}
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+class CachedReadMixin:
+    """Serve list and retrieve from the invoice cache"""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        scope = scope_for(request.user)
+        version = get_version(scope)
+        digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        key = f'invoices:response:{scope}:{version}:{digest}'
+
+        cache = get_cache()
+        data = cache.get(key)
+        if data is not None:
+            stats.record('hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+        else:
+            stats.record('misses')
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(key, response.data, settings.INVOICE_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+        return response
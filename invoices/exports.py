@@ -0,0 +1,58 @@
+"""Records and CSV rows for the streaming invoice export (see sales_invoice.exports)"""
+
+from sales_invoice.exports import EXPORT_CHUNK_SIZE
+
+INVOICE_FIELDS = [
+    'id', 'reference', 'customer_name', 'customer_email', 'customer_phone',
+    'total_amount', 'status', 'created_by', 'created_at', 'updated_at',
+]
+ITEM_FIELDS = ['id', 'name', 'quantity', 'price', 'subtotal']
+
+INVOICE_CSV_HEADER = INVOICE_FIELDS + [f'item_{field}' for field in ITEM_FIELDS]
+
+
+def _serialize_invoice(invoice):
+    return {
+        'id': invoice.id,
+        'reference': invoice.reference,
+        'customer_name': invoice.customer_name,
+        'customer_email': invoice.customer_email,
+        'customer_phone': invoice.customer_phone,
+        'total_amount': invoice.total_amount,
+        'status': invoice.status,
+        'created_by': str(invoice.created_by),
+        'created_at': invoice.created_at,
+        'updated_at': invoice.updated_at,
+    }
+
+
+def _serialize_item(item):
+    return {
+        'id': item.id,
+        'name': item.name,
+        'quantity': item.quantity,
+        'price': item.price,
+        'subtotal': item.subtotal,
+    }
+
+
+def invoice_records(queryset):
+    """Yield one dict per invoice with its items nested"""
+    for invoice in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        record = _serialize_invoice(invoice)
+        record['items'] = [_serialize_item(item) for item in invoice.items.all()]
+        yield record
+
+
+def invoice_rows(queryset):
+    """Yield one flat CSV row per invoice item, prefixed with the invoice columns
+    
+    Invoices without items get a single row with blank item columns, so
+    every exported invoice appears in the CSV as in the NDJSON output.
+    """
+    for record in invoice_records(queryset):
+        invoice_values = [record[field] for field in INVOICE_FIELDS]
+        if not record['items']:
+            yield invoice_values + [''] * len(ITEM_FIELDS)
+        for item in record['items']:
+            yield invoice_values + [item[field] for field in ITEM_FIELDS]
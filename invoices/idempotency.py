@@ -0,0 +1,90 @@
+"""
+Idempotency-Key support for unsafe invoice endpoints.
+
+The first response for a given key (per user, method and path) is stored
+in the cache; retries with the same key get the stored response back
+without running the view or touching the database again. A retry that
+arrives while the first request is still running gets 409 Conflict, and
+reusing a key with a different request body gets 422 Unprocessable
+Entity rather than the first request's response.
+
+Use a shared cache backend (e.g. Redis) when running several worker
+processes, otherwise each process has its own store.
+"""
+
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+LOCK_TIMEOUT = 60
+
+
+def get_cache():
+    return caches[settings.IDEMPOTENCY_CACHE_ALIAS]
+
+
+def _store_key(request, key):
+    scope = f'{request.user.pk}:{request.method}:{request.path}:{key}'
+    return 'idempotency:' + hashlib.sha256(scope.encode()).hexdigest()
+
+
+def _body_digest(request):
+    # Read before the view parses it; Django keeps the bytes for the parsers
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def idempotent(view_method):
+    """Decorate a ViewSet method so it honours the Idempotency-Key header"""
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        cache = get_cache()
+        store_key = _store_key(request, key)
+        body_digest = _body_digest(request)
+        stored = cache.get(store_key)
+        if stored is not None:
+            if stored['body'] != body_digest:
+                return Response(
+                    {'error': f'This {IDEMPOTENCY_HEADER} was already used with a different request body.'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            response = Response(stored['data'], status=stored['status'])
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        
+        lock_key = f'{store_key}:lock'
+        if not cache.add(lock_key, True, timeout=LOCK_TIMEOUT):
+            return Response(
+                {'error': f'A request with this {IDEMPOTENCY_HEADER} is already being processed.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            # Server errors are not stored so the client can retry them
+            if response.status_code < 500:
+                cache.set(
+                    store_key,
+                    {'status': response.status_code, 'data': response.data, 'body': body_digest},
+                    settings.IDEMPOTENCY_KEY_TIMEOUT
+                )
+        finally:
+            cache.delete(lock_key)
+        return response
+    
+    return wrapper
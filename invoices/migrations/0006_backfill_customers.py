@@ -0,0 +1,136 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:40
+
+import hashlib
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, transaction
+from django.db.models import Count, Sum
+
+BATCH_SIZE = 2000
+
+
+def customer_key(name, email):
+    # Frozen copy of customers.models.customer_key
+    if email and email.strip():
+        key = f'email:{email.strip().lower()}'
+    else:
+        key = f'name:{name.strip().casefold()}'
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def backfill_customers(apps, schema_editor):
+    """Create customers from the invoices' contact details and link them
+    
+    Walks invoices in id order, one transaction per batch, so a large table
+    is never locked for the whole run and an interrupted run resumes where
+    it stopped.
+    """
+    Customer = apps.get_model('customers', 'Customer')
+    Invoice = apps.get_model('invoices', 'Invoice')
+    quote = schema_editor.connection.ops.quote_name
+    table = quote(Invoice._meta.db_table)
+    column = quote(Invoice._meta.get_field('customer').column)
+    pk = quote(Invoice._meta.pk.column)
+    
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Invoice.objects
+                .filter(customer__isnull=True, id__gt=last_id)
+                .order_by('id')
+                .values('id', 'created_by_id', 'customer_name', 'customer_email', 'customer_phone')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            
+            keys = [(row['created_by_id'], customer_key(row['customer_name'], row['customer_email'])) for row in rows]
+            new = {}
+            for key, row in zip(keys, rows):
+                if key not in new:
+                    new[key] = Customer(
+                        owner_id=key[0],
+                        key=key[1],
+                        name=row['customer_name'],
+                        email=row['customer_email'],
+                        phone=row['customer_phone'],
+                    )
+            Customer.objects.bulk_create(new.values(), ignore_conflicts=True)
+            
+            ids = {
+                (owner_id, key): pk
+                for pk, owner_id, key in Customer.objects.filter(
+                    owner_id__in={owner_id for owner_id, _ in keys},
+                    key__in={key for _, key in keys},
+                ).values_list('id', 'owner_id', 'key')
+            }
+            # bulk_update() builds a CASE expression per row, which costs far
+            # more than the statement itself at this size
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(
+                    f'UPDATE {table} SET {column} = %s WHERE {pk} = %s',
+                    [(ids[key], row['id']) for key, row in zip(keys, rows)],
+                )
+
+
+def backfill_balances(apps, schema_editor):
+    """Compute every customer's invoice count and balances from the ledger"""
+    Customer = apps.get_model('customers', 'Customer')
+    Transaction = apps.get_model('transactions', 'Transaction')
+    
+    totals = defaultdict(lambda: {
+        'invoice_count': 0,
+        'invoiced_amount': Decimal('0.00'),
+        'outstanding_amount': Decimal('0.00'),
+    })
+    aggregates = (
+        Transaction.objects
+        .order_by()
+        .filter(invoice__customer__isnull=False)
+        .values('invoice__customer_id', 'transaction_type')
+        .annotate(count=Count('id'), amount=Sum('amount'))
+    )
+    for aggregate in aggregates:
+        row = totals[aggregate['invoice__customer_id']]
+        if aggregate['transaction_type'] == 'Sale':
+            row['invoice_count'] = aggregate['count']
+            row['invoiced_amount'] = aggregate['amount']
+            row['outstanding_amount'] += aggregate['amount']
+        else:
+            row['outstanding_amount'] -= aggregate['amount']
+    
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    fields = [Customer._meta.get_field(name) for name in ('invoice_count', 'invoiced_amount', 'outstanding_amount')]
+    sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+        quote(Customer._meta.db_table),
+        ', '.join(f'{quote(field.column)} = %s' for field in fields),
+        quote(Customer._meta.pk.column),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            [field.get_db_prep_save(row[field.name], connection) for field in fields] + [pk]
+            for pk, row in totals.items()
+        ])
+
+
+def unlink_customers(apps, schema_editor):
+    Invoice = apps.get_model('invoices', 'Invoice')
+    Invoice.objects.update(customer=None)
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('invoices', '0005_invoice_customer'),
+        ('transactions', '0005_transaction_owner_not_null'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_customers, unlink_customers),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,23 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
+from customers.models import Customer
+
+
+class InvoiceQuerySet(models.QuerySet):
+    """QuerySet helpers shared by the invoice API views"""
+
+    def for_user(self, user):
+        """Restrict to the invoices the given user is allowed to see"""
+        if user.is_anonymous:
+            return self.none()
+        if user.is_staff:
+            return self
+        return self.filter(created_by_id=user.pk)
+
+    def with_details(self):
+        """Load everything InvoiceReadSerializer renders in a fixed number of queries"""
+        return self.select_related('created_by').prefetch_related('items')
 
 
 class Invoice(models.Model):
@@ -13,6 +30,10 @@ class Invoice(models.Model):
     ]
     
     reference = models.CharField(max_length=100, unique=True, db_index=True)
+    # Contact details as billed; the customer groups every invoice billed to them
+    customer = models.ForeignKey(
+        Customer, on_delete=models.RESTRICT, related_name='invoices', null=True, blank=True, editable=False
+    )
     customer_name = models.CharField(max_length=200)
     customer_email = models.EmailField(blank=True, null=True)
     customer_phone = models.CharField(max_length=50, blank=True, null=True)
@@ -24,13 +45,33 @@ class Invoice(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = InvoiceQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         db_table = 'invoices'
+        indexes = [
+            # Keyset pagination on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='invoices_created_id_idx'),
+            # Per-user listing, optionally filtered by status
+            models.Index(fields=['created_by', '-created_at', '-id'], name='invoices_owner_created_idx'),
+            models.Index(fields=['created_by', 'status', '-created_at', '-id'], name='invoices_owner_status_idx'),
+            # Admin listing filtered by status
+            models.Index(fields=['status', '-created_at', '-id'], name='invoices_status_created_idx'),
+            # Per-customer listing
+            models.Index(fields=['customer', '-created_at', '-id'], name='invoices_customer_created_idx'),
+        ]
     
     def __str__(self):
         return f"Invoice {self.reference} - {self.customer_name}"
     
+    def save(self, *args, **kwargs):
+        if self.customer_id is None and self.created_by_id is not None:
+            self.customer_id = Customer.objects.resolve([
+                (self.created_by_id, self.customer_name, self.customer_email, self.customer_phone)
+            ])[0]
+        super().save(*args, **kwargs)
+    
     def clean(self):
         if self.total_amount < 0:
             raise ValidationError("Total amount cannot be negative")
@@ -0,0 +1,27 @@
+import json
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Parses newline-delimited JSON into a list with one object per line"""
+    media_type = 'application/x-ndjson'
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return []
+        
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        
+        records = []
+        for number, line in enumerate(stream, start=1):
+            try:
+                line = line.decode(encoding).strip()
+                if line:
+                    records.append(json.loads(line))
+            except ValueError as exc:
+                # Also covers UnicodeDecodeError
+                raise ParseError(f'NDJSON parse error on line {number} - {exc}')
+        return records
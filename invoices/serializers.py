@@ -1,11 +1,119 @@
 from rest_framework import serializers
 from decimal import Decimal
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from customers.models import Customer
 from .models import Invoice, InvoiceItem
 
 User = get_user_model()
 
 
+def create_invoices(user, records):
+    """Insert invoices with their items and Sale transactions in bulk
+    
+    ``records`` are validated InvoiceWriteSerializer payloads. Each total is
+    computed while building the items, and everything is inserted in one
+    atomic block with a fixed number of queries regardless of the number of
+    invoices or items, customers included. Invoices created as PAID also get
+    their Payment transaction. Returns the created invoices in input order.
+    """
+    from transactions.models import Transaction
+    
+    invoices = []
+    items = []
+    for record in records:
+        record = dict(record)
+        items_data = record.pop('items')
+        
+        invoice = Invoice(created_by=user, **record)
+        total = Decimal('0.00')
+        for item_data in items_data:
+            item = InvoiceItem(invoice=invoice, **item_data)
+            total += item.subtotal
+            items.append(item)
+        invoice.total_amount = total
+        invoices.append(invoice)
+    
+    with transaction.atomic():
+        customer_ids = Customer.objects.resolve([
+            (user.pk, invoice.customer_name, invoice.customer_email, invoice.customer_phone)
+            for invoice in invoices
+        ])
+        for invoice, customer_id in zip(invoices, customer_ids):
+            invoice.customer_id = customer_id
+        Invoice.objects.bulk_create(invoices)
+        InvoiceItem.objects.bulk_create(items)
+        
+        # Create Sale transactions, and Payments for invoices created as paid
+        Transaction.objects.record([
+            Transaction(invoice=invoice, owner=user, transaction_type='Sale', amount=invoice.total_amount)
+            for invoice in invoices
+        ] + [
+            Transaction(invoice=invoice, owner=user, transaction_type='Payment', amount=invoice.total_amount)
+            for invoice in invoices
+            if invoice.status == 'PAID'
+        ])
+    
+    return invoices
+
+
+def mark_invoice_paid(invoice):
+    """Flip a PENDING invoice to PAID and record its Payment transaction
+    
+    The status change is a conditional UPDATE on the PENDING row, so when
+    concurrent requests race only one of them matches it and records the
+    payment; the others get False back and write nothing.
+    """
+    from transactions.models import Transaction
+    
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Invoice.objects.filter(pk=invoice.pk, status='PENDING').update(status='PAID', updated_at=now)
+        if not updated:
+            return False
+        
+        invoice.status = 'PAID'
+        invoice.updated_at = now
+        Transaction.objects.record([
+            Transaction(invoice=invoice, transaction_type='Payment', amount=invoice.total_amount)
+        ])
+    return True
+
+
+class ConcurrentPaymentError(Exception):
+    """Raised when rows selected for a bulk payment changed before the UPDATE"""
+
+
+def mark_invoices_paid(rows):
+    """Set-based version of mark_invoice_paid
+    
+    ``rows`` are dicts with the id, created_by_id and total_amount of
+    PENDING invoices, selected with select_for_update() inside the caller's
+    atomic block. Flips them all with one UPDATE and records the Payment
+    transactions with one bulk insert. Raises ConcurrentPaymentError (and
+    so rolls back) if any row was paid by someone else in the meantime.
+    """
+    from transactions.models import Transaction
+    
+    ids = [row['id'] for row in rows]
+    now = timezone.now()
+    updated = Invoice.objects.filter(pk__in=ids, status='PENDING').update(status='PAID', updated_at=now)
+    if updated != len(ids):
+        raise ConcurrentPaymentError()
+    
+    Transaction.objects.record([
+        Transaction(
+            invoice_id=row['id'],
+            owner_id=row['created_by_id'],
+            transaction_type='Payment',
+            amount=row['total_amount']
+        )
+        for row in rows
+    ])
+
+
 class InvoiceItemSerializer(serializers.ModelSerializer):
     """Serializer for InvoiceItem"""
     subtotal = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
@@ -23,11 +131,11 @@ class InvoiceReadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoice
         fields = [
-            'id', 'reference', 'customer_name', 'customer_email', 'customer_phone',
+            'id', 'reference', 'customer', 'customer_name', 'customer_email', 'customer_phone',
             'total_amount', 'status', 'created_by', 'created_at', 'updated_at',
             'items'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'total_amount']
+        read_only_fields = ['id', 'customer', 'created_at', 'updated_at', 'total_amount']
 
 
 class InvoiceWriteSerializer(serializers.ModelSerializer):
@@ -37,49 +145,22 @@ class InvoiceWriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoice
         fields = [
-            'id', 'reference', 'customer_name', 'customer_email', 'customer_phone',
+            'id', 'reference', 'customer', 'customer_name', 'customer_email', 'customer_phone',
             'total_amount', 'status', 'created_by', 'created_at', 'updated_at',
             'items'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'total_amount', 'created_by']
+        read_only_fields = ['id', 'customer', 'created_at', 'updated_at', 'total_amount', 'created_by']
     
-    def create(self, validated_data):
-        items_data = validated_data.pop('items')
-        
+    def validate_items(self, value):
         # Validate at least one item exists
-        if not items_data:
-            raise serializers.ValidationError({
-                'items': 'Invoice must have at least one item.'
-            })
-        
-        # Calculate total first
-        total = Decimal('0.00')
-        for item_data in items_data:
-            total += Decimal(str(item_data['quantity'])) * Decimal(str(item_data['price']))
-        
+        if not value:
+            raise serializers.ValidationError('Invoice must have at least one item.')
+        return value
+    
+    def create(self, validated_data):
         # Get the user from the request context
         user = self.context['request'].user
-        
-        # Create invoice with calculated total
-        invoice = Invoice.objects.create(
-            created_by=user,
-            total_amount=total,
-            **validated_data
-        )
-        
-        # Create invoice items
-        for item_data in items_data:
-            InvoiceItem.objects.create(invoice=invoice, **item_data)
-        
-        # Create Sale transaction
-        from transactions.models import Transaction
-        Transaction.objects.create(
-            invoice=invoice,
-            transaction_type='Sale',
-            amount=invoice.total_amount
-        )
-        
-        return invoice
+        return create_invoices(user, [validated_data])[0]
     
     def update(self, instance, validated_data):
         # Only allow updating status for pending invoices
@@ -88,24 +169,47 @@ class InvoiceWriteSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({
                     'status': 'Only pending invoices can be marked as paid.'
                 })
+            if validated_data['status'] != 'PAID' and instance.status == 'PAID':
+                raise serializers.ValidationError({
+                    'status': 'Paid invoices cannot be reopened.'
+                })
         
-        # Update only status
-        if 'status' in validated_data:
-            instance.status = validated_data['status']
-            instance.save()
-            
-            # If marking as paid, create Payment transaction
-            if validated_data['status'] == 'PAID':
-                from transactions.models import Transaction
-                Transaction.objects.create(
-                    invoice=instance,
-                    transaction_type='Payment',
-                    amount=instance.total_amount
-                )
+        # Marking as paid also creates the Payment transaction; PENDING on a
+        # pending invoice changes nothing
+        if validated_data.get('status') == 'PAID':
+            if not mark_invoice_paid(instance):
+                raise serializers.ValidationError({
+                    'status': 'Only pending invoices can be marked as paid.'
+                })
         
         return instance
 
 
+class InvoiceImportSerializer(InvoiceWriteSerializer):
+    """Serializer for one record of a bulk import
+    
+    Reference uniqueness is checked for the whole batch at once by the
+    bulk endpoint instead of with one query per record.
+    """
+    reference = serializers.CharField(max_length=100)
+
+
+class InvoiceBulkPaySerializer(serializers.Serializer):
+    """Serializer for the invoices to settle in one bulk payment"""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    references = serializers.ListField(child=serializers.CharField(max_length=100), required=False, default=list)
+    
+    def validate(self, attrs):
+        count = len(attrs['ids']) + len(attrs['references'])
+        if not count:
+            raise serializers.ValidationError('Provide at least one invoice id or reference.')
+        if count > settings.INVOICE_BULK_MAX_BATCH:
+            raise serializers.ValidationError(
+                f'A batch can contain at most {settings.INVOICE_BULK_MAX_BATCH} invoices.'
+            )
+        return attrs
+
+
 class InvoiceStatusUpdateSerializer(serializers.ModelSerializer):
     """Serializer specifically for updating invoice status"""
     
@@ -116,5 +220,8 @@ class InvoiceStatusUpdateSerializer(serializers.ModelSerializer):
     def validate_status(self, value):
         if self.instance and self.instance.status != 'PENDING' and value == 'PAID':
             raise serializers.ValidationError('Only pending invoices can be marked as paid.')
+        # The Payment transaction stays in the ledger, so paid is final
+        if self.instance and self.instance.status == 'PAID' and value != 'PAID':
+            raise serializers.ValidationError('Paid invoices cannot be reopened.')
         return value
 
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from transactions.signals import transactions_recorded
+from .cache import invalidate
+from .models import Invoice
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invalidate_invoice_cache(sender, instance, **kwargs):
+    invalidate([instance.created_by_id])
+
+
+@receiver(transactions_recorded)
+def invalidate_after_transactions(sender, transactions, **kwargs):
+    # Bulk creates and payments don't send post_save for their invoices
+    invalidate({transaction.owner_id for transaction in transactions})
@@ -1,11 +1,27 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import threading
+from unittest import mock
+from unittest import skipUnless
+from django.test import TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.db import connection
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework.test import APIClient
 
 User = get_user_model()
 from rest_framework import status
 from decimal import Decimal
+from sales_invoice.pagination import Cursor, encode_cursor
+from sales_invoice.testing import QueryDetectorMixin, benchmark, report
+from . import cache as invoice_cache
 from .models import Invoice, InvoiceItem
+from users.serializers import CustomTokenObtainPairSerializer
+from .representations import invoice_representations, invoice_values
+from .serializers import InvoiceReadSerializer
 
 
 class InvoiceTestCase(TestCase):
@@ -14,6 +30,7 @@ class InvoiceTestCase(TestCase):
     def setUp(self):
         """Set up test data"""
         self.client = APIClient()
+        cache.clear()
         
         # Create test users
         self.user1 = User.objects.create_user(
@@ -153,6 +170,26 @@ class InvoiceTestCase(TestCase):
         response = self.client.patch(f'/api/invoices/{invoice.id}/pay/', format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
+    def test_status_update_to_paid_records_payment(self):
+        """Test that PATCH {"status": "PAID"} pays like /pay/, once"""
+        from transactions.models import Transaction
+        invoice = Invoice.objects.create(
+            reference='INV-STATUS',
+            customer_name='Customer',
+            total_amount=Decimal('100.00'),
+            created_by=self.user1
+        )
+        
+        url = f'/api/invoices/{invoice.id}/'
+        response = self.client.patch(url, {'status': 'PAID'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'status': 'PAID'})
+        self.assertEqual(Transaction.objects.filter(invoice=invoice, transaction_type='Payment').count(), 1)
+        
+        response = self.client.patch(url, {'status': 'PAID'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Transaction.objects.filter(invoice=invoice, transaction_type='Payment').count(), 1)
+    
     def test_user_sees_only_own_invoices(self):
         """Test that users can only see their own invoices"""
         user2 = User.objects.create_user(
@@ -180,6 +217,21 @@ class InvoiceTestCase(TestCase):
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['reference'], 'INV-006')
     
+    def test_filter_by_status(self):
+        """Test that ?status= restricts the list to invoices with that status"""
+        for reference, invoice_status in [('INV-010', 'PENDING'), ('INV-011', 'PAID')]:
+            Invoice.objects.create(
+                reference=reference,
+                customer_name='Customer',
+                total_amount=Decimal('100.00'),
+                status=invoice_status,
+                created_by=self.user1
+            )
+        
+        response = self.client.get('/api/invoices/?status=PAID')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['reference'] for row in response.data['results']], ['INV-011'])
+    
     def test_admin_sees_all_invoices(self):
         """Test that admin users can see all invoices"""
         user2 = User.objects.create_user(
@@ -220,3 +272,1085 @@ class InvoiceTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+
+
+class InvoiceQueryCountTestCase(QueryDetectorMixin, TestCase):
+    """Regression tests guarding invoice endpoints against N+1 queries"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='queryuser',
+            email='query@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def create_invoices(self, count, items_per_invoice):
+        """Create invoices owned by self.user, each with the given number of items"""
+        invoices = []
+        # Cache versions are bumped on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                invoice = Invoice.objects.create(
+                    reference=f'QC-{Invoice.objects.count() + 1:05d}',
+                    customer_name=f'Customer {i}',
+                    total_amount=Decimal('10.00') * items_per_invoice,
+                    created_by=self.user
+                )
+                InvoiceItem.objects.bulk_create([
+                    InvoiceItem(invoice=invoice, name=f'Item {j}', quantity=1, price=Decimal('10.00'))
+                    for j in range(items_per_invoice)
+                ])
+                invoices.append(invoice)
+        return invoices
+    
+    def count_queries(self, method, url, data=None, expected_status=status.HTTP_200_OK):
+        """Return the number of queries issued while serving a request
+        
+        Fails if the request repeats a statement, naming where it came from.
+        """
+        with self.assertNoRepeatedQueries(), CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertEqual(response.status_code, expected_status)
+        return len(context.captured_queries)
+    
+    def test_list_query_count_is_constant(self):
+        """Listing a full page costs the same as listing a single invoice"""
+        self.create_invoices(1, 1)
+        baseline = self.count_queries('get', '/api/invoices/')
+        
+        self.create_invoices(19, 5)
+        self.assertEqual(self.count_queries('get', '/api/invoices/'), baseline)
+        # ETag aggregate, page of invoices with owners, items
+        self.assertLessEqual(baseline, 3)
+    
+    def test_retrieve_query_count_is_constant(self):
+        """Retrieving an invoice doesn't depend on its number of items"""
+        small, large = self.create_invoices(1, 1) + self.create_invoices(1, 50)
+        
+        baseline = self.count_queries('get', f'/api/invoices/{small.id}/')
+        self.assertEqual(self.count_queries('get', f'/api/invoices/{large.id}/'), baseline)
+        # ETag aggregate, invoice with owner, items
+        self.assertLessEqual(baseline, 3)
+    
+    def test_pay_query_count_is_constant(self):
+        """Paying an invoice doesn't depend on its number of items"""
+        warmup, small, large = self.create_invoices(2, 1) + self.create_invoices(1, 50)
+        
+        # The first payment of the day also creates the reporting rollup row
+        self.count_queries('patch', f'/api/invoices/{warmup.id}/pay/')
+        
+        baseline = self.count_queries('patch', f'/api/invoices/{small.id}/pay/')
+        self.assertEqual(self.count_queries('patch', f'/api/invoices/{large.id}/pay/'), baseline)
+    
+    def test_detector_names_serializer_field(self):
+        """Test that an unprefetched list fails with the fields causing the N+1"""
+        self.create_invoices(5, 2)
+        
+        with self.assertRaises(AssertionError) as context:
+            with self.assertNoRepeatedQueries():
+                InvoiceReadSerializer(Invoice.objects.all(), many=True).data
+        message = str(context.exception)
+        self.assertIn('5x from InvoiceReadSerializer.items', message)
+        self.assertIn('5x from InvoiceReadSerializer.created_by', message)
+        
+        with self.assertNoRepeatedQueries() as log:
+            InvoiceReadSerializer(Invoice.objects.with_details(), many=True).data
+        self.assertLessEqual(len(log.queries), 2)
+    
+    def test_create_query_count_is_constant(self):
+        """Creating an invoice inserts all of its items at once"""
+        def payload(reference, item_count):
+            return {
+                'reference': reference,
+                'customer_name': 'Customer',
+                'items': [
+                    {'name': f'Item {i}', 'quantity': 1, 'price': '10.00'}
+                    for i in range(item_count)
+                ]
+            }
+        
+        # The first invoice of the day also creates the reporting rollup row
+        self.count_queries('post', '/api/invoices/', payload('QC-CREATE-0', 1), status.HTTP_201_CREATED)
+        
+        baseline = self.count_queries(
+            'post', '/api/invoices/', payload('QC-CREATE-1', 1), status.HTTP_201_CREATED
+        )
+        self.assertEqual(
+            self.count_queries('post', '/api/invoices/', payload('QC-CREATE-2', 50), status.HTTP_201_CREATED),
+            baseline
+        )
+        self.assertEqual(Invoice.objects.get(reference='QC-CREATE-2').total_amount, Decimal('500.00'))
+
+
+@tag('benchmark')
+class InvoiceCreateBenchmark(TestCase):
+    """Latency of POST /api/invoices/ as the number of line items grows"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='benchuser',
+            email='bench@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def test_create_latency_by_item_count(self):
+        for item_count in [1, 50, 1000]:
+            items = [
+                {'name': f'Item {i}', 'quantity': 2, 'price': '9.99'}
+                for i in range(item_count)
+            ]
+            references = iter(range(1000))
+            
+            def create():
+                response = self.client.post('/api/invoices/', {
+                    'reference': f'BENCH-{item_count}-{next(references)}',
+                    'customer_name': 'Benchmark Customer',
+                    'items': items,
+                }, format='json')
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            
+            seconds = benchmark(create, repeat=3)
+            report('invoice-create', items=item_count, seconds=seconds)
+
+
+class InvoiceBulkImportTestCase(TestCase):
+    """Test cases for POST /api/invoices/bulk/"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='bulkuser',
+            email='bulk@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def record(self, reference, item_count=2):
+        return {
+            'reference': reference,
+            'customer_name': 'Bulk Customer',
+            'items': [
+                {'name': f'Item {i}', 'quantity': 2, 'price': '5.00'}
+                for i in range(item_count)
+            ]
+        }
+    
+    def test_bulk_import_json_array(self):
+        """Test that every invoice, item and Sale transaction is created"""
+        records = [self.record(f'BULK-{i}') for i in range(3)]
+        
+        response = self.client.post('/api/invoices/bulk/', records, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([row['reference'] for row in response.data['created']], ['BULK-0', 'BULK-1', 'BULK-2'])
+        self.assertEqual(response.data['errors'], [])
+        
+        from transactions.models import Transaction
+        self.assertEqual(Invoice.objects.filter(created_by=self.user).count(), 3)
+        self.assertEqual(InvoiceItem.objects.filter(invoice__created_by=self.user).count(), 6)
+        self.assertEqual(Transaction.objects.filter(transaction_type='Sale').count(), 3)
+        self.assertEqual(Invoice.objects.get(reference='BULK-1').total_amount, Decimal('20.00'))
+    
+    def test_bulk_import_ndjson(self):
+        """Test that newline-delimited JSON bodies are accepted"""
+        body = '\n'.join(json.dumps(self.record(f'NDJSON-{i}')) for i in range(2)) + '\n'
+        
+        response = self.client.post('/api/invoices/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 2)
+    
+    def test_bulk_import_ndjson_rejects_undecodable_body(self):
+        """Test that a body that isn't valid UTF-8 is a 400, not a server error"""
+        response = self.client.post('/api/invoices/bulk/', b'\xff\xfe', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('line 1', response.data['detail'])
+    
+    def test_bulk_import_reports_per_record_errors(self):
+        """Test that invalid records are reported by index and valid ones still created"""
+        Invoice.objects.create(
+            reference='BULK-TAKEN',
+            customer_name='Customer',
+            total_amount=Decimal('10.00'),
+            created_by=self.user
+        )
+        records = [
+            self.record('BULK-OK'),
+            self.record('BULK-TAKEN'),
+            self.record('BULK-EMPTY', item_count=0),
+            self.record('BULK-OK'),
+        ]
+        
+        response = self.client.post('/api/invoices/bulk/', records, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([row['index'] for row in response.data['created']], [0])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+        self.assertIn('reference', response.data['errors'][0]['errors'])
+        self.assertIn('items', response.data['errors'][1]['errors'])
+    
+    def test_bulk_import_rejects_non_list(self):
+        """Test that a single object is rejected"""
+        response = self.client.post('/api/invoices/bulk/', self.record('BULK-1'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_bulk_import_query_count_is_constant(self):
+        """Test that the number of queries doesn't grow with the batch size"""
+        def count_queries(records):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post('/api/invoices/bulk/', records, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(context.captured_queries)
+        
+        # The first batch of the day also creates the reporting rollup row
+        count_queries([self.record('WARMUP-0')])
+        
+        baseline = count_queries([self.record('SMALL-0')])
+        self.assertEqual(count_queries([self.record(f'LARGE-{i}', 5) for i in range(25)]), baseline)
+
+
+class InvoiceExportTestCase(TestCase):
+    """Test cases for GET /api/invoices/export/"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='exportuser',
+            email='export@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        for reference, owner in [('EXP-1', self.user), ('EXP-2', self.user), ('EXP-OTHER', self.other_user)]:
+            invoice = Invoice.objects.create(
+                reference=reference,
+                customer_name='Customer, Inc.',
+                total_amount=Decimal('30.00'),
+                created_by=owner
+            )
+            InvoiceItem.objects.bulk_create([
+                InvoiceItem(invoice=invoice, name='Item A', quantity=1, price=Decimal('10.00')),
+                InvoiceItem(invoice=invoice, name='Item B', quantity=2, price=Decimal('10.00')),
+            ])
+    
+    def get_export(self, query=''):
+        response = self.client.get(f'/api/invoices/export/{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content).decode()
+    
+    def test_export_ndjson(self):
+        """Test that NDJSON export has one line per own invoice with nested items"""
+        response, content = self.get_export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(sorted(record['reference'] for record in records), ['EXP-1', 'EXP-2'])
+        self.assertEqual(records[0]['total_amount'], '30.00')
+        self.assertEqual(records[0]['created_by'], 'exportuser')
+        self.assertEqual([item['subtotal'] for item in records[0]['items']], ['10.00', '20.00'])
+    
+    def test_export_csv(self):
+        """Test that CSV export has a header and one row per invoice item"""
+        response, content = self.get_export('?output=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0][:2], ['id', 'reference'])
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1][2], 'Customer, Inc.')
+    
+    def test_export_csv_includes_invoices_without_items(self):
+        """Test that an invoice with no items still gets a CSV row, with blank item columns"""
+        invoice = Invoice.objects.create(
+            reference='EXPORT-EMPTY',
+            customer_name='Customer',
+            total_amount=Decimal('0.00'),
+            created_by=self.user
+        )
+        _, content = self.get_export('?output=csv')
+        rows = [row for row in csv.reader(io.StringIO(content)) if row[1] == 'EXPORT-EMPTY']
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][0], str(invoice.id))
+        self.assertEqual(rows[0][-5:], [''] * 5)
+    
+    def test_export_rejects_unknown_output(self):
+        """Test that an unsupported output format is rejected"""
+        response = self.client.get('/api/invoices/export/?output=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_admin_exports_all_invoices(self):
+        """Test that admin exports include every user's invoices"""
+        admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='adminpass123',
+            is_staff=True
+        )
+        self.client.force_authenticate(user=admin)
+        
+        _, content = self.get_export()
+        self.assertEqual(len(content.splitlines()), 3)
+
+
+class InvoicePaginationTestCase(TestCase):
+    """Test cases for keyset pagination of the invoice list"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='pageuser',
+            email='page@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        Invoice.objects.bulk_create([
+            Invoice(
+                reference=f'PAGE-{i:03d}',
+                customer_name='Customer',
+                total_amount=Decimal('10.00'),
+                created_by=self.user
+            )
+            for i in range(45)
+        ])
+        # Force ties on created_at so the id tie-breaker is exercised
+        Invoice.objects.filter(reference__lt='PAGE-020').update(created_at=timezone.now())
+    
+    def walk(self, url, link):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.append([row['id'] for row in response.data['results']])
+            url = response.data[link]
+        return ids
+    
+    def test_cursor_walks_every_invoice_once(self):
+        """Test that following next links visits every invoice in order"""
+        pages = self.walk('/api/invoices/', 'next')
+        
+        self.assertEqual([len(page) for page in pages], [20, 20, 5])
+        ids = [pk for page in pages for pk in page]
+        expected = list(
+            Invoice.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+    
+    def test_previous_link_returns_same_pages(self):
+        """Test that following previous links walks the same pages backwards"""
+        forward = self.walk('/api/invoices/', 'next')
+        last_page = self.client.get('/api/invoices/').data['next']
+        last_page = self.client.get(last_page).data['next']
+        
+        previous = self.client.get(last_page).data['previous']
+        backward = self.walk(previous, 'previous')
+        self.assertEqual(backward, forward[:2][::-1])
+    
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor returns 404"""
+        response = self.client.get('/api/invoices/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_page_number_fallback(self):
+        """Test that ?page= keeps the page number response format"""
+        response = self.client.get('/api/invoices/?page=3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 45)
+        self.assertEqual(len(response.data['results']), 5)
+
+
+@tag('benchmark')
+@override_settings(INVOICE_CACHE_TIMEOUT=0)
+class InvoicePaginationBenchmark(TestCase):
+    """Latency of page 1000 with page numbers vs keyset cursors"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='benchuser',
+            email='bench@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        Invoice.objects.bulk_create([
+            Invoice(
+                reference=f'DEEP-{i:06d}',
+                customer_name='Customer',
+                total_amount=Decimal('10.00'),
+                created_by=self.user
+            )
+            for i in range(20020)
+        ], batch_size=1000)
+    
+    def test_page_1000(self):
+        # The cursor a client would hold after following 999 next links
+        boundary = Invoice.objects.order_by('-created_at', '-id')[999 * 20 - 1]
+        cursor = encode_cursor(Cursor(boundary.created_at, boundary.id, False))
+        
+        offset_url = '/api/invoices/?page=1000'
+        keyset_url = f'/api/invoices/?cursor={cursor}'
+        self.assertEqual(
+            [row['id'] for row in self.client.get(offset_url).data['results']],
+            [row['id'] for row in self.client.get(keyset_url).data['results']],
+        )
+        
+        report('invoice-list page 1000', paginator='page-number', seconds=benchmark(lambda: self.client.get(offset_url)))
+        report('invoice-list page 1000', paginator='keyset', seconds=benchmark(lambda: self.client.get(keyset_url)))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are asserted in SQLite EXPLAIN QUERY PLAN format')
+class InvoiceIndexUsageTestCase(TestCase):
+    """EXPLAIN-based checks that list queries are served by the composite indexes"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='planuser',
+            email='plan@example.com',
+            password='testpass123'
+        )
+    
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index_name}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_user_list_uses_owner_index(self):
+        queryset = Invoice.objects.for_user(self.user).order_by('-created_at', '-id')[:21]
+        self.assertUsesIndex(queryset, 'invoices_owner_created_idx')
+    
+    def test_user_status_filter_uses_owner_status_index(self):
+        queryset = Invoice.objects.for_user(self.user).filter(status='PENDING').order_by('-created_at', '-id')[:21]
+        self.assertUsesIndex(queryset, 'invoices_owner_status_idx')
+    
+    def test_admin_status_filter_uses_status_index(self):
+        queryset = Invoice.objects.filter(status='PENDING').order_by('-created_at', '-id')[:21]
+        self.assertUsesIndex(queryset, 'invoices_status_created_idx')
+
+
+class InvoiceCacheTestCase(TestCase):
+    """Test cases for the per-user invoice response cache"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        invoice_cache.stats.reset()
+        
+        self.user = User.objects.create_user(
+            username='cacheuser',
+            email='cache@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference='CACHE-1',
+            customer_name='Customer',
+            total_amount=Decimal('100.00'),
+            created_by=self.user
+        )
+    
+    def test_second_read_is_served_from_cache(self):
+        """Test that repeated reads hit the cache without querying the database"""
+        for url in ['/api/invoices/', f'/api/invoices/{self.invoice.id}/']:
+            first = self.client.get(url)
+            self.assertEqual(first['X-Cache'], 'MISS')
+            
+            # Only the ETag aggregate runs, nothing is loaded or serialized
+            with self.assertNumQueries(1):
+                second = self.client.get(url)
+            self.assertEqual(second['X-Cache'], 'HIT')
+            self.assertEqual(second.data, first.data)
+        
+        self.assertEqual(invoice_cache.stats.as_dict(), {'hits': 2, 'misses': 2})
+    
+    def test_pay_invalidates_cache(self):
+        """Test that paying an invoice is visible on the next read"""
+        url = f'/api/invoices/{self.invoice.id}/'
+        self.assertEqual(self.client.get(url).data['status'], 'PENDING')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'{url}pay/')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['status'], 'PAID')
+    
+    def test_create_invalidates_list(self):
+        """Test that creating an invoice through the API refreshes the cached list"""
+        self.client.get('/api/invoices/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/invoices/bulk/', [{
+                'reference': 'CACHE-2',
+                'customer_name': 'Customer',
+                'items': [{'name': 'Product', 'quantity': 1, 'price': '10.00'}]
+            }], format='json')
+        
+        response = self.client.get('/api/invoices/')
+        self.assertEqual(len(response.data['results']), 2)
+    
+    def test_invalidation_waits_for_commit(self):
+        """Test that the version is only bumped once the writing transaction commits"""
+        url = f'/api/invoices/{self.invoice.id}/'
+        version = invoice_cache.get_version(f'user:{self.user.pk}')
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(f'{url}pay/')
+        self.assertEqual(invoice_cache.get_version(f'user:{self.user.pk}'), version)
+        
+        for callback in callbacks:
+            callback()
+        self.assertGreater(invoice_cache.get_version(f'user:{self.user.pk}'), version)
+    
+    def test_cache_is_per_user(self):
+        """Test that a user never sees another user's cached responses"""
+        self.client.get('/api/invoices/')
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=other)
+        
+        response = self.client.get('/api/invoices/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+    
+
+
+class InvoiceConditionalGetTestCase(TestCase):
+    """Test cases for ETag / Last-Modified support on invoice reads"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        
+        self.user = User.objects.create_user(
+            username='etaguser',
+            email='etag@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference='ETAG-1',
+            customer_name='Customer',
+            total_amount=Decimal('100.00'),
+            created_by=self.user
+        )
+    
+    def test_etag_revalidation_skips_serializer(self):
+        """Test that a matching If-None-Match returns 304 without serializing"""
+        for url in ['/api/invoices/', f'/api/invoices/{self.invoice.id}/']:
+            response = self.client.get(url)
+            self.assertTrue(response.has_header('Last-Modified'))
+            etag = response['ETag']
+            cache.clear()
+            
+            with mock.patch.object(InvoiceReadSerializer, 'to_representation') as to_representation:
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+            to_representation.assert_not_called()
+    
+    def test_etag_changes_with_status(self):
+        """Test that paying the invoice changes the ETag"""
+        url = f'/api/invoices/{self.invoice.id}/'
+        etag = self.client.get(url)['ETag']
+        
+        self.client.patch(f'{url}pay/')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_etag_changes_when_invoice_deleted(self):
+        """Test that removing an invoice from the list changes the list ETag"""
+        Invoice.objects.create(
+            reference='ETAG-2',
+            customer_name='Customer',
+            total_amount=Decimal('100.00'),
+            created_by=self.user
+        )
+        etag = self.client.get('/api/invoices/')['ETag']
+        
+        Invoice.objects.filter(reference='ETAG-2').delete()
+        response = self.client.get('/api/invoices/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_list_validators_read_only_the_page(self):
+        """Test that list validators scan the page's key range instead of counting the table"""
+        etag = self.client.get('/api/invoices/')['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/invoices/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        sql = context.captured_queries[0]['sql']
+        self.assertNotIn('COUNT(', sql)
+        self.assertIn('LIMIT 21', sql)
+    
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since with the Last-Modified value returns 304"""
+        url = f'/api/invoices/{self.invoice.id}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_unknown_invoice_is_404(self):
+        """Test that conditional handling keeps 404s for missing or malformed ids"""
+        self.assertEqual(self.client.get('/api/invoices/999999/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/invoices/abc/').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class InvoiceIdempotencyTestCase(TestCase):
+    """Test cases for Idempotency-Key handling on unsafe invoice endpoints"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        
+        self.user = User.objects.create_user(
+            username='idemuser',
+            email='idem@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference='IDEM-1',
+            customer_name='Customer',
+            total_amount=Decimal('100.00'),
+            created_by=self.user
+        )
+    
+    def test_pay_retry_replays_response(self):
+        """Test that a retried pay returns the stored response without touching the database"""
+        url = f'/api/invoices/{self.invoice.id}/pay/'
+        first = self.client.patch(url, HTTP_IDEMPOTENCY_KEY='pay-1')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        
+        with self.assertNumQueries(0):
+            retry = self.client.patch(url, HTTP_IDEMPOTENCY_KEY='pay-1')
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        
+        from transactions.models import Transaction
+        self.assertEqual(Transaction.objects.filter(invoice=self.invoice, transaction_type='Payment').count(), 1)
+    
+    def test_new_key_runs_request_again(self):
+        """Test that a different key is a new request"""
+        url = f'/api/invoices/{self.invoice.id}/pay/'
+        self.client.patch(url, HTTP_IDEMPOTENCY_KEY='pay-1')
+        
+        response = self.client.patch(url, HTTP_IDEMPOTENCY_KEY='pay-2')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_create_retry_does_not_duplicate(self):
+        """Test that retrying a create with the same key returns the first result"""
+        data = {
+            'reference': 'IDEM-2',
+            'customer_name': 'Customer',
+            'items': [{'name': 'Product', 'quantity': 1, 'price': '10.00'}]
+        }
+        first = self.client.post('/api/invoices/', data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+        retry = self.client.post('/api/invoices/', data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+        
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+    
+    def test_reused_key_with_different_body_is_rejected(self):
+        """Test that a key reused for another payload gets 422 instead of the stored response"""
+        records = [{
+            'reference': 'IDEM-3',
+            'customer_name': 'Customer',
+            'items': [{'name': 'Product', 'quantity': 1, 'price': '10.00'}]
+        }]
+        first = self.client.post('/api/invoices/bulk/', records, format='json', HTTP_IDEMPOTENCY_KEY='bulk-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        
+        records[0]['reference'] = 'IDEM-4'
+        response = self.client.post('/api/invoices/bulk/', records, format='json', HTTP_IDEMPOTENCY_KEY='bulk-1')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertFalse(Invoice.objects.filter(reference='IDEM-4').exists())
+    
+    def test_keys_are_scoped_to_user(self):
+        """Test that another user reusing a key doesn't get the stored response"""
+        url = f'/api/invoices/{self.invoice.id}/pay/'
+        self.client.patch(url, HTTP_IDEMPOTENCY_KEY='pay-1')
+        
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=other)
+        response = self.client.patch(url, HTTP_IDEMPOTENCY_KEY='pay-1')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class InvoiceConcurrentPayTestCase(TransactionTestCase):
+    """Stress test: concurrent pay requests record exactly one Payment"""
+    
+    threads = 8
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='raceuser',
+            email='race@example.com',
+            password='testpass123'
+        )
+    
+    def pay_concurrently(self, invoice, headers, via_status=False):
+        barrier = threading.Barrier(self.threads)
+        statuses = []
+        
+        def worker():
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            try:
+                barrier.wait()
+                if via_status:
+                    response = client.patch(
+                        f'/api/invoices/{invoice.id}/', {'status': 'PAID'}, format='json', **headers
+                    )
+                else:
+                    response = client.patch(f'/api/invoices/{invoice.id}/pay/', **headers)
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+        
+        workers = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return statuses
+    
+    def create_invoice(self, reference):
+        return Invoice.objects.create(
+            reference=reference,
+            customer_name='Customer',
+            total_amount=Decimal('100.00'),
+            created_by=self.user
+        )
+    
+    def test_concurrent_pay_records_one_payment(self):
+        from transactions.models import Transaction
+        for via_status in (False, True):
+            for round_number in range(5):
+                invoice = self.create_invoice(f'RACE-{via_status:d}-{round_number}')
+                statuses = self.pay_concurrently(invoice, {}, via_status=via_status)
+                
+                self.assertEqual(statuses.count(status.HTTP_200_OK), 1, statuses)
+                self.assertEqual(
+                    Transaction.objects.filter(invoice=invoice, transaction_type='Payment').count(), 1
+                )
+    
+    def test_concurrent_retries_with_same_key(self):
+        from transactions.models import Transaction
+        invoice = self.create_invoice('RACE-KEY')
+        statuses = self.pay_concurrently(invoice, {'HTTP_IDEMPOTENCY_KEY': 'retry-1'})
+        
+        self.assertIn(status.HTTP_200_OK, statuses)
+        self.assertTrue(set(statuses) <= {status.HTTP_200_OK, status.HTTP_409_CONFLICT}, statuses)
+        self.assertEqual(Transaction.objects.filter(invoice=invoice, transaction_type='Payment').count(), 1)
+
+
+class InvoiceBulkPayTestCase(TestCase):
+    """Test cases for POST /api/invoices/pay/"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        
+        self.user = User.objects.create_user(
+            username='settleuser',
+            email='settle@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def create_invoice(self, reference, owner=None, invoice_status='PENDING'):
+        return Invoice.objects.create(
+            reference=reference,
+            customer_name='Customer',
+            total_amount=Decimal('100.00'),
+            status=invoice_status,
+            created_by=owner or self.user
+        )
+    
+    def test_bulk_pay_reports_outcomes(self):
+        """Test that each id or reference gets paid, not_pending or not_found"""
+        pending = self.create_invoice('SETTLE-1')
+        by_reference = self.create_invoice('SETTLE-2')
+        paid = self.create_invoice('SETTLE-3', invoice_status='PAID')
+        foreign = self.create_invoice('SETTLE-4', owner=self.other_user)
+        
+        response = self.client.post('/api/invoices/pay/', {
+            'ids': [pending.id, paid.id, foreign.id, 999999],
+            'references': ['SETTLE-2', 'SETTLE-MISSING'],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [
+            {'id': pending.id, 'status': 'paid'},
+            {'id': paid.id, 'status': 'not_pending'},
+            {'id': foreign.id, 'status': 'not_found'},
+            {'id': 999999, 'status': 'not_found'},
+            {'reference': 'SETTLE-2', 'status': 'paid'},
+            {'reference': 'SETTLE-MISSING', 'status': 'not_found'},
+        ])
+        
+        from transactions.models import Transaction
+        payments = Transaction.objects.filter(transaction_type='Payment')
+        self.assertEqual(sorted(payments.values_list('invoice_id', flat=True)), sorted([pending.id, by_reference.id]))
+        self.assertTrue(all(payment.owner_id == self.user.id for payment in payments))
+        
+        pending.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual(pending.status, 'PAID')
+        self.assertEqual(foreign.status, 'PENDING')
+    
+    def test_bulk_pay_query_count_is_constant(self):
+        """Test that settling more invoices doesn't issue more queries"""
+        def count_queries(invoices):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(
+                    '/api/invoices/pay/', {'ids': [invoice.id for invoice in invoices]}, format='json'
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context.captured_queries)
+        
+        # The first payment of the day also creates the reporting rollup row
+        count_queries([self.create_invoice('WARMUP')])
+        
+        baseline = count_queries([self.create_invoice('SMALL')])
+        self.assertEqual(count_queries([self.create_invoice(f'LARGE-{i}') for i in range(30)]), baseline)
+    
+    def test_bulk_pay_requires_identifiers(self):
+        """Test that an empty request is rejected"""
+        response = self.client.post('/api/invoices/pay/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_detail_pay_still_routed(self):
+        """Test that the per-invoice pay action is unaffected by the bulk route"""
+        invoice = self.create_invoice('SETTLE-5')
+        response = self.client.patch(f'/api/invoices/{invoice.id}/pay/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class InvoiceAsyncViewTestCase(TestCase):
+    """Test cases for the async invoice read endpoints"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        
+        self.user = User.objects.create_user(
+            username='asyncuser',
+            email='async@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        for i in range(25):
+            invoice = Invoice.objects.create(
+                reference=f'ASYNC-{i:03d}',
+                customer_name=f'Customer {i}',
+                total_amount=Decimal('10.00'),
+                status='PAID' if i % 5 == 0 else 'PENDING',
+                created_by=self.user
+            )
+            InvoiceItem.objects.create(invoice=invoice, name='Item', quantity=1, price=Decimal('10.00'))
+        self.foreign = Invoice.objects.create(
+            reference='ASYNC-FOREIGN',
+            customer_name='Customer',
+            total_amount=Decimal('10.00'),
+            created_by=self.other_user
+        )
+        
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    
+    def test_list_matches_sync_endpoint(self):
+        """Test that pages and payloads match GET /api/invoices/"""
+        sync_page = self.client.get('/api/invoices/').json()
+        async_page = self.client.get('/api/async/invoices/').json()
+        self.assertEqual(async_page['results'], sync_page['results'])
+        self.assertIn('/api/async/invoices/?cursor=', async_page['next'])
+        self.assertIsNone(async_page['previous'])
+        
+        second_page = self.client.get(async_page['next']).json()
+        self.assertEqual(second_page['results'], self.client.get(sync_page['next']).json()['results'])
+        self.assertEqual(len(second_page['results']), 5)
+    
+    def test_list_filters_by_status(self):
+        """Test that ?status= filters like the sync endpoint"""
+        results = self.client.get('/api/async/invoices/?status=PAID').json()['results']
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(row['status'] == 'PAID' for row in results))
+    
+    def test_detail_matches_sync_endpoint(self):
+        """Test that the detail payload matches and other users' invoices are hidden"""
+        invoice = Invoice.objects.get(reference='ASYNC-001')
+        response = self.client.get(f'/api/async/invoices/{invoice.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), self.client.get(f'/api/invoices/{invoice.id}/').json())
+        
+        response = self.client.get(f'/api/async/invoices/{self.foreign.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_requires_authentication(self):
+        """Test that requests without a valid token get 401 with a challenge"""
+        self.client.credentials()
+        response = self.client.get('/api/async/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+        
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        response = self.client.get('/api/async/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_inactive_user_rejected(self):
+        """Test that a deactivated user is refused unless stateless reads trust the token"""
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        for url in ('/api/async/invoices/', f'/api/async/invoices/{self.foreign.id}/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(response.status_code, self.client.get(url.replace('/async', '')).status_code)
+        
+        with override_settings(JWT_STATELESS_READS=True):
+            response = self.client.get('/api/async/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is a 404 like the sync endpoint"""
+        response = self.client.get('/api/async/invoices/?cursor=bogus')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_read_only(self):
+        """Test that only GET is allowed"""
+        response = self.client.post('/api/async/invoices/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class InvoiceFastListTestCase(TestCase):
+    """Test that the FAST_READ_SERIALIZERS list path matches InvoiceReadSerializer"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        
+        self.user = User.objects.create_user(
+            username='fastuser',
+            email='fast@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        amounts = [Decimal('0'), Decimal('0.5'), Decimal('12.34'), Decimal('99999999.99'), Decimal('7')]
+        for i, amount in enumerate(amounts):
+            invoice = Invoice.objects.create(
+                reference=f'FAST-{i:03d}',
+                customer_name=f'Customer {i}',
+                customer_email='' if i % 2 else f'customer{i}@example.com',
+                customer_phone='' if i % 3 else '+15550100',
+                total_amount=amount,
+                status='PAID' if i % 2 else 'PENDING',
+                created_by=self.user
+            )
+            # The first invoice has no items
+            for j in range(i):
+                InvoiceItem.objects.create(
+                    invoice=invoice,
+                    name=f'Item {j}',
+                    quantity=j + 1,
+                    price=Decimal('0.1') * (j + 1)
+                )
+    
+    def expected(self):
+        invoices = Invoice.objects.with_details().order_by('-created_at', '-id')
+        return json.loads(json.dumps(InvoiceReadSerializer(invoices, many=True).data))
+    
+    def test_matches_read_serializer(self):
+        """Test that the fast page is identical to the serializer output"""
+        response = self.client.get('/api/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'], self.expected())
+    
+    def test_matches_slow_path(self):
+        """Test that responses with the flag on and off are byte for byte equal"""
+        fast = self.client.get('/api/invoices/?status=PAID').content
+        cache.clear()
+        with override_settings(FAST_READ_SERIALIZERS=False):
+            slow = self.client.get('/api/invoices/?status=PAID').content
+        self.assertEqual(fast, slow)
+    
+    @override_settings(TIME_ZONE='America/New_York')
+    def test_non_utc_timezone(self):
+        """Test that datetimes are rendered in the current timezone"""
+        self.assertEqual(self.client.get('/api/invoices/').json()['results'], self.expected())
+    
+    def test_query_count(self):
+        """Test that a page costs one query for the invoices and one for all their items"""
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/invoices/')
+        item_queries = [query for query in context.captured_queries if 'invoice_items' in query['sql']]
+        self.assertEqual(len(item_queries), 1)
+        self.assertIn('created_by__username', context.captured_queries[-2]['sql'])
+
+
+@tag('benchmark')
+@override_settings(INVOICE_CACHE_TIMEOUT=0)
+class InvoiceFastListBenchmark(TestCase):
+    """Rendering 10k invoices with InvoiceReadSerializer vs the fast path"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='benchuser',
+            email='bench@example.com',
+            password='testpass123'
+        )
+        invoices = Invoice.objects.bulk_create([
+            Invoice(
+                reference=f'FASTBENCH-{i:06d}',
+                customer_name='Customer',
+                customer_email='customer@example.com',
+                total_amount=Decimal('30.00'),
+                created_by=self.user
+            )
+            for i in range(10000)
+        ], batch_size=1000)
+        InvoiceItem.objects.bulk_create([
+            InvoiceItem(invoice=invoice, name=f'Item {j}', quantity=1, price=Decimal('10.00'))
+            for invoice in invoices
+            for j in range(3)
+        ], batch_size=1000)
+    
+    def test_serialize_10k(self):
+        def serializer():
+            return InvoiceReadSerializer(Invoice.objects.with_details(), many=True).data
+        
+        def fast_path():
+            return invoice_representations(invoice_values(Invoice.objects.all()))
+        
+        self.assertEqual(
+            json.dumps(serializer(), sort_keys=True),
+            json.dumps(fast_path(), sort_keys=True),
+        )
+        slow, fast = benchmark(serializer, repeat=3), benchmark(fast_path, repeat=3)
+        report('invoice-list 10k rows', serializer='InvoiceReadSerializer', seconds=slow)
+        report('invoice-list 10k rows', serializer='values fast path', seconds=fast, speedup=round(slow / fast, 1))
@@ -1,17 +1,39 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
+from django.views.decorators.http import require_GET
+from sales_invoice.asynchronous import error_response, json_response, jwt_required, keyset_response
+from sales_invoice.pagination import InvoicePagination
+from sales_invoice.conditional import ConditionalGetMixin
+from sales_invoice.representations import FastListMixin
+from sales_invoice.exports import EXPORT_OUTPUTS, export_response
+from sales_invoice.parsers import ORJSONParser
+from users.authentication import StatelessJWTAuthentication
+from .cache import CachedReadMixin
 from .models import Invoice
-from .serializers import InvoiceReadSerializer, InvoiceWriteSerializer, InvoiceStatusUpdateSerializer
+from .exports import INVOICE_CSV_HEADER, invoice_records, invoice_rows
+from .idempotency import idempotent
+from .parsers import NDJSONParser
+from .representations import InvoiceListSerializer, invoice_values
+from .serializers import (
+    InvoiceReadSerializer, InvoiceWriteSerializer, InvoiceStatusUpdateSerializer,
+    InvoiceImportSerializer, InvoiceBulkPaySerializer, ConcurrentPaymentError,
+    create_invoices, mark_invoice_paid, mark_invoices_paid,
+)
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(ConditionalGetMixin, CachedReadMixin, FastListMixin, viewsets.ModelViewSet):
     """ViewSet for managing invoices"""
     queryset = Invoice.objects.all()
+    last_modified_field = 'updated_at'
     serializer_class = InvoiceReadSerializer
+    pagination_class = InvoicePagination
     
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
@@ -22,23 +44,39 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Invoice.objects.none()
 
-        # AnonymousUser empty queryset
-        if user.is_anonymous:
-            return Invoice.objects.none()
+        # Admins see all invoices, regular users only their own
+        queryset = Invoice.objects.for_user(user)
         
-        # Admin can see all invoices
-        if user.is_staff:
-            return Invoice.objects.all()
+        # Optional status filter for reads, e.g. ?status=PENDING
+        invoice_status = self.request.query_params.get('status')
+        if invoice_status and self.action in ['list', 'export']:
+            queryset = queryset.filter(status=invoice_status)
         
-        # Regular users can only see their own invoices
-        return Invoice.objects.filter(created_by=user)
+        # Writes don't render nested data, so only reads pay for the joins;
+        # the fast list path selects its own columns in list_values()
+        if self.action in ['list', 'retrieve', 'pay', 'export'] and not self.uses_fast_list():
+            queryset = queryset.with_details()
+        return queryset
+    
+    def list_values(self, queryset):
+        return invoice_values(queryset)
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
         if self.action in ['create', 'update', 'partial_update']:
             return InvoiceWriteSerializer
+        if self.action == 'bulk':
+            return InvoiceImportSerializer
+        if self.action == 'bulk_pay':
+            return InvoiceBulkPaySerializer
+        if self.uses_fast_list():
+            return InvoiceListSerializer
         return InvoiceReadSerializer
     
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         """Create invoice with proper validation"""
         serializer.save()
@@ -50,10 +88,22 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         # Check if only status is being updated
         if 'status' in request.data and len(request.data) == 1:
             serializer = InvoiceStatusUpdateSerializer(instance, data=request.data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Paying goes through the same conditional UPDATE as /pay/, which
+            # also records the Payment transaction
+            if serializer.validated_data['status'] == 'PAID':
+                if not mark_invoice_paid(instance):
+                    return Response(
+                        {'status': ['Only pending invoices can be marked as paid.']},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                return Response({'status': instance.status})
+            
+            # Paid invoices can't be reopened, so the only other status is
+            # the PENDING they already have: nothing to write
+            return Response(serializer.data)
         
         # For other updates, only status can be changed
         if any(key != 'status' for key in request.data.keys()):
@@ -65,29 +115,183 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
     
     @action(detail=True, methods=['patch'])
+    @idempotent
     def pay(self, request, pk=None):
         """Custom action to mark invoice as paid"""
         invoice = self.get_object()
         
-        if invoice.status != 'PENDING':
+        # Safe against concurrent retries: only one request can flip the status
+        if not mark_invoice_paid(invoice):
             return Response(
                 {'error': 'Only pending invoices can be marked as paid.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Update status
-        invoice.status = 'PAID'
-        invoice.save()
+        serializer = self.get_serializer(invoice)
+        return Response(serializer.data)
+
+    
+    @action(detail=False, methods=['post'], url_path='pay', url_name='bulk-pay')
+    @idempotent
+    def bulk_pay(self, request):
+        """Mark many invoices as paid, given by id and/or reference
+        
+        PENDING invoices visible to the user are flipped with one UPDATE and
+        their Payment transactions inserted together. Every requested id or
+        reference gets an outcome: paid, not_pending or not_found.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        references = serializer.validated_data['references']
+        
+        try:
+            with transaction.atomic():
+                rows = list(
+                    Invoice.objects.for_user(request.user)
+                    .filter(Q(pk__in=ids) | Q(reference__in=references))
+                    .select_for_update()
+                    .order_by()
+                    .values('id', 'reference', 'status', 'created_by_id', 'total_amount')
+                )
+                pending = [row for row in rows if row['status'] == 'PENDING']
+                if pending:
+                    mark_invoices_paid(pending)
+        except ConcurrentPaymentError:
+            return Response(
+                {'error': 'Some invoices were paid concurrently. Please retry.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        outcomes = {row['id']: 'paid' if row['status'] == 'PENDING' else 'not_pending' for row in rows}
+        ids_by_reference = {row['reference']: row['id'] for row in rows}
+        
+        results = [
+            {'id': pk, 'status': outcomes.get(pk, 'not_found')}
+            for pk in ids
+        ] + [
+            {'reference': reference, 'status': outcomes.get(ids_by_reference.get(reference), 'not_found')}
+            for reference in references
+        ]
+        return Response({'results': results})
+    
+    @action(detail=False, methods=['post'], parser_classes=[ORJSONParser, NDJSONParser])
+    @idempotent
+    def bulk(self, request):
+        """Create many invoices at once from a JSON array or an NDJSON body
+        
+        Valid records are inserted together; invalid ones are reported by
+        their position in the batch and skipped.
+        """
+        records = request.data
+        if not isinstance(records, list):
+            return Response(
+                {'error': 'Expected a list of invoices.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(records) > settings.INVOICE_BULK_MAX_BATCH:
+            return Response(
+                {'error': f'A batch can contain at most {settings.INVOICE_BULK_MAX_BATCH} invoices.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Validate every record on its own, without touching the database
+        errors = []
+        valid = []
+        for index, record in enumerate(records):
+            serializer = self.get_serializer(data=record)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
         
-        # Create Payment transaction
-        from transactions.models import Transaction
-        Transaction.objects.create(
-            invoice=invoice,
-            transaction_type='Payment',
-            amount=invoice.total_amount
+        # Check reference uniqueness for the whole batch in one query
+        references = [data['reference'] for _, data in valid]
+        existing = set(
+            Invoice.objects.filter(reference__in=references).values_list('reference', flat=True)
         )
+        seen = set()
+        accepted = []
+        for index, data in valid:
+            reference = data['reference']
+            if reference in existing:
+                errors.append({
+                    'index': index,
+                    'errors': {'reference': ['invoice with this reference already exists.']}
+                })
+            elif reference in seen:
+                errors.append({
+                    'index': index,
+                    'errors': {'reference': ['Duplicate reference within the batch.']}
+                })
+            else:
+                seen.add(reference)
+                accepted.append((index, data))
         
-        serializer = self.get_serializer(invoice)
-        return Response(serializer.data)
+        try:
+            invoices = create_invoices(request.user, [data for _, data in accepted])
+        except IntegrityError:
+            return Response(
+                {'error': 'The batch conflicts with invoices created concurrently. Please retry.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        created = [
+            {'index': index, 'id': invoice.id, 'reference': invoice.reference}
+            for (index, _), invoice in zip(accepted, invoices)
+        ]
+        errors.sort(key=lambda error: error['index'])
+        
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'errors': errors}, status=response_status)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every visible invoice and its items as NDJSON (default) or CSV
+        
+        Use `?output=csv` for one row per invoice item.
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_OUTPUTS:
+            return Response(
+                {'error': f'output must be one of: {", ".join(EXPORT_OUTPUTS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.get_queryset()
+        return export_response(
+            output, 'invoices',
+            records=invoice_records(queryset),
+            csv_header=INVOICE_CSV_HEADER,
+            csv_rows=invoice_rows(queryset),
+        )
+
+
+@require_GET
+@jwt_required
+async def invoice_list_async(request):
+    """Async counterpart of GET /api/invoices/ (keyset pages, optional ?status=)"""
+    queryset = Invoice.objects.for_user(request.user)
+    invoice_status = request.GET.get('status')
+    if invoice_status:
+        queryset = queryset.filter(status=invoice_status)
+    return await keyset_response(
+        request, queryset.with_details(), InvoicePagination.ordering_field, InvoiceReadSerializer
+    )
 
 
+@require_GET
+@jwt_required
+async def invoice_detail_async(request, pk):
+    """Async counterpart of GET /api/invoices/{id}/"""
+    try:
+        invoice = await Invoice.objects.for_user(request.user).with_details().aget(pk=pk)
+    except Invoice.DoesNotExist:
+        return error_response('No Invoice matches the given query.', status.HTTP_404_NOT_FOUND)
+    return json_response(InvoiceReadSerializer(invoice).data)
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import DailySummary
+
+
+@admin.register(DailySummary)
+class DailySummaryAdmin(admin.ModelAdmin):
+    """Admin interface for DailySummary"""
+    list_display = ['owner', 'day', 'sales_count', 'sales_amount', 'payments_count', 'payments_amount']
+    list_filter = ['day']
+    search_fields = ['owner__username']
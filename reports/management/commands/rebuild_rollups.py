@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reports.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily sales/payment rollups from the transactions table'
+    
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} daily summary rows.'))
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:50
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill(apps, schema_editor):
+    """Build the initial rollups from existing transactions"""
+    DailySummary = apps.get_model('reports', 'DailySummary')
+    Transaction = apps.get_model('transactions', 'Transaction')
+    
+    fields = {
+        'Sale': ('sales_count', 'sales_amount'),
+        'Payment': ('payments_count', 'payments_amount'),
+    }
+    rows = {}
+    aggregates = (
+        Transaction.objects
+        .order_by()
+        .annotate(day=TruncDate('date'))
+        .values('owner_id', 'day', 'transaction_type')
+        .annotate(count=Count('id'), amount=Sum('amount'))
+    )
+    for aggregate in aggregates:
+        key = (aggregate['owner_id'], aggregate['day'])
+        if key not in rows:
+            rows[key] = DailySummary(owner_id=key[0], day=key[1])
+        count_field, amount_field = fields[aggregate['transaction_type']]
+        setattr(rows[key], count_field, aggregate['count'])
+        setattr(rows[key], amount_field, aggregate['amount'])
+    
+    DailySummary.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+        ('transactions', '0005_transaction_owner_not_null'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
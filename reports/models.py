@@ -0,0 +1,29 @@
+from django.db import models
+from django.conf import settings
+
+
+class DailySummary(models.Model):
+    """Per-user, per-day rollup of Sale and Payment transactions
+    
+    Maintained incrementally by reports.rollups whenever transactions are
+    recorded, so dashboards read one row per day instead of scanning the
+    transactions table. Rebuild with `manage.py rebuild_rollups`.
+    """
+    
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_summaries')
+    day = models.DateField()
+    
+    sales_count = models.PositiveIntegerField(default=0)
+    sales_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments_count = models.PositiveIntegerField(default=0)
+    payments_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        ordering = ['day']
+        db_table = 'daily_summaries'
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'day'], name='daily_summaries_owner_day_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.owner} - {self.day}"
@@ -0,0 +1,83 @@
+"""
+Incremental maintenance of the DailySummary rollup table.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from transactions.models import Transaction
+from .models import DailySummary
+
+ROLLUP_FIELDS = {
+    'Sale': ('sales_count', 'sales_amount'),
+    'Payment': ('payments_count', 'payments_amount'),
+}
+
+
+def _deltas(transactions, sign):
+    """Group transactions into {(owner_id, day): {field: delta}}"""
+    deltas = defaultdict(lambda: defaultdict(int))
+    for entry in transactions:
+        count_field, amount_field = ROLLUP_FIELDS[entry.transaction_type]
+        key = (entry.owner_id, timezone.localdate(entry.date))
+        deltas[key][count_field] += sign
+        deltas[key][amount_field] += sign * entry.amount
+    return deltas
+
+
+def apply_transactions(transactions, sign=1):
+    """Add (or with ``sign=-1`` remove) transactions to the daily rollups
+    
+    Issues one UPDATE per affected (owner, day), plus an INSERT the first
+    time a pair is seen.
+    """
+    for (owner_id, day), changes in _deltas(transactions, sign).items():
+        increments = {field: F(field) + value for field, value in changes.items()}
+        with transaction.atomic(savepoint=False):
+            updated = DailySummary.objects.filter(owner_id=owner_id, day=day).update(**increments)
+            if updated or sign < 0:
+                continue
+            try:
+                with transaction.atomic():
+                    DailySummary.objects.create(owner_id=owner_id, day=day, **changes)
+            except IntegrityError:
+                # Another request created the row first
+                DailySummary.objects.filter(owner_id=owner_id, day=day).update(**increments)
+
+
+def rebuild():
+    """Recompute every rollup row from the transactions table
+    
+    Returns the number of rows written.
+    """
+    rows = {}
+    aggregates = (
+        Transaction.objects
+        .order_by()
+        .annotate(day=TruncDate('date'))
+        .values('owner_id', 'day', 'transaction_type')
+        .annotate(count=Count('id'), amount=Sum('amount'))
+    )
+    for aggregate in aggregates:
+        key = (aggregate['owner_id'], aggregate['day'])
+        if key not in rows:
+            rows[key] = DailySummary(
+                owner_id=key[0],
+                day=key[1],
+                sales_amount=Decimal('0.00'),
+                payments_amount=Decimal('0.00'),
+            )
+        row = rows[key]
+        count_field, amount_field = ROLLUP_FIELDS[aggregate['transaction_type']]
+        setattr(row, count_field, aggregate['count'])
+        setattr(row, amount_field, aggregate['amount'])
+    
+    with transaction.atomic():
+        DailySummary.objects.all().delete()
+        DailySummary.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
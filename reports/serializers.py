@@ -0,0 +1,20 @@
+from rest_framework import serializers
+from .models import DailySummary
+
+
+class DailySummarySerializer(serializers.ModelSerializer):
+    """Serializer for one day of the sales/payment summary"""
+    
+    class Meta:
+        model = DailySummary
+        fields = ['day', 'sales_count', 'sales_amount', 'payments_count', 'payments_amount']
+
+
+class SummarySerializer(serializers.Serializer):
+    """Serializer for the summary report"""
+    sales_count = serializers.IntegerField()
+    sales_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    payments_count = serializers.IntegerField()
+    payments_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    outstanding_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    days = DailySummarySerializer(many=True)
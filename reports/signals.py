@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from transactions.models import Transaction
+from transactions.signals import transactions_recorded
+from .rollups import apply_transactions
+
+
+@receiver(transactions_recorded, sender=Transaction)
+def add_to_rollups(sender, transactions, **kwargs):
+    apply_transactions(transactions)
+
+
+@receiver(post_delete, sender=Transaction)
+def remove_from_rollups(sender, instance, **kwargs):
+    apply_transactions([instance], sign=-1)
@@ -0,0 +1,119 @@
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from decimal import Decimal
+from io import StringIO
+from invoices.models import Invoice
+from transactions.models import Transaction
+from sales_invoice.testing import InvoiceFixturesMixin
+from .models import DailySummary
+
+User = get_user_model()
+
+
+class SummaryTestCase(InvoiceFixturesMixin, TestCase):
+    """Test cases for the rollup-backed summary report"""
+    
+    def test_rollups_follow_create_and_pay(self):
+        """Test that creating and paying invoices updates today's rollup"""
+        first = self.create_invoice('SUM-1', '100.00')
+        self.create_invoice('SUM-2', '50.00')
+        self.client.patch(f'/api/invoices/{first.id}/pay/')
+        
+        rollup = DailySummary.objects.get(owner=self.user)
+        self.assertEqual(rollup.day, timezone.localdate())
+        self.assertEqual(rollup.sales_count, 2)
+        self.assertEqual(rollup.sales_amount, Decimal('150.00'))
+        self.assertEqual(rollup.payments_count, 1)
+        self.assertEqual(rollup.payments_amount, Decimal('100.00'))
+    
+    def test_summary_endpoint(self):
+        """Test that the summary reports totals, days and the outstanding balance"""
+        first = self.create_invoice('SUM-1', '100.00')
+        self.create_invoice('SUM-2', '50.00')
+        self.client.patch(f'/api/invoices/{first.id}/pay/')
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/reports/summary/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(context.captured_queries), 2)
+        self.assertEqual(response.data['sales_amount'], '150.00')
+        self.assertEqual(response.data['payments_amount'], '100.00')
+        self.assertEqual(response.data['outstanding_amount'], '50.00')
+        self.assertEqual(len(response.data['days']), 1)
+        self.assertEqual(response.data['days'][0]['sales_count'], 2)
+    
+    def test_invoice_created_paid_records_payment(self):
+        """Test that an invoice created as PAID is not counted as outstanding"""
+        self.create_invoice('SUM-PAID', '10.00', status='PAID')
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('transaction_type', flat=True)),
+            ['Payment', 'Sale']
+        )
+        
+        response = self.client.get('/api/reports/summary/')
+        self.assertEqual(response.data['payments_amount'], '10.00')
+        self.assertEqual(response.data['outstanding_amount'], '0.00')
+    
+    def test_summary_is_scoped_to_user(self):
+        """Test that users only see their own figures and admins see everyone's"""
+        self.create_invoice('SUM-1', '100.00')
+        self.client.force_authenticate(user=self.other_user)
+        self.create_invoice('SUM-2', '50.00')
+        
+        response = self.client.get('/api/reports/summary/')
+        self.assertEqual(response.data['sales_amount'], '50.00')
+        
+        admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='adminpass123',
+            is_staff=True
+        )
+        self.client.force_authenticate(user=admin)
+        response = self.client.get('/api/reports/summary/')
+        self.assertEqual(response.data['sales_amount'], '150.00')
+        self.assertEqual(response.data['days'][0]['sales_count'], 2)
+    
+    def test_summary_date_range(self):
+        """Test that start/end restrict the days but not the outstanding balance"""
+        self.create_invoice('SUM-1', '100.00')
+        
+        response = self.client.get('/api/reports/summary/?start=2000-01-01&end=2000-01-31')
+        self.assertEqual(response.data['days'], [])
+        self.assertEqual(response.data['outstanding_amount'], '100.00')
+        
+        response = self.client.get('/api/reports/summary/?start=yesterday')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_deleting_invoice_updates_rollups(self):
+        """Test that cascaded transaction deletes are removed from the rollups"""
+        invoice = self.create_invoice('SUM-1', '100.00')
+        self.client.delete(f'/api/invoices/{invoice.id}/')
+        
+        rollup = DailySummary.objects.get(owner=self.user)
+        self.assertEqual(rollup.sales_count, 0)
+        self.assertEqual(rollup.sales_amount, Decimal('0.00'))
+    
+    def test_rebuild_matches_incremental_rollups(self):
+        """Test that rebuild_rollups reproduces the incrementally maintained rows"""
+        first = self.create_invoice('SUM-1', '100.00')
+        self.create_invoice('SUM-2', '50.00')
+        self.client.patch(f'/api/invoices/{first.id}/pay/')
+        
+        # Transactions written directly bypass the rollups until a rebuild
+        invoice = Invoice.objects.get(reference='SUM-2')
+        Transaction.objects.create(invoice=invoice, transaction_type='Payment', amount=invoice.total_amount)
+        
+        out = StringIO()
+        call_command('rebuild_rollups', stdout=out)
+        self.assertIn('Rebuilt 1', out.getvalue())
+        
+        rollup = DailySummary.objects.get(owner=self.user)
+        self.assertEqual(rollup.sales_count, 2)
+        self.assertEqual(rollup.payments_count, 2)
+        self.assertEqual(rollup.payments_amount, Decimal('150.00'))
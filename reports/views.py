@@ -0,0 +1,66 @@
+from decimal import Decimal
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.db.models import Sum
+from django.utils.dateparse import parse_date
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from .models import DailySummary
+from .serializers import SummarySerializer
+
+SUMMARY_FIELDS = ['sales_count', 'sales_amount', 'payments_count', 'payments_amount']
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Get revenue per day and the outstanding (PENDING) balance",
+    manual_parameters=[
+        openapi.Parameter('start', openapi.IN_QUERY, description="First day (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+        openapi.Parameter('end', openapi.IN_QUERY, description="Last day (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+    ],
+    responses={
+        200: openapi.Response(description="Summary retrieved successfully", schema=SummarySerializer),
+        400: openapi.Response(description="Invalid date range"),
+        401: openapi.Response(description="Authentication required")
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def summary(request):
+    """Sales/payment summary read from the daily rollups
+    
+    Regular users get their own figures, admins get figures for all users.
+    The outstanding balance always covers the whole history.
+    """
+    rollups = DailySummary.objects.all()
+    if not request.user.is_staff:
+        rollups = rollups.filter(owner=request.user)
+    
+    totals = rollups.aggregate(**{field: Sum(field) for field in SUMMARY_FIELDS})
+    totals = {field: value or 0 for field, value in totals.items()}
+    outstanding = Decimal(totals['sales_amount']) - Decimal(totals['payments_amount'])
+    
+    days = rollups
+    for param, lookup in [('start', 'day__gte'), ('end', 'day__lte')]:
+        value = request.query_params.get(param)
+        if value is None:
+            continue
+        day = parse_date(value)
+        if day is None:
+            return Response(
+                {'error': f'{param} must be a date in YYYY-MM-DD format.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        days = days.filter(**{lookup: day})
+    
+    # Admins see one row per day across every user
+    days = days.order_by('day').values('day').annotate(**{field: Sum(field) for field in SUMMARY_FIELDS})
+    
+    serializer = SummarySerializer({
+        **totals,
+        'outstanding_amount': outstanding,
+        'days': days,
+    })
+    return Response(serializer.data)
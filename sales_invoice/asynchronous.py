@@ -0,0 +1,87 @@
+"""
+Helpers for the native async (ASGI) read endpoints.
+
+DRF views are sync-only, so these endpoints are plain Django async views:
+authentication reuses StatelessJWTAuthentication (no database access for
+tokens carrying the is_staff claim when JWT_STATELESS_READS is on), rows
+are fetched with the async ORM, and responses are rendered with the DRF
+endpoints' JSON renderer so payloads match them byte for byte.
+"""
+
+from functools import wraps
+
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from users.authentication import StatelessJWTAuthentication
+from .pagination import decode_cursor, encode_cursor, keyset_page, keyset_queryset
+from .renderers import ORJSONRenderer
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """JSON response rendered like the DRF views' responses"""
+    return HttpResponse(ORJSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+def error_response(detail, status_code):
+    """Error body in DRF's ``{"detail": ...}`` shape"""
+    return json_response(detail if isinstance(detail, dict) else {'detail': detail}, status_code)
+
+
+def jwt_required(view=None, *, load_user=False):
+    """Authenticate an async view with a JWT bearer token, answering 401 otherwise
+
+    Users are resolved like on the DRF endpoints: from the token claims
+    when JWT_STATELESS_READS is on, otherwise loaded (and checked to be
+    active). ``@jwt_required(load_user=True)`` always loads the user.
+    """
+    if view is None:
+        return lambda view: jwt_required(view, load_user=load_user)
+
+    authenticator = StatelessJWTAuthentication()
+
+    def unauthorized(detail, status_code=status.HTTP_401_UNAUTHORIZED):
+        response = error_response(detail, status_code)
+        response['WWW-Authenticate'] = authenticator.authenticate_header(None)
+        return response
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await authenticator.aauthenticate(request, load_user=load_user)
+        except APIException as exc:
+            return unauthorized(exc.detail, exc.status_code)
+        if result is None:
+            return unauthorized('Authentication credentials were not provided.')
+
+        request.user, request.auth = result
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+async def keyset_response(request, queryset, field, serializer_class):
+    """Serve one keyset page of ``queryset`` in the KeysetPagination format"""
+    token = request.GET.get('cursor')
+    try:
+        cursor = decode_cursor(token) if token else None
+    except ValueError:
+        return error_response('Invalid cursor', status.HTTP_404_NOT_FOUND)
+
+    page_size = api_settings.PAGE_SIZE
+    rows = [row async for row in keyset_queryset(queryset, field, cursor, page_size)]
+    rows, next_cursor, previous_cursor = keyset_page(rows, field, cursor, page_size)
+
+    base_url = request.build_absolute_uri()
+
+    def link(cursor):
+        return replace_query_param(base_url, 'cursor', encode_cursor(cursor)) if cursor else None
+
+    return json_response({
+        'next': link(next_cursor),
+        'previous': link(previous_cursor),
+        'results': serializer_class(rows, many=True).data,
+    })
@@ -0,0 +1,91 @@
+"""
+Conditional GET support (ETag / Last-Modified) for read-only endpoints.
+
+Validators are computed from the rows behind the response before any of
+them is loaded in full or serialized, so an unchanged resource is answered
+with 304 cheaply. For keyset list pages that is the ids and modification
+times of the page and its look-ahead row, one indexed range scan like the
+page itself; anything else (retrieve, legacy ``?page=`` requests, which
+count the table for their response anyway) uses one aggregate over the
+queryset.
+"""
+
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+
+class ConditionalGetMixin:
+    """Add ETag and Last-Modified to list/retrieve and honour conditional requests
+
+    Set ``last_modified_field`` to the model's modification timestamp, and
+    ``related_modified_fields`` to the timestamps of related rows rendered
+    in the payload (e.g. a nested invoice).
+    """
+    last_modified_field = None
+    related_modified_fields = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(queryset, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookup value, let retrieve() answer 404
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(queryset, super().retrieve, request, *args, **kwargs)
+
+    def page_window(self, request, queryset):
+        """The rows of the requested list page, or None to validate the whole queryset"""
+        paginator = self.paginator if self.action == 'list' else None
+        if paginator is None or not hasattr(paginator, 'page_window'):
+            return None
+        return paginator.page_window(queryset, request)
+
+    def get_validators(self, request, queryset):
+        """Return ``(etag, last_modified)`` for the rows behind this response"""
+        fields = [self.last_modified_field, *self.related_modified_fields]
+        queryset = queryset.select_related(None).prefetch_related(None)
+
+        window = self.page_window(request, queryset)
+        if window is not None:
+            rows = list(window.values_list('pk', *fields))
+            state = [str(value) for row in rows for value in row]
+            modified = [value for row in rows for value in row[1:]]
+        else:
+            aggregate = queryset.order_by().aggregate(
+                count=Count('pk'),
+                last_id=Max('pk'),
+                **{f'modified_{index}': Max(field) for index, field in enumerate(fields)},
+            )
+            state = [str(value) for value in aggregate.values()]
+            modified = [aggregate[f'modified_{index}'] for index in range(len(fields))]
+
+        last_modified = max((value for value in modified if value is not None), default=None)
+        fingerprint = '|'.join([request.build_absolute_uri(), *state])
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        return etag, last_modified
+
+    def conditional_response(self, queryset, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, queryset)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
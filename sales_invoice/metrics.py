@@ -0,0 +1,253 @@
+"""
+Per-route request metrics: wall time, SQL queries, SQL time, render time
+and response size, kept as in-process histograms.
+
+RequestMetricsMiddleware times each request and, through a database
+execute wrapper, every query it runs. Results are labelled with the URL
+name of the view (``invoice-list``, ``invoice-pay``, ``transaction-list``,
+...) and the method, exposed in the Prometheus text format by
+``metrics_view`` and summarised per response in a ``Server-Timing`` header.
+
+With ``REQUEST_METRICS`` off the middleware removes itself from the chain
+(MiddlewareNotUsed) and no wrapper is installed, so there is no cost at all.
+Each worker process keeps its own numbers; scrape every worker, or sum
+them in Prometheus.
+"""
+
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from itertools import accumulate
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# (name, help, buckets) for each histogram, in RequestSample.values() order
+HISTOGRAMS = (
+    ('http_request_duration_seconds', 'Wall time spent handling the request', DURATION_BUCKETS),
+    ('http_request_sql_queries', 'SQL queries run by the request', QUERY_BUCKETS),
+    ('http_request_sql_duration_seconds', 'Time spent in SQL queries', DURATION_BUCKETS),
+    ('http_request_render_duration_seconds', 'Time spent rendering the response body', DURATION_BUCKETS),
+    ('http_response_size_bytes', 'Response body size (streamed responses are not counted)', SIZE_BUCKETS),
+)
+
+_current_sample = ContextVar('request_metrics_sample', default=None)
+
+
+class RequestSample:
+    """Measurements for the request being handled"""
+    __slots__ = ('started', 'sql_count', 'sql_time', 'render_started', 'render_time', 'duration', 'size')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+        self.duration = None
+        self.size = None
+
+    def finish(self, response):
+        self.duration = time.perf_counter() - self.started
+        if not response.streaming:
+            self.size = len(response.content)
+
+    def values(self):
+        return (self.duration, self.sql_count, self.sql_time, self.render_time, self.size)
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.sql_count} queries", '
+            f'render;dur={self.render_time * 1000:.1f}, '
+            f'total;dur={self.duration * 1000:.1f}'
+        )
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current RequestSample"""
+    sample = _current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.sql_count += 1
+        sample.sql_time += time.perf_counter() - started
+
+
+def install_query_recorder(connection, **kwargs):
+    # Inserted first: execute_wrapper() blocks pop the last wrapper on exit
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class Histogram:
+    """Prometheus-style histogram with fixed upper bounds"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        return zip(self.buckets, accumulate(self.counts))
+
+
+class MetricsRegistry:
+    """Histograms per (route, method) and request counts per status"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.requests = {}
+
+    def observe(self, route, method, status, sample):
+        labels = (route, method)
+        with self._lock:
+            histograms = self.histograms.get(labels)
+            if histograms is None:
+                histograms = self.histograms[labels] = [Histogram(buckets) for _, _, buckets in HISTOGRAMS]
+            for histogram, value in zip(histograms, sample.values()):
+                if value is not None:
+                    histogram.observe(value)
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                '# HELP http_requests_total Requests handled',
+                '# TYPE http_requests_total counter',
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{labels_text(route=route, method=method, status=status)} {count}')
+
+            for index, (name, help_text, _) in enumerate(HISTOGRAMS):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (route, method), histograms in sorted(self.histograms.items()):
+                    histogram = histograms[index]
+                    if not histogram.count:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{labels_text(route=route, method=method, le=bound)} {count}')
+                    lines += [
+                        f'{name}_bucket{labels_text(route=route, method=method, le="+Inf")} {histogram.count}',
+                        f'{name}_sum{labels_text(route=route, method=method)} {histogram.sum}',
+                        f'{name}_count{labels_text(route=route, method=method)} {histogram.count}',
+                    ]
+        return '\n'.join(lines) + '\n'
+
+
+def labels_text(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetricsMiddleware:
+    """Record per-route request metrics and add a Server-Timing header
+
+    Enabled with ``REQUEST_METRICS``; ``REQUEST_METRICS_SERVER_TIMING``
+    controls the header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_recorder)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        sample = RequestSample()
+        token = _current_sample.set(sample)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_sample.reset(token)
+        return self.finish(request, response, sample)
+
+    async def __acall__(self, request):
+        sample = RequestSample()
+        token = _current_sample.set(sample)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_sample.reset(token)
+        return self.finish(request, response, sample)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that part
+        sample = _current_sample.get()
+        if sample is not None:
+            sample.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda response: self.rendered(sample))
+        return response
+
+    @staticmethod
+    def rendered(sample):
+        sample.render_time = time.perf_counter() - sample.render_started
+
+    def finish(self, request, response, sample):
+        sample.finish(response)
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        registry.observe(route, request.method, response.status_code, sample)
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {sample.server_timing()}' if existing else sample.server_timing()
+        return response
+
+
+@require_GET
+def metrics_view(request):
+    """Prometheus scrape endpoint
+
+    404 unless REQUEST_METRICS is on and ``METRICS_TOKEN`` is set; requests
+    must send ``Authorization: Bearer <token>``.
+    """
+    if not settings.REQUEST_METRICS or not settings.METRICS_TOKEN:
+        raise Http404
+    expected = f'Bearer {settings.METRICS_TOKEN}'.encode()
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,190 @@
+"""
+Keyset (seek) pagination for the invoice and transaction lists.
+
+Pages are addressed by an opaque cursor holding the ``(timestamp, id)`` of
+the row next to the page boundary. Each page is a single indexed range
+scan: no COUNT(*) and no OFFSET, so page 1000 costs the same as page 1.
+"""
+
+from base64 import b64decode, b64encode
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from urllib import parse
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+Cursor = namedtuple('Cursor', ['value', 'pk', 'reverse'])
+
+
+def encode_cursor(cursor):
+    """Encode a Cursor into the opaque token used in query strings"""
+    querystring = parse.urlencode({
+        'v': cursor.value.isoformat(),
+        'i': cursor.pk,
+        'r': int(cursor.reverse),
+    })
+    return b64encode(querystring.encode('ascii')).decode('ascii')
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        tokens = parse.parse_qs(b64decode(token.encode('ascii')).decode('ascii'))
+        return Cursor(
+            value=datetime.fromisoformat(tokens['v'][0]),
+            pk=int(tokens['i'][0]),
+            reverse=bool(int(tokens['r'][0])),
+        )
+    except (TypeError, KeyError, IndexError, UnicodeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+
+def keyset_queryset(queryset, field, cursor, page_size):
+    """Return the slice of ``queryset`` holding one page plus a look-ahead row
+
+    Rows are ordered newest first on ``(field, id)``. When ``cursor`` is
+    reversed the page before it is fetched in ascending order instead.
+    """
+    if cursor is None:
+        return queryset.order_by(f'-{field}', '-id')[:page_size + 1]
+
+    if cursor.reverse:
+        queryset = queryset.filter(
+            Q(**{f'{field}__gt': cursor.value}) | Q(**{field: cursor.value, 'id__gt': cursor.pk}),
+            **{f'{field}__gte': cursor.value}
+        ).order_by(field, 'id')
+    else:
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': cursor.value}) | Q(**{field: cursor.value, 'id__lt': cursor.pk}),
+            **{f'{field}__lte': cursor.value}
+        ).order_by(f'-{field}', '-id')
+    return queryset[:page_size + 1]
+
+
+def _row_value(row, name):
+    # Pages hold model instances or, on the fast list path, .values() dicts
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def keyset_page(rows, field, cursor, page_size):
+    """Turn the rows fetched by keyset_queryset into a page
+
+    Returns ``(rows, next_cursor, previous_cursor)`` with the rows in
+    newest-first order and None for the missing links.
+    """
+    rows = list(rows)
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    reverse = cursor is not None and cursor.reverse
+    if reverse:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    first, last = rows[0], rows[-1]
+    has_next = has_more if not reverse else True
+    has_previous = has_more if reverse else cursor is not None
+
+    next_cursor = Cursor(_row_value(last, field), _row_value(last, 'id'), False) if has_next else None
+    previous_cursor = Cursor(_row_value(first, field), _row_value(first, 'id'), True) if has_previous else None
+    return rows, next_cursor, previous_cursor
+
+
+class KeysetPagination(BasePagination):
+    """DRF pagination class on top of keyset_queryset / keyset_page
+
+    Requests that still pass ``?page=`` are served by PageNumberPagination
+    so existing clients keep working.
+    """
+    ordering_field = None
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fallback = None
+        if self.page_query_param in request.query_params:
+            self.fallback = PageNumberPagination()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+
+        token = request.query_params.get(self.cursor_query_param)
+        try:
+            cursor = decode_cursor(token) if token else None
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        rows = keyset_queryset(queryset, self.ordering_field, cursor, self.page_size)
+        rows, self.next_cursor, self.previous_cursor = keyset_page(
+            rows, self.ordering_field, cursor, self.page_size
+        )
+        return rows
+
+    def page_window(self, queryset, request):
+        """The slice of ``queryset`` a keyset request pages over, page plus look-ahead
+        
+        Returns None for ``?page=`` requests. A malformed cursor gives an
+        empty window, paginate_queryset() answers it with 404.
+        """
+        if self.page_query_param in request.query_params:
+            return None
+        token = request.query_params.get(self.cursor_query_param)
+        try:
+            cursor = decode_cursor(token) if token else None
+        except ValueError:
+            return queryset.none()
+        return keyset_queryset(queryset, self.ordering_field, cursor, self.page_size)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, encode_cursor(cursor))
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        return Response(OrderedDict([
+            ('next', self.get_link(self.next_cursor)),
+            ('previous', self.get_link(self.previous_cursor)),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'The pagination cursor value.',
+            'schema': {'type': 'string'},
+        }]
+
+
+class InvoicePagination(KeysetPagination):
+    """Newest invoices first, keyed on (created_at, id)"""
+    ordering_field = 'created_at'
+
+
+class TransactionPagination(KeysetPagination):
+    """Newest transactions first, keyed on (date, id)"""
+    ordering_field = 'date'
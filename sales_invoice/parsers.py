@@ -0,0 +1,33 @@
+"""
+JSON parser backed by orjson, falling back to DRF's JSONParser.
+
+orjson only reads UTF-8, so other request encodings go through JSONParser.
+Bodies orjson rejects are re-parsed with JSONParser too, which either
+accepts them (NaN when STRICT_JSON is off) or raises its usual ParseError.
+Unlike json, orjson reads integers wider than 64 bits as floats; no field
+here accepts values that large, so they are rejected either way.
+"""
+
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer, orjson
+
+
+class ORJSONParser(JSONParser):
+    """Drop-in JSONParser using orjson for UTF-8 request bodies"""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
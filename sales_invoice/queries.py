@@ -0,0 +1,167 @@
+"""
+Detection of N+1 query patterns and slow queries.
+
+A QueryLog records every statement run while it is active, through a
+database execute wrapper, together with a fingerprint (the SQL with its
+literals and IN lists collapsed) and where it came from: the serializer
+field being rendered when the query ran (``InvoiceReadSerializer.items``),
+or failing that the innermost frame of project code. The same fingerprint
+repeated more than a few times in one request is the signature of an N+1.
+
+Tests use QueryDetectorMixin (sales_invoice.testing); at runtime,
+QueryDetectorMiddleware logs offending requests to the
+``sales_invoice.queries`` logger when ``QUERY_DETECTOR`` is on.
+"""
+
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+
+# Transaction control statements repeat legitimately
+IGNORED = re.compile(r'^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT|BEGIN|COMMIT|ROLLBACK)\b', re.I)
+
+NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s|\b\d+(?:\.\d+)?\b'), '?'),
+    # IN (?, ?, ?) and multi-row VALUES (?, ?), (?, ?)
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*'), '(?)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def fingerprint(sql):
+    """``sql`` with literals, placeholders and IN lists normalised away"""
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def query_origin(frame):
+    """Where a query issued from ``frame`` came from
+
+    The serializer field being rendered if there is one, otherwise the
+    innermost frame of project code as ``path:line in function``.
+    """
+    project_frame = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'to_representation':
+            serializer, field = frame.f_locals.get('self'), frame.f_locals.get('field')
+            if isinstance(serializer, BaseSerializer) and field is not None:
+                return f'{type(serializer).__name__}.{field.field_name}'
+        if (
+            project_frame is None
+            and code.co_filename.startswith(PROJECT_ROOT)
+            and code.co_filename != __file__
+            and '/site-packages/' not in code.co_filename
+        ):
+            project_frame = f'{Path(code.co_filename).relative_to(PROJECT_ROOT)}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return project_frame or 'unknown'
+
+
+@dataclass
+class Query:
+    sql: str
+    fingerprint: str
+    origin: str
+    duration: float
+
+
+@dataclass
+class Repeat:
+    """A fingerprint that ran ``count`` times, with the origin of its first run"""
+    fingerprint: str
+    count: int
+    origin: str
+
+    def __str__(self):
+        return f'{self.count}x from {self.origin}: {self.fingerprint}'
+
+
+class QueryLog:
+    """Context manager recording the queries run on every database connection"""
+
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not IGNORED.match(sql):
+                self.queries.append(Query(
+                    sql=sql,
+                    fingerprint=fingerprint(sql),
+                    origin=query_origin(sys._getframe(1)),
+                    duration=time.perf_counter() - started,
+                ))
+
+    def repeats(self, threshold):
+        """Fingerprints run more than ``threshold`` times, most frequent first"""
+        counts = Counter(query.fingerprint for query in self.queries)
+        origins = {}
+        for query in self.queries:
+            origins.setdefault(query.fingerprint, query.origin)
+        return [
+            Repeat(fingerprint, count, origins[fingerprint])
+            for fingerprint, count in counts.most_common()
+            if count > threshold
+        ]
+
+    def slow(self, threshold):
+        """Queries that took longer than ``threshold`` seconds"""
+        return [query for query in self.queries if query.duration > threshold]
+
+
+class QueryDetectorMiddleware:
+    """Log requests that repeat a statement or run slow queries
+
+    Enabled with ``QUERY_DETECTOR``. A request is logged at WARNING when a
+    fingerprint runs more than ``QUERY_DETECTOR_REPEAT_THRESHOLD`` times or
+    a query takes longer than ``QUERY_DETECTOR_SLOW_QUERY_MS``. Meant for
+    staging and debugging: it records a stack origin for every query.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_DETECTOR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryLog() as log:
+            response = self.get_response(request)
+
+        for repeat in log.repeats(settings.QUERY_DETECTOR_REPEAT_THRESHOLD):
+            logger.warning('Repeated query in %s %s: %s', request.method, request.path, repeat)
+        for query in log.slow(settings.QUERY_DETECTOR_SLOW_QUERY_MS / 1000):
+            logger.warning(
+                'Slow query in %s %s (%.1f ms) from %s: %s',
+                request.method, request.path, query.duration * 1000, query.origin, query.sql
+            )
+        return response
@@ -0,0 +1,54 @@
+"""
+JSON renderer backed by orjson.
+
+The output is byte for byte what DRF's JSONRenderer produces for API
+responses: compact separators, non-ASCII left unescaped except U+2028 and
+U+2029, and every type orjson doesn't render the same way (datetimes,
+dates, times, Decimals, lazy strings, ...) handed to DRF's JSONEncoder.
+The one difference is floats in exponent form (``1e16``, not ``1e+16``);
+amounts are rendered as strings by the serializers, so responses don't
+contain any.
+Without orjson installed, or for pretty-printed (``indent``) responses and
+data orjson can't encode, rendering falls back to JSONRenderer.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Drop-in JSONRenderer using orjson for the common compact case"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, which json handles
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer, keeping the output a JavaScript subset
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
+    @property
+    def options(self):
+        # Datetimes and dataclasses go through the encoder so they match
+        # JSONEncoder; dict keys are stringified like json.dumps does
+        return orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
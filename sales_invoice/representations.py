@@ -0,0 +1,74 @@
+"""
+Shared plumbing for the ``.values()`` list fast paths.
+
+The per-model builders live in ``invoices.representations`` and
+``transactions.representations``; this module holds the view mixin, the
+serializer stand-in and the field formatters they share. Enabled with
+``FAST_READ_SERIALIZERS``.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+
+CENTS = Decimal('0.01')
+
+
+def decimal_string(value):
+    """DecimalField(decimal_places=2) representation"""
+    if value is None:
+        return None
+    return '{:f}'.format(value.quantize(CENTS))
+
+
+def datetime_string(value, tz):
+    """DateTimeField representation in ``tz``"""
+    if not value:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class FastListMixin:
+    """Paginate list() over ``.values()`` rows when FAST_READ_SERIALIZERS is on
+
+    Views using the mixin must define:
+
+    - ``list_values(queryset)``, returning the filtered queryset as the
+      ``.values()`` rows the serializer expects (e.g. ``invoice_values``);
+      paginate_queryset() calls it before paginating.
+    - get_serializer_class() returning a ValuesListSerializer when
+      ``uses_fast_list()``.
+
+    Conditional GET validators are still computed from the plain queryset.
+    """
+
+    def uses_fast_list(self):
+        return (
+            self.action == 'list'
+            and settings.FAST_READ_SERIALIZERS
+            and not getattr(self, 'swagger_fake_view', False)
+        )
+
+    def paginate_queryset(self, queryset):
+        if self.uses_fast_list():
+            queryset = self.list_values(queryset)
+        return super().paginate_queryset(queryset)
+
+
+class ValuesListSerializer:
+    """Stand-in for a ``many=True`` serializer over ``.values()`` rows
+
+    Subclasses set ``represent`` to a function turning the rows into the
+    response list. Only ``.data`` is supported, which is all list() uses.
+    """
+    represent = None
+
+    def __init__(self, instance=None, many=False, **kwargs):
+        self.instance = instance
+
+    @property
+    def data(self):
+        return type(self).represent(self.instance)
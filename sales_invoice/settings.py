@@ -4,6 +4,8 @@ Django settings for sales_invoice project.
 
 from pathlib import Path
 from datetime import timedelta
+from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,13 +30,17 @@ INSTALLED_APPS = [
     # Third party apps
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'drf_yasg',
     'corsheaders',
     
     # Local apps
     'users',
     'invoices',
+    'customers',
     'transactions',
+    'reports',
+    'benchmarks',
 ]
 
 # Custom User Model
@@ -42,6 +48,8 @@ AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'sales_invoice.metrics.RequestMetricsMiddleware',
+    'sales_invoice.queries.QueryDetectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,13 +83,82 @@ TEMPLATES = [
 WSGI_APPLICATION = 'sales_invoice.wsgi.application'
 
 # Database
-DATABASES = {
+# DB_ENGINE=sqlite (default) or postgresql, configured from the environment
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+if DB_ENGINE not in ('sqlite', 'postgresql'):
+    raise ImproperlyConfigured(f'DB_ENGINE={DB_ENGINE!r} is not one of: sqlite, postgresql')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='sales_invoice'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            # Keep connections open across requests instead of reconnecting
+            # every time; health checks replace ones the server dropped
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
+    }
+    # Django's native connection pool (requires psycopg 3 with the pool
+    # extra: pip install "psycopg[binary,pool]"). Replaces CONN_MAX_AGE.
+    if config('DB_POOL', default=False, cast=bool):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            # File-backed test database: the in-memory one can't serve concurrent connections
+            'TEST': {
+                'NAME': BASE_DIR / 'test_db.sqlite3',
+            },
+        }
+    }
+    # Opt-in profile for serving concurrent requests from SQLite on one node:
+    # WAL lets readers run alongside the writer, BEGIN IMMEDIATE takes the
+    # write lock up front so waiting writers honour the busy timeout instead
+    # of failing with "database is locked" on lock upgrade
+    SQLITE_TUNED_OPTIONS = {
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': config('DB_SQLITE_BUSY_TIMEOUT', default=20, cast=int),
+        'init_command': ';'.join([
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            'PRAGMA mmap_size=%d' % config('DB_SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int),
+            'PRAGMA temp_store=MEMORY',
+        ]),
+    }
+    if config('DB_SQLITE_TUNED', default=False, cast=bool):
+        DATABASES['default']['OPTIONS'] = SQLITE_TUNED_OPTIONS
+
+# Cache
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='sales-invoice'),
     }
 }
 
+# Cache used for serialized invoice list/detail responses, and how long (seconds) entries live
+INVOICE_CACHE_ALIAS = config('INVOICE_CACHE_ALIAS', default='default')
+INVOICE_CACHE_TIMEOUT = config('INVOICE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Stored responses for requests sent with an Idempotency-Key header (seconds)
+IDEMPOTENCY_CACHE_ALIAS = config('IDEMPOTENCY_CACHE_ALIAS', default='default')
+IDEMPOTENCY_KEY_TIMEOUT = config('IDEMPOTENCY_KEY_TIMEOUT', default=60 * 60 * 24, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -98,6 +175,31 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing: pbkdf2 (default), scrypt or argon2 (needs argon2-cffi).
+# The others stay enabled so existing hashes verify and are upgraded to the
+# preferred hasher on the next login. Cost settings left at 0 keep Django's
+# defaults (see users.hashers).
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'users.hashers.TunedScryptPasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2')
+if PASSWORD_HASHER not in PASSWORD_HASHER_CHOICES:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER={PASSWORD_HASHER!r} is not one of: {', '.join(PASSWORD_HASHER_CHOICES)}"
+    )
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=0, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=0, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=0, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=0, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=0, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=0, cast=int)
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=0, cast=int)
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -122,20 +224,75 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # orjson-backed drop-ins for JSONRenderer / JSONParser with identical
+    # output; both fall back to DRF's implementation without orjson installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'sales_invoice.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'sales_invoice.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Per-route latency / SQL / size histograms served at /metrics/ in the
+# Prometheus format (see sales_invoice.metrics). Off by default: the
+# middleware then drops out of the chain entirely
+REQUEST_METRICS = config('REQUEST_METRICS', default=False, cast=bool)
+REQUEST_METRICS_SERVER_TIMING = config('REQUEST_METRICS_SERVER_TIMING', default=True, cast=bool)
+# Bearer token required by /metrics/; the endpoint 404s while it is unset
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Log requests that repeat a statement (N+1) or run slow queries to the
+# sales_invoice.queries logger. For staging/debugging; off by default
+QUERY_DETECTOR = config('QUERY_DETECTOR', default=False, cast=bool)
+QUERY_DETECTOR_REPEAT_THRESHOLD = config('QUERY_DETECTOR_REPEAT_THRESHOLD', default=5, cast=int)
+QUERY_DETECTOR_SLOW_QUERY_MS = config('QUERY_DETECTOR_SLOW_QUERY_MS', default=100, cast=int)
+
+# Render invoice/transaction list pages from .values() rows instead of the
+# DRF serializers (same output, see sales_invoice.representations)
+FAST_READ_SERIALIZERS = config('FAST_READ_SERIALIZERS', default=True, cast=bool)
+
+# Maximum number of invoices accepted by POST /api/invoices/bulk/
+INVOICE_BULK_MAX_BATCH = 1000
+
+# Opt-in: serve read-only invoice/transaction requests from the token claims
+# instead of loading the user row (see users.authentication). Claims are only
+# refreshed with the token, so access tokens are kept short while it is on
+JWT_STATELESS_READS = config('JWT_STATELESS_READS', default=False, cast=bool)
+
 # JWT Settings
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(hours=2),
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5) if JWT_STATELESS_READS else timedelta(hours=2),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is written by CustomTokenObtainPairSerializer instead, at
+    # most once per LAST_LOGIN_UPDATE_INTERVAL
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.TokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'users.serializers.TokenVerifySerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'users.serializers.TokenBlacklistSerializer',
 }
 
+# Refresh token revocation (see users.tokens): seconds between syncs of each
+# worker's bloom filter with the blacklist table, and the filter's sizing
+TOKEN_BLACKLIST_SYNC_INTERVAL = config('TOKEN_BLACKLIST_SYNC_INTERVAL', default=10, cast=int)
+TOKEN_BLACKLIST_BLOOM_CAPACITY = config('TOKEN_BLACKLIST_BLOOM_CAPACITY', default=100_000, cast=int)
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE = config('TOKEN_BLACKLIST_BLOOM_ERROR_RATE', default=0.001, cast=float)
+
+# Minimum seconds between last_login writes for the same user (0 = every login)
+LAST_LOGIN_UPDATE_INTERVAL = config('LAST_LOGIN_UPDATE_INTERVAL', default=300, cast=int)
+
+# Per-process cache of users loaded for write requests
+JWT_USER_CACHE_SIZE = config('JWT_USER_CACHE_SIZE', default=1024, cast=int)
+JWT_USER_CACHE_TTL = config('JWT_USER_CACHE_TTL', default=30, cast=int)
+
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development
 
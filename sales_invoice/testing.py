@@ -0,0 +1,98 @@
+"""
+Helpers shared by the test suites of the project's apps.
+
+Benchmark tests are tagged ``benchmark`` so they can be skipped with
+``python manage.py test --exclude-tag benchmark``.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .queries import QueryLog
+
+
+def benchmark(func, repeat=5):
+    """Call ``func`` ``repeat`` times and return the best wall time in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, **metrics):
+    """Write one benchmark result line to stderr"""
+    values = ' '.join(
+        f'{key}={value:.4f}' if isinstance(value, float) else f'{key}={value}'
+        for key, value in metrics.items()
+    )
+    sys.stderr.write(f'\n[benchmark] {name}: {values}\n')
+
+
+class QueryDetectorMixin:
+    """TestCase mixin failing tests whose requests repeat a query (N+1)
+
+    ``query_repeat_threshold`` is how many times one statement fingerprint
+    may run inside ``assertNoRepeatedQueries`` before the test fails.
+    """
+    query_repeat_threshold = 2
+
+    @contextmanager
+    def assertNoRepeatedQueries(self, threshold=None):
+        """Fail if a statement repeats more than ``threshold`` times in the block
+
+        Yields the QueryLog, so the block can also inspect ``log.queries``.
+        The failure names the serializer field or code that issued each
+        repeated statement.
+        """
+        with QueryLog() as log:
+            yield log
+        repeats = log.repeats(self.query_repeat_threshold if threshold is None else threshold)
+        if repeats:
+            self.fail('Repeated queries (possible N+1):\n' + '\n'.join(f'  {repeat}' for repeat in repeats))
+
+
+class InvoiceFixturesMixin:
+    """TestCase mixin with two users, a client authenticated as the first,
+    and a helper creating invoices through POST /api/invoices/
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        User = get_user_model()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_invoice(self, reference, price, **fields):
+        """Create a one-item invoice as the authenticated user and return it
+
+        ``fields`` are extra request fields (``status``, ``customer_email``,
+        ...); ``customer_name`` defaults to ``'Customer'``.
+        """
+        from invoices.models import Invoice
+
+        response = self.client.post('/api/invoices/', {
+            'reference': reference,
+            'customer_name': 'Customer',
+            **fields,
+            'items': [{'name': 'Product', 'quantity': 1, 'price': price}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Invoice.objects.get(pk=response.data['id'])
@@ -0,0 +1,328 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from invoices.models import Invoice, InvoiceItem
+from invoices.serializers import InvoiceReadSerializer
+from . import parsers, renderers
+from .metrics import Histogram, registry
+from .parsers import ORJSONParser
+from .queries import QueryLog, fingerprint
+from .renderers import ORJSONRenderer
+from .testing import benchmark, report
+
+User = get_user_model()
+
+
+class MetricsFixturesMixin:
+    """Shared setup for request metrics tests"""
+    
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='metricsuser',
+            email='metrics@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        for i in range(3):
+            invoice = Invoice.objects.create(
+                reference=f'METRICS-{i:03d}',
+                customer_name='Customer',
+                total_amount=Decimal('10.00'),
+                created_by=self.user
+            )
+            InvoiceItem.objects.create(invoice=invoice, name='Item', quantity=1, price=Decimal('10.00'))
+
+
+@override_settings(REQUEST_METRICS=True, METRICS_TOKEN='scrape-secret', INVOICE_CACHE_TIMEOUT=0)
+class RequestMetricsMiddlewareTestCase(MetricsFixturesMixin, TestCase):
+    """Test cases for RequestMetricsMiddleware and the /metrics/ endpoint"""
+    
+    def histograms(self, route, method='GET'):
+        return dict(zip(
+            ['duration', 'sql_queries', 'sql_time', 'render', 'size'],
+            registry.histograms[(route, method)],
+        ))
+    
+    def test_records_per_route(self):
+        """Test that each request is recorded under its URL name with its query count and size"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        histograms = self.histograms('invoice-list')
+        self.assertEqual(histograms['duration'].count, 1)
+        self.assertEqual(histograms['sql_queries'].sum, len(context.captured_queries))
+        self.assertGreater(histograms['sql_time'].sum, 0)
+        self.assertGreater(histograms['render'].sum, 0)
+        self.assertEqual(histograms['size'].sum, len(response.content))
+        
+        invoice = Invoice.objects.first()
+        self.client.patch(f'/api/invoices/{invoice.id}/pay/')
+        self.client.get('/api/transactions/')
+        self.assertEqual(self.histograms('invoice-pay', 'PATCH')['duration'].count, 1)
+        self.assertEqual(self.histograms('transaction-list')['duration'].count, 1)
+        self.assertEqual(registry.requests[('invoice-pay', 'PATCH', '200')], 1)
+    
+    def test_server_timing_header(self):
+        """Test that responses carry db, render and total timings"""
+        response = self.client.get('/api/invoices/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ queries", render;dur=[\d.]+, total;dur=[\d.]+$'
+        )
+        
+        with override_settings(REQUEST_METRICS_SERVER_TIMING=False):
+            self.assertNotIn('Server-Timing', self.client.get('/api/invoices/'))
+    
+    def test_unmatched_and_streaming(self):
+        """Test that 404s are recorded as unmatched and streamed bodies aren't sized"""
+        self.client.get('/api/nothing-here/')
+        self.client.get('/api/invoices/export/')
+        self.assertEqual(registry.requests[('unmatched', 'GET', '404')], 1)
+        self.assertEqual(self.histograms('invoice-export')['size'].count, 0)
+        self.assertEqual(self.histograms('invoice-export')['duration'].count, 1)
+    
+    def test_prometheus_endpoint(self):
+        """Test the text exposition format of GET /metrics/"""
+        self.client.get('/api/invoices/')
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_requests_total{route="invoice-list",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_sql_queries_bucket{route="invoice-list",method="GET",le="+Inf"} 1', body)
+        self.assertIn('http_response_size_bytes_count{route="invoice-list",method="GET"} 1', body)
+    
+    def test_prometheus_endpoint_token(self):
+        """Test that METRICS_TOKEN is required, and the endpoint hidden without one"""
+        self.assertEqual(self.client.get('/metrics/').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        with override_settings(METRICS_TOKEN=''):
+            response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_histogram_buckets(self):
+        """Test that buckets are cumulative with inclusive upper bounds"""
+        histogram = Histogram((1, 5, 10))
+        for value in (0, 1, 2, 5, 11):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.cumulative()), [(1, 2), (5, 4), (10, 4)])
+        self.assertEqual((histogram.count, histogram.sum), (5, 19))
+
+
+class RequestMetricsDisabledTestCase(MetricsFixturesMixin, TestCase):
+    """Test that REQUEST_METRICS=False leaves requests untouched"""
+    
+    @override_settings(REQUEST_METRICS=False, METRICS_TOKEN='scrape-secret')
+    def test_disabled(self):
+        """Test that nothing is recorded, no header is added and /metrics/ is hidden"""
+        response = self.client.get('/api/invoices/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(registry.histograms, {})
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QueryDetectorTestCase(MetricsFixturesMixin, TestCase):
+    """Test cases for QueryLog fingerprints and QueryDetectorMiddleware"""
+    
+    def test_fingerprint(self):
+        """Test that literals, placeholders and IN lists are normalised"""
+        self.assertEqual(
+            fingerprint('SELECT * FROM "invoices" WHERE "id" IN (%s, %s, %s) AND "status" = \'PAID\' LIMIT 21'),
+            'SELECT * FROM "invoices" WHERE "id" IN (?) AND "status" = ? LIMIT ?'
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO "invoice_items" ("a", "b") VALUES (%s, %s), (%s, %s)'),
+            fingerprint('INSERT INTO "invoice_items" ("a", "b") VALUES (%s, %s)'),
+        )
+    
+    def test_repeats_and_origin(self):
+        """Test that repeated statements are grouped with the field that issued them"""
+        with QueryLog() as log:
+            InvoiceReadSerializer(Invoice.objects.all(), many=True).data
+        repeats = {repeat.origin: repeat.count for repeat in log.repeats(2)}
+        self.assertEqual(repeats, {
+            'InvoiceReadSerializer.items': 3,
+            'InvoiceReadSerializer.created_by': 3,
+        })
+        self.assertEqual(log.repeats(3), [])
+    
+    @override_settings(QUERY_DETECTOR=True, QUERY_DETECTOR_REPEAT_THRESHOLD=0, QUERY_DETECTOR_SLOW_QUERY_MS=0)
+    def test_middleware_logs(self):
+        """Test that the runtime detector logs repeated and slow queries"""
+        with self.assertLogs('sales_invoice.queries', level='WARNING') as logs:
+            self.client.get('/api/invoices/')
+        output = '\n'.join(logs.output)
+        self.assertIn('Repeated query in GET /api/invoices/', output)
+        self.assertIn('Slow query in GET /api/invoices/', output)
+    
+    @override_settings(QUERY_DETECTOR=True)
+    def test_middleware_quiet_for_clean_requests(self):
+        """Test that a request without N+1 or slow queries logs nothing"""
+        with self.assertNoLogs('sales_invoice.queries', level='WARNING'):
+            self.client.get('/api/invoices/')
+
+
+@tag('benchmark')
+@override_settings(INVOICE_CACHE_TIMEOUT=0)
+class RequestMetricsOverheadBenchmark(MetricsFixturesMixin, TestCase):
+    """Latency of GET /api/invoices/ with the metrics middleware off and on"""
+    
+    def test_overhead(self):
+        for enabled in (False, True):
+            with override_settings(REQUEST_METRICS=enabled):
+                client = APIClient()
+                client.force_authenticate(user=self.user)
+                seconds = benchmark(lambda: client.get('/api/invoices/'), repeat=50)
+            report('invoice-list metrics', enabled=enabled, seconds=seconds)
+
+
+class ORJSONRendererTestCase(TestCase):
+    """Test that ORJSONRenderer / ORJSONParser match DRF's JSONRenderer / JSONParser"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        user = User.objects.create_user(
+            username='renderuser',
+            email='render@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=user)
+        for i in range(3):
+            invoice = Invoice.objects.create(
+                reference=f'RENDER-{i:03d}',
+                customer_name='Caf\u00e9 \u2028 Customer',
+                total_amount=Decimal('20.00'),
+                created_by=user
+            )
+            InvoiceItem.objects.bulk_create([
+                InvoiceItem(invoice=invoice, name=f'Item {j}', quantity=1, price=Decimal('10.00'))
+                for j in range(2)
+            ])
+    
+    def assertRendersLikeJSONRenderer(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+    
+    def test_api_page(self):
+        """Test that a rendered list page is byte for byte the same"""
+        data = self.client.get('/api/invoices/').data
+        self.assertRendersLikeJSONRenderer(data)
+    
+    def test_special_values(self):
+        """Test the types JSONEncoder handles and the JavaScript line separators"""
+        utc = datetime.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc)
+        self.assertRendersLikeJSONRenderer({
+            'decimal': Decimal('12.50'),
+            'utc': utc,
+            'offset': utc.astimezone(datetime.timezone(datetime.timedelta(hours=5, minutes=30))),
+            'naive': datetime.datetime(2024, 1, 2, 3, 4, 5),
+            'local': timezone.localtime(utc),
+            'date': datetime.date(2024, 1, 2),
+            'time': datetime.time(3, 4, 5, 6),
+            'duration': datetime.timedelta(minutes=90),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Not found.'),
+            'text': 'caf\u00e9 \u2028 \u2029 \U0001f600 "quoted" \\ \n',
+            'int_keys': {1: 'one'},
+            'big': 2 ** 70,
+            'nested': [None, True, 0, -1, 1.5, (1, 2)],
+        })
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+    
+    def test_indent_falls_back(self):
+        """Test that ?indent requests are pretty-printed like JSONRenderer"""
+        self.assertRendersLikeJSONRenderer({'a': [1, 2]}, 'application/json; indent=4')
+    
+    def test_without_orjson(self):
+        """Test that both classes behave like DRF's when orjson isn't installed"""
+        with mock.patch.object(renderers, 'orjson', None), mock.patch.object(parsers, 'orjson', None):
+            data = self.client.get('/api/invoices/').data
+            self.assertRendersLikeJSONRenderer(data)
+            self.assertEqual(ORJSONParser().parse(io.BytesIO(b'{"a": [1]}')), {'a': [1]})
+    
+    def test_parser(self):
+        """Test that bodies parse as with JSONParser and errors are ParseErrors"""
+        body = '{"name": "caf\u00e9", "price": 10.5, "quantity": 3, "items": [null, true]}'.encode()
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        
+        for invalid in (b'{"a": ', b'', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                ORJSONParser().parse(io.BytesIO(invalid))
+    
+    def test_parser_non_utf8(self):
+        """Test that other encodings go through JSONParser"""
+        body = '{"name": "caf\u00e9"}'.encode('latin-1')
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(body), parser_context={'encoding': 'latin-1'}),
+            {'name': 'caf\u00e9'},
+        )
+    
+    def test_api_uses_renderer(self):
+        """Test that API responses are rendered by ORJSONRenderer"""
+        for url in ('/api/invoices/', '/api/transactions/'):
+            response = self.client.get(url)
+            self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+
+
+@tag('benchmark')
+class RenderBenchmark(TestCase):
+    """Rendering a large list page with JSONRenderer vs ORJSONRenderer"""
+    
+    def test_render_1000_rows(self):
+        # Shaped like a transaction list page: serializer output is already
+        # strings and ints, with the nested invoice and its items
+        created_at = '2024-01-02T03:04:05.678901Z'
+        items = [
+            {'id': j, 'name': f'Item {j}', 'quantity': 1, 'price': '10.00', 'subtotal': '10.00'}
+            for j in range(3)
+        ]
+        results = [
+            {
+                'id': i,
+                'transaction_type': 'Sale',
+                'amount': '30.00',
+                'date': created_at,
+                'invoice': {
+                    'id': i, 'reference': f'TX-{i:05d}', 'customer': i, 'customer_name': f'Customer {i}',
+                    'customer_email': None, 'customer_phone': None, 'total_amount': '30.00',
+                    'status': 'PENDING', 'created_by': 'renderuser', 'created_at': created_at,
+                    'updated_at': created_at, 'items': items,
+                },
+            }
+            for i in range(1000)
+        ]
+        data = {'next': None, 'previous': None, 'results': results}
+        
+        content = JSONRenderer().render(data)
+        self.assertEqual(ORJSONRenderer().render(data), content)
+        
+        slow = benchmark(lambda: JSONRenderer().render(data))
+        fast = benchmark(lambda: ORJSONRenderer().render(data))
+        report('list render', renderer='JSONRenderer', rows=1000, bytes=len(content), seconds=slow)
+        report('list render', renderer='ORJSONRenderer', rows=1000, bytes=len(content), seconds=fast,
+               speedup=round(slow / fast, 1))
@@ -4,10 +4,14 @@ URL configuration for sales_invoice project.
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
+    TokenBlacklistView,
     TokenRefreshView,
     TokenVerifyView,
 )
+from invoices.views import invoice_detail_async, invoice_list_async
+from transactions.views import transaction_list_async
+from users.views import CustomTokenObtainPairView, profile_async
+from sales_invoice.metrics import metrics_view
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
@@ -29,9 +33,10 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     
     # JWT Authentication
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
+    path('api/token/blacklist/', TokenBlacklistView.as_view(), name='token_blacklist'),
     
     # User management
     path('api/users/', include('users.urls')),
@@ -42,6 +47,21 @@ urlpatterns = [
     # Transaction management
     path('api/', include('transactions.urls')),
     
+    # Customer management
+    path('api/', include('customers.urls')),
+    
+    # Native async reads, for ASGI servers (uvicorn sales_invoice.asgi:application)
+    path('api/async/invoices/', invoice_list_async, name='invoice-list-async'),
+    path('api/async/invoices/<int:pk>/', invoice_detail_async, name='invoice-detail-async'),
+    path('api/async/transactions/', transaction_list_async, name='transaction-list-async'),
+    path('api/async/users/profile/', profile_async, name='profile-async'),
+    
+    # Reports
+    path('api/reports/', include('reports.urls')),
+    
+    # Prometheus scrape endpoint (REQUEST_METRICS)
+    path('metrics/', metrics_view, name='metrics'),
+    
     # API Documentation
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
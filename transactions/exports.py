@@ -0,0 +1,18 @@
+"""Records for the streaming transaction export (see sales_invoice.exports)"""
+
+from sales_invoice.exports import EXPORT_CHUNK_SIZE
+
+TRANSACTION_FIELDS = ['id', 'invoice_id', 'invoice_reference', 'transaction_type', 'amount', 'date']
+
+
+def transaction_records(queryset):
+    """Yield one dict per transaction referencing its invoice"""
+    for transaction in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'id': transaction.id,
+            'invoice_id': transaction.invoice_id,
+            'invoice_reference': transaction.invoice.reference,
+            'transaction_type': transaction.transaction_type,
+            'amount': transaction.amount,
+            'date': transaction.date,
+        }
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:45
+
+from django.db import migrations, transaction
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 5000
+
+
+def backfill_owner(apps, schema_editor):
+    """Copy invoice.created_by onto existing transactions
+    
+    One UPDATE per batch of ids, each committed on its own, so a large
+    table is never locked for the whole run and an interrupted run resumes
+    where it stopped.
+    """
+    Invoice = apps.get_model('invoices', 'Invoice')
+    Transaction = apps.get_model('transactions', 'Transaction')
+    owner = Subquery(Invoice.objects.filter(pk=OuterRef('invoice_id')).values('created_by_id')[:1])
+    
+    last_id = 0
+    while True:
+        ids = list(
+            Transaction.objects
+            .filter(owner__isnull=True, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        with transaction.atomic():
+            Transaction.objects.filter(pk__in=ids).update(owner_id=owner)
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own; on PostgreSQL the NOT NULL change must
+    # not share a transaction with the UPDATEs (pending trigger events)
+    atomic = False
+
+    dependencies = [
+        ('transactions', '0003_transaction_owner'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_owner, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,43 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
+from django.conf import settings
 from django.core.validators import MinValueValidator
 from invoices.models import Invoice
+from .signals import transactions_recorded
+
+
+class TransactionQuerySet(models.QuerySet):
+    """QuerySet helpers shared by the transaction API views"""
+
+    def for_user(self, user):
+        """Restrict to the transactions the given user is allowed to see"""
+        if user.is_anonymous:
+            return self.none()
+        if user.is_staff:
+            return self
+        return self.filter(owner_id=user.pk)
+
+    def record(self, transactions):
+        """Insert transactions in bulk and notify transactions_recorded receivers
+        
+        Every write of a Sale or Payment goes through here so derived data
+        (such as the reporting rollups) stays in sync with the ledger.
+        """
+        for transaction in transactions:
+            if transaction.owner_id is None:
+                transaction.owner_id = transaction.invoice.created_by_id
+        
+        with db_transaction.atomic(savepoint=False):
+            transactions = self.bulk_create(transactions)
+            transactions_recorded.send(sender=self.model, transactions=transactions)
+        return transactions
+    
+    def with_invoice(self):
+        """Join the invoice row needed by the compact representation"""
+        return self.select_related('invoice')
+
+    def with_invoice_details(self):
+        """Load everything the nested invoice payload renders in a fixed number of queries"""
+        return self.select_related('invoice__created_by').prefetch_related('invoice__items')
 
 
 class Transaction(models.Model):
@@ -12,13 +49,28 @@ class Transaction(models.Model):
     ]
     
     invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='invoice_transactions')
+    # Denormalized copy of invoice.created_by so per-user listing needs no join
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='transactions', editable=False)
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
     date = models.DateTimeField(auto_now_add=True)
     
+    objects = TransactionQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-date']
         db_table = 'transactions'
+        indexes = [
+            # Keyset pagination on (date, id)
+            models.Index(fields=['-date', '-id'], name='transactions_date_id_idx'),
+            # Per-user listing
+            models.Index(fields=['owner', '-date', '-id'], name='transactions_owner_date_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if self.owner_id is None and self.invoice_id is not None:
+            self.owner_id = self.invoice.created_by_id
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.transaction_type} - {self.invoice.reference} - ${self.amount}"
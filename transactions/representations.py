@@ -0,0 +1,62 @@
+"""
+Fast path for transaction list responses, built like invoices.representations
+from ``.values()`` rows instead of TransactionSerializer /
+TransactionCompactSerializer, with identical output.
+"""
+
+from django.utils import timezone
+
+from invoices.representations import INVOICE_VALUES, invoice_representation, items_by_invoice
+from sales_invoice.representations import ValuesListSerializer, datetime_string, decimal_string
+
+TRANSACTION_VALUES = ['id', 'invoice_id', 'transaction_type', 'amount', 'date']
+
+
+def transaction_values(queryset, compact=False):
+    """``queryset.values()`` with the columns the representations below need"""
+    if compact:
+        return queryset.values(*TRANSACTION_VALUES, 'invoice__reference')
+    return queryset.values(*TRANSACTION_VALUES, *[f'invoice__{field}' for field in INVOICE_VALUES])
+
+
+def transaction_representations(rows):
+    """TransactionSerializer(many=True).data for ``transaction_values`` rows"""
+    rows = list(rows)
+    items = items_by_invoice({row['invoice_id'] for row in rows})
+    tz = timezone.get_current_timezone()
+    return [
+        {
+            'id': row['id'],
+            'invoice': invoice_representation(row, items, tz, prefix='invoice__'),
+            'transaction_type': row['transaction_type'],
+            'amount': decimal_string(row['amount']),
+            'date': datetime_string(row['date'], tz),
+        }
+        for row in rows
+    ]
+
+
+def compact_transaction_representations(rows):
+    """TransactionCompactSerializer(many=True).data for compact ``transaction_values`` rows"""
+    tz = timezone.get_current_timezone()
+    return [
+        {
+            'id': row['id'],
+            'invoice_id': row['invoice_id'],
+            'invoice_reference': row['invoice__reference'],
+            'transaction_type': row['transaction_type'],
+            'amount': decimal_string(row['amount']),
+            'date': datetime_string(row['date'], tz),
+        }
+        for row in rows
+    ]
+
+
+class TransactionListSerializer(ValuesListSerializer):
+    """Fast equivalent of TransactionSerializer(many=True) for list responses"""
+    represent = transaction_representations
+
+
+class CompactTransactionListSerializer(ValuesListSerializer):
+    """Fast equivalent of TransactionCompactSerializer(many=True) for list responses"""
+    represent = compact_transaction_representations
@@ -13,3 +13,13 @@ class TransactionSerializer(serializers.ModelSerializer):
         fields = ['id', 'invoice', 'invoice_id', 'transaction_type', 'amount', 'date']
         read_only_fields = ['id', 'date']
 
+
+class TransactionCompactSerializer(serializers.ModelSerializer):
+    """Lean serializer for Transaction that references the invoice instead of embedding it"""
+    invoice_id = serializers.IntegerField(read_only=True)
+    invoice_reference = serializers.CharField(source='invoice.reference', read_only=True)
+    
+    class Meta:
+        model = Transaction
+        fields = ['id', 'invoice_id', 'invoice_reference', 'transaction_type', 'amount', 'date']
+        read_only_fields = fields
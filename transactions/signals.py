@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent by TransactionQuerySet.record() after transactions are inserted.
+# Receivers get the saved Transaction instances as ``transactions`` and run
+# inside the same database transaction as the insert.
+transactions_recorded = Signal()
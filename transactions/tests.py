@@ -1,3 +1,282 @@
-from django.test import TestCase
+import csv
+import io
+import datetime
+import json
+from unittest import mock
+from unittest import skipUnless
+from django.test import TestCase, override_settings, tag
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APIClient
+from decimal import Decimal
+from invoices.models import Invoice, InvoiceItem
+from sales_invoice.testing import QueryDetectorMixin, benchmark, report
+from users.serializers import CustomTokenObtainPairSerializer
+from .models import Transaction
+from .serializers import TransactionCompactSerializer, TransactionSerializer
 
-# Create your tests here.
+User = get_user_model()
+
+
+class TransactionFixturesMixin(QueryDetectorMixin):
+    """Shared setup for transaction tests"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def create_invoices(self, count, items_per_invoice):
+        """Create invoices with items and a Sale transaction each"""
+        for i in range(count):
+            invoice = Invoice.objects.create(
+                reference=f'TX-{Invoice.objects.count() + 1:05d}',
+                customer_name=f'Customer {i}',
+                total_amount=Decimal('10.00') * items_per_invoice,
+                created_by=self.user
+            )
+            InvoiceItem.objects.bulk_create([
+                InvoiceItem(invoice=invoice, name=f'Item {j}', quantity=1, price=Decimal('10.00'))
+                for j in range(items_per_invoice)
+            ])
+            Transaction.objects.create(
+                invoice=invoice,
+                transaction_type='Sale',
+                amount=invoice.total_amount
+            )
+    
+    def count_queries(self, url):
+        """Return the number of queries issued while serving a GET request
+        
+        Fails if the request repeats a statement, naming where it came from.
+        """
+        with self.assertNoRepeatedQueries(), CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+
+class TransactionViewSetTestCase(TransactionFixturesMixin, TestCase):
+    """Test cases for Transaction functionality"""
+    
+    def test_full_representation_nests_invoice(self):
+        """Test that the default representation embeds the full invoice"""
+        self.create_invoices(1, 2)
+        
+        response = self.client.get('/api/transactions/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        row = response.data['results'][0]
+        self.assertEqual(row['invoice']['reference'], 'TX-00001')
+        self.assertEqual(len(row['invoice']['items']), 2)
+    
+    def test_compact_representation_references_invoice(self):
+        """Test that ?view=compact returns the invoice id and reference only"""
+        self.create_invoices(1, 2)
+        invoice = Invoice.objects.get()
+        
+        response = self.client.get('/api/transactions/?view=compact')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        row = response.data['results'][0]
+        self.assertEqual(row['invoice_id'], invoice.id)
+        self.assertEqual(row['invoice_reference'], 'TX-00001')
+        self.assertNotIn('invoice', row)
+    
+    def test_user_sees_only_own_transactions(self):
+        """Test that users can only see transactions of their own invoices"""
+        self.create_invoices(1, 1)
+        other = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=other)
+        
+        response = self.client.get('/api/transactions/?view=compact')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+    
+    def test_query_count_is_constant(self):
+        """Test that both representations use a fixed number of queries"""
+        self.create_invoices(1, 1)
+        full = self.count_queries('/api/transactions/')
+        compact = self.count_queries('/api/transactions/?view=compact')
+        
+        self.create_invoices(19, 5)
+        self.assertEqual(self.count_queries('/api/transactions/'), full)
+        self.assertEqual(self.count_queries('/api/transactions/?view=compact'), compact)
+    
+    def test_cursor_pagination(self):
+        """Test that transactions are paginated with keyset cursors"""
+        self.create_invoices(25, 1)
+        
+        first = self.client.get('/api/transactions/?view=compact')
+        self.assertNotIn('count', first.data)
+        second = self.client.get(first.data['next'])
+        self.assertEqual(len(first.data['results']), 20)
+        self.assertEqual(len(second.data['results']), 5)
+        self.assertIsNone(second.data['next'])
+        
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, list(Transaction.objects.order_by('-date', '-id').values_list('id', flat=True)))
+    
+    def test_export_ndjson(self):
+        """Test that the NDJSON export streams one line per own transaction"""
+        self.create_invoices(2, 1)
+        
+        response = self.client.get('/api/transactions/export/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(sorted(record['invoice_reference'] for record in records), ['TX-00001', 'TX-00002'])
+        self.assertEqual(records[0]['amount'], '10.00')
+    
+    def test_export_csv(self):
+        """Test that the CSV export has a header and one row per transaction"""
+        self.create_invoices(2, 1)
+        
+        response = self.client.get('/api/transactions/export/?output=csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['id', 'invoice_id', 'invoice_reference', 'transaction_type', 'amount', 'date'])
+        self.assertEqual(len(rows), 3)
+
+    
+    def test_conditional_get_skips_serializer(self):
+        """Test that an unchanged list returns 304 without serializing, and 200 after a new transaction"""
+        self.create_invoices(2, 1)
+        response = self.client.get('/api/transactions/')
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        
+        with mock.patch.object(TransactionSerializer, 'to_representation') as to_representation:
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        to_representation.assert_not_called()
+        
+        self.create_invoices(1, 1)
+        response = self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_conditional_get_follows_nested_invoice(self):
+        """Test that a status change of the nested invoice, with no new transaction, changes the ETag"""
+        self.create_invoices(1, 1)
+        etag = self.client.get('/api/transactions/')['ETag']
+        
+        Invoice.objects.update(status='PAID', updated_at=timezone.now() + datetime.timedelta(seconds=1))
+        response = self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['invoice']['status'], 'PAID')
+    
+    def test_owner_is_copied_from_invoice(self):
+        """Test that transactions record the invoice owner"""
+        self.create_invoices(1, 1)
+        self.assertEqual(Transaction.objects.get().owner, self.user)
+    
+    @skipUnless(connection.vendor == 'sqlite', 'Query plans are asserted in SQLite EXPLAIN QUERY PLAN format')
+    def test_user_list_uses_owner_index(self):
+        """Test that per-user listing reads the owner index without joining invoices"""
+        queryset = Transaction.objects.for_user(self.user).order_by('-date', '-id')[:21]
+        plan = queryset.explain()
+        self.assertIn('USING INDEX transactions_owner_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertNotIn('invoices', plan)
+
+
+class TransactionAsyncViewTestCase(TransactionFixturesMixin, TestCase):
+    """Test cases for GET /api/async/transactions/"""
+    
+    def setUp(self):
+        super().setUp()
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    
+    def test_matches_sync_endpoint(self):
+        """Test that full and compact pages match GET /api/transactions/"""
+        self.create_invoices(3, 2)
+        
+        for query in ('', '?view=compact'):
+            async_page = self.client.get(f'/api/async/transactions/{query}').json()
+            sync_page = self.client.get(f'/api/transactions/{query}').json()
+            self.assertEqual(async_page['results'], sync_page['results'])
+            self.assertEqual(len(async_page['results']), 3)
+    
+    def test_user_sees_only_own_transactions(self):
+        """Test that other users' transactions are not listed"""
+        self.create_invoices(2, 1)
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        token = CustomTokenObtainPairSerializer.get_token(other).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        
+        self.assertEqual(self.client.get('/api/async/transactions/').json()['results'], [])
+    
+    def test_inactive_user_rejected(self):
+        """Test that a deactivated user's token is refused"""
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get('/api/async/transactions/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TransactionFastListTestCase(TransactionFixturesMixin, TestCase):
+    """Test that the FAST_READ_SERIALIZERS list path matches the serializers"""
+    
+    def setUp(self):
+        super().setUp()
+        self.create_invoices(2, 3)
+        # An invoice without items and with an odd-cent refund
+        invoice = Invoice.objects.create(
+            reference='TX-EMPTY',
+            customer_name='Customer',
+            customer_email='customer@example.com',
+            total_amount=Decimal('0.5'),
+            created_by=self.user
+        )
+        Transaction.objects.create(invoice=invoice, transaction_type='Refund', amount=Decimal('0.05'))
+    
+    def expected(self, serializer_class):
+        transactions = Transaction.objects.with_invoice_details().order_by('-date', '-id')
+        return json.loads(json.dumps(serializer_class(transactions, many=True).data))
+    
+    def test_full_matches_serializer(self):
+        """Test that the nested page is identical to TransactionSerializer output"""
+        results = self.client.get('/api/transactions/').json()['results']
+        self.assertEqual(results, self.expected(TransactionSerializer))
+    
+    def test_compact_matches_serializer(self):
+        """Test that the compact page is identical to TransactionCompactSerializer output"""
+        results = self.client.get('/api/transactions/?view=compact').json()['results']
+        self.assertEqual(results, self.expected(TransactionCompactSerializer))
+    
+    def test_matches_slow_path(self):
+        """Test that responses with the flag on and off are byte for byte equal"""
+        for query in ('', '?view=compact'):
+            fast = self.client.get(f'/api/transactions/{query}').content
+            with override_settings(FAST_READ_SERIALIZERS=False):
+                slow = self.client.get(f'/api/transactions/{query}').content
+            self.assertEqual(fast, slow)
+
+
+@tag('benchmark')
+class TransactionListBenchmark(TransactionFixturesMixin, TestCase):
+    """Payload size and latency of the full vs compact transaction list"""
+    
+    def test_full_vs_compact(self):
+        self.create_invoices(20, 10)
+        
+        results = {}
+        for mode, url in [('full', '/api/transactions/'), ('compact', '/api/transactions/?view=compact')]:
+            payload = len(self.client.get(url).content)
+            seconds = benchmark(lambda: self.client.get(url))
+            results[mode] = payload
+            report(f'transaction-list {mode}', rows=20, bytes=payload, seconds=seconds)
+        
+        self.assertLess(results['compact'], results['full'])
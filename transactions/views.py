@@ -1,15 +1,39 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django.contrib.auth.models import User
+from django.views.decorators.http import require_GET
+from sales_invoice.asynchronous import jwt_required, keyset_response
+from sales_invoice.conditional import ConditionalGetMixin
+from users.authentication import StatelessJWTAuthentication
+from sales_invoice.pagination import TransactionPagination
+from sales_invoice.representations import FastListMixin
+from sales_invoice.exports import EXPORT_OUTPUTS, export_response
+from .exports import TRANSACTION_FIELDS, transaction_records
 from .models import Transaction
-from .serializers import TransactionSerializer
+from .representations import CompactTransactionListSerializer, TransactionListSerializer, transaction_values
+from .serializers import TransactionSerializer, TransactionCompactSerializer
 
 
-class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for viewing transactions (read-only)"""
+class TransactionViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet for viewing transactions (read-only)
+    
+    Pass `?view=compact` to get the invoice id and reference instead of the
+    full nested invoice payload.
+    """
     queryset = Transaction.objects.all()
+    last_modified_field = 'date'
+    # The nested invoice changes without a new transaction (status updates)
+    related_modified_fields = ['invoice__updated_at']
     serializer_class = TransactionSerializer
+    pagination_class = TransactionPagination
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     
+    def is_compact(self):
+        """Whether the client asked for the compact representation"""
+        return self.request is not None and self.request.query_params.get('view') == 'compact'
+    
     def get_queryset(self):
         """Filter transactions based on user permissions"""
         user = self.request.user
@@ -18,15 +42,52 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Transaction.objects.none()
 
-        # AnonymousUser 
-        if user.is_anonymous:
-            return Transaction.objects.none()
+        # Admin can see all transactions, regular users only those for their own invoices
+        queryset = Transaction.objects.for_user(user)
         
-        # Admin can see all transactions
-        if user.is_staff:
-            return Transaction.objects.all()
+        if self.uses_fast_list():
+            return queryset
+        if self.is_compact() or self.action == 'export':
+            return queryset.with_invoice()
+        return queryset.with_invoice_details()
+    
+    def list_values(self, queryset):
+        return transaction_values(queryset, compact=self.is_compact())
+    
+    def get_serializer_class(self):
+        """Return the compact or nested serializer based on the `view` query parameter"""
+        if self.uses_fast_list():
+            return CompactTransactionListSerializer if self.is_compact() else TransactionListSerializer
+        if self.is_compact():
+            return TransactionCompactSerializer
+        return TransactionSerializer
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every visible transaction as NDJSON (default) or CSV (`?output=csv`)"""
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_OUTPUTS:
+            return Response(
+                {'error': f'output must be one of: {", ".join(EXPORT_OUTPUTS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Regular users can only see transactions for their own invoices
-        return Transaction.objects.filter(invoice__created_by=user)
+        return export_response(
+            output, 'transactions',
+            records=transaction_records(self.get_queryset()),
+            csv_header=TRANSACTION_FIELDS,
+        )
 
 
+@require_GET
+@jwt_required
+async def transaction_list_async(request):
+    """Async counterpart of GET /api/transactions/ (keyset pages, ?view=compact)"""
+    queryset = Transaction.objects.for_user(request.user)
+    if request.GET.get('view') == 'compact':
+        queryset, serializer_class = queryset.with_invoice(), TransactionCompactSerializer
+    else:
+        queryset, serializer_class = queryset.with_invoice_details(), TransactionSerializer
+    return await keyset_response(
+        request, queryset, TransactionPagination.ordering_field, serializer_class
+    )
@@ -0,0 +1,135 @@
+"""
+JWT authentication backends that avoid a users table lookup per request.
+
+With ``JWT_STATELESS_READS`` on, ``StatelessJWTAuthentication`` builds
+``request.user`` straight from the validated token claims for safe
+(read-only) requests. Other requests, and tokens
+issued before the ``is_staff`` claim existed, fall back to the full user
+model, served from a small per-process LRU cache with a short TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+class UserCache:
+    """Thread-safe LRU of user instances whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    maxsize=getattr(settings, 'JWT_USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'JWT_USER_CACHE_TTL', 30),
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that reuses recently loaded users from ``user_cache``"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        key = str(user_id)
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user)
+        elif api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+
+class StatelessJWTAuthentication(CachedJWTAuthentication):
+    """Authenticate safe requests from token claims alone
+
+    ``request.user`` is a TokenUser exposing ``id``/``pk``, ``username`` and
+    ``is_staff``, which is all the read paths need to scope querysets.
+    Only used with ``JWT_STATELESS_READS = True``; otherwise every request
+    loads the user like CachedJWTAuthentication.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if self.is_stateless(request, validated_token):
+            return api_settings.TOKEN_USER_CLASS(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    async def aauthenticate(self, request, load_user=False):
+        """authenticate() for plain Django async views, loading users off the event loop
+
+        ``load_user=True`` always returns the full user, for views that need
+        more than the claims.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if not load_user and self.is_stateless(request, validated_token):
+            return api_settings.TOKEN_USER_CLASS(validated_token), validated_token
+        return await sync_to_async(self.get_user)(validated_token), validated_token
+
+    def is_stateless(self, request, validated_token):
+        return (
+            getattr(settings, 'JWT_STATELESS_READS', False)
+            and request.method in SAFE_METHODS
+            and api_settings.USER_ID_CLAIM in validated_token
+            and 'is_staff' in validated_token
+        )
+
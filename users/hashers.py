@@ -0,0 +1,59 @@
+"""
+Password hashers whose cost parameters come from settings.
+
+The hash format is unchanged from Django's hashers, so existing hashes keep
+verifying and are re-encoded with the configured cost on the next login
+(``must_update``). A setting left at 0 keeps Django's default.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher,
+)
+
+
+def cost(name, default):
+    return getattr(settings, name, 0) or default
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with ``PASSWORD_PBKDF2_ITERATIONS`` iterations"""
+
+    @property
+    def iterations(self):
+        return cost('PASSWORD_PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with ``PASSWORD_SCRYPT_WORK_FACTOR`` / ``_BLOCK_SIZE`` / ``_PARALLELISM``"""
+
+    @property
+    def work_factor(self):
+        return cost('PASSWORD_SCRYPT_WORK_FACTOR', ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return cost('PASSWORD_SCRYPT_BLOCK_SIZE', ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return cost('PASSWORD_SCRYPT_PARALLELISM', ScryptPasswordHasher.parallelism)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """argon2id with ``PASSWORD_ARGON2_TIME_COST`` / ``_MEMORY_COST`` / ``_PARALLELISM``
+
+    Requires the argon2-cffi package.
+    """
+
+    @property
+    def time_cost(self):
+        return cost('PASSWORD_ARGON2_TIME_COST', Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return cost('PASSWORD_ARGON2_MEMORY_COST', Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return cost('PASSWORD_ARGON2_PARALLELISM', Argon2PasswordHasher.parallelism)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding refresh tokens (and their blacklist entries) in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows deleted per statement, to keep each write lock short'
+        )
+    
+    def handle(self, *args, **options):
+        expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+        deleted = 0
+        while True:
+            batch = list(expired.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            # Cascades to BlacklistedToken
+            OutstandingToken.objects.filter(id__in=batch).delete()
+            deleted += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} expired tokens.'))
@@ -1,6 +1,15 @@
+from datetime import timedelta
+
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework_simplejwt import serializers as jwt_serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from .tokens import RefreshToken, revocations
 
 User = get_user_model()
 
@@ -13,21 +22,97 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined']
 
 
+def update_last_login(user):
+    """Record a login, skipping the write if last_login is recent enough
+    
+    Uses a conditional UPDATE so concurrent logins within
+    LAST_LOGIN_UPDATE_INTERVAL write the row at most once.
+    """
+    now = timezone.now()
+    interval = timedelta(seconds=settings.LAST_LOGIN_UPDATE_INTERVAL)
+    if user.last_login is not None and now - user.last_login < interval:
+        return False
+    
+    stale = User.objects.filter(pk=user.pk)
+    if interval:
+        stale = stale.exclude(last_login__gt=now - interval)
+    updated = stale.update(last_login=now)
+    if updated:
+        user.last_login = now
+    return bool(updated)
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Custom token serializer to include user details"""
+    token_class = RefreshToken
+    
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
         token['username'] = user.username
         token['email'] = user.email
+        # Lets StatelessJWTAuthentication scope reads without loading the user
+        token['is_staff'] = user.is_staff
         return token
     
     def validate(self, attrs):
         data = super().validate(attrs)
+        update_last_login(self.user)
         data['user'] = UserSerializer(self.user).data
         return data
 
 
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """Refresh with the blacklist confirmed by users.tokens.RefreshToken
+    
+    The user is loaded on every refresh, so the claims copied into the new
+    access token (and the rotated refresh token) are taken from the current
+    row: a demoted user loses the is_staff claim on the next refresh, and a
+    deactivated or deleted user cannot refresh at all.
+    """
+    token_class = RefreshToken
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        
+        refresh['username'] = user.username
+        refresh['email'] = user.email
+        refresh['is_staff'] = user.is_staff
+        data = {'access': str(refresh.access_token)}
+        
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        
+        return data
+
+
+class TokenBlacklistSerializer(jwt_serializers.TokenBlacklistSerializer):
+    """Revoke a refresh token (logout)"""
+    token_class = RefreshToken
+
+
+class TokenVerifySerializer(jwt_serializers.TokenVerifySerializer):
+    """Verify a token, rejecting blacklisted ones without a query in the common case"""
+    
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+        jti = token.get(api_settings.JTI_CLAIM)
+        if jti is not None and revocations.is_revoked(jti):
+            raise serializers.ValidationError('Token is blacklisted')
+        return {}
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration"""
     password = serializers.CharField(
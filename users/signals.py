@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import user_cache
+from .tokens import revocations
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def discard_cached_user(sender, instance, **kwargs):
+    # Deactivations and permission changes take effect on the next request
+    user_cache.discard(str(instance.pk))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_to_revocations(sender, instance, created, **kwargs):
+    if created:
+        revocations.add(instance.token.jti)
@@ -1,3 +1,544 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from invoices.models import Invoice
+from sales_invoice.testing import benchmark, report
+from .authentication import UserCache, user_cache
+from .serializers import CustomTokenObtainPairSerializer, update_last_login
+from .tokens import BloomFilter, revocations
+
+User = get_user_model()
+
+
+try:
+    import argon2  # noqa: F401
+except ImportError:
+    argon2 = None
+
+HASHERS = {
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'users.hashers.TunedScryptPasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+}
+
+
+def access_token_for(user):
+    return str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+
+
+@override_settings(JWT_STATELESS_READS=True)
+class StatelessJWTAuthenticationTestCase(TestCase):
+    """Test cases for users.authentication"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        user_cache.clear()
+        
+        self.user = User.objects.create_user(
+            username='claimsuser',
+            email='claims@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.staff_user = User.objects.create_user(
+            username='staffuser',
+            email='staff@example.com',
+            password='testpass123',
+            is_staff=True
+        )
+        for owner in (self.user, self.other_user):
+            Invoice.objects.create(
+                reference=f'CLAIMS-{owner.pk}',
+                customer_name='Customer',
+                total_amount=Decimal('10.00'),
+                created_by=owner
+            )
+    
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    
+    def count_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format='json')
+        user_queries = [q for q in context.captured_queries if 'FROM "users"' in q['sql']]
+        return response, len(user_queries)
+    
+    def test_token_obtain_returns_claims(self):
+        """Test that /api/token/ issues tokens carrying the is_staff claim"""
+        response = self.client.post('/api/token/', {
+            'username': 'staffuser',
+            'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user']['username'], 'staffuser')
+        
+        refresh = RefreshToken(response.data['refresh'])
+        self.assertTrue(refresh['is_staff'])
+        self.assertTrue(refresh.access_token['is_staff'])
+    
+    def test_reads_skip_user_lookup(self):
+        """Test that safe requests are authenticated from the token alone"""
+        self.authenticate(access_token_for(self.user))
+        
+        for url in ('/api/invoices/', '/api/transactions/'):
+            response, user_queries = self.count_queries('get', url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(user_queries, 0, url)
+        
+        references = [row['reference'] for row in self.client.get('/api/invoices/').data['results']]
+        self.assertEqual(references, [f'CLAIMS-{self.user.pk}'])
+    
+    def test_staff_claim_sees_all_invoices(self):
+        """Test that the is_staff claim widens the queryset like a staff user"""
+        self.authenticate(access_token_for(self.staff_user))
+        
+        response = self.client.get('/api/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+    
+    @override_settings(JWT_STATELESS_READS=False)
+    def test_stateless_reads_can_be_disabled(self):
+        """Test that the setting restores the per-request user lookup"""
+        self.authenticate(access_token_for(self.user))
+        
+        response, user_queries = self.count_queries('get', '/api/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries, 1)
+        
+        # Deactivation applies to reads on the next request, not at token expiry
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/api/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_token_without_staff_claim_loads_user(self):
+        """Test that tokens issued before the is_staff claim fall back to the database"""
+        self.authenticate(str(RefreshToken.for_user(self.staff_user).access_token))
+        
+        response, user_queries = self.count_queries('get', '/api/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries, 1)
+        self.assertEqual(len(response.data['results']), 2)
+    
+    def test_writes_use_cached_full_user(self):
+        """Test that writes get a real user, loaded once and then served from the cache"""
+        self.authenticate(access_token_for(self.user))
+        payload = {
+            'customer_name': 'Customer',
+            'items': [{'name': 'Item', 'quantity': 1, 'price': '5.00'}]
+        }
+        
+        payload['reference'] = 'WRITE-1'
+        response, user_queries = self.count_queries('post', '/api/invoices/', payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(user_queries, 1)
+        
+        payload['reference'] = 'WRITE-2'
+        response, user_queries = self.count_queries('post', '/api/invoices/', payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(user_queries, 0)
+        self.assertEqual(Invoice.objects.get(reference='WRITE-2').created_by, self.user)
+    
+    def test_deactivated_user_is_evicted(self):
+        """Test that saving a user drops it from the cache so deactivation applies to writes"""
+        self.authenticate(access_token_for(self.user))
+        invoice = Invoice.objects.get(created_by=self.user)
+        self.client.patch(f'/api/invoices/{invoice.id}/', {'status': 'PENDING'}, format='json')
+        self.assertIsNotNone(user_cache.get(str(self.user.pk)))
+        
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(user_cache.get(str(self.user.pk)))
+        
+        response = self.client.patch(f'/api/invoices/{invoice.id}/pay/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_refresh_reissues_claims_from_user(self):
+        """Test that a demoted user loses the is_staff claim on the next refresh"""
+        response = self.client.post('/api/token/', {
+            'username': 'staffuser',
+            'password': 'testpass123'
+        }, format='json')
+        refresh = response.data['refresh']
+        
+        self.staff_user.is_staff = False
+        self.staff_user.save()
+        response = self.client.post('/api/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(RefreshToken(response.data['refresh'])['is_staff'])
+        
+        self.authenticate(response.data['access'])
+        response = self.client.get('/api/invoices/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+    
+    def test_deactivated_user_cannot_refresh(self):
+        """Test that refresh is refused once the user is deactivated"""
+        refresh = str(CustomTokenObtainPairSerializer.get_token(self.user))
+        self.user.is_active = False
+        self.user.save()
+        
+        response = self.client.post('/api/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AsyncProfileTestCase(TestCase):
+    """Test cases for GET /api/async/users/profile/"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='profileuser',
+            email='profile@example.com',
+            password='testpass123'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token_for(self.user)}')
+    
+    def test_matches_sync_profile(self):
+        """Test that the async profile matches GET /api/users/profile/"""
+        response = self.client.get('/api/async/users/profile/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), self.client.get('/api/users/profile/').json())
+    
+    def test_inactive_user_rejected(self):
+        """Test that a deactivated user can't read the profile with an old token"""
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get('/api/async/users/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserCacheTestCase(TestCase):
+    """Test cases for the LRU/TTL user cache"""
+    
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest unused entry is dropped once the cache is full"""
+        users = UserCache(maxsize=2, ttl=60)
+        users.set('1', 'one')
+        users.set('2', 'two')
+        users.get('1')
+        users.set('3', 'three')
+        
+        self.assertEqual(users.get('1'), 'one')
+        self.assertIsNone(users.get('2'))
+        self.assertEqual(users.get('3'), 'three')
+    
+    def test_entries_expire(self):
+        """Test that entries are not served after the TTL"""
+        users = UserCache(maxsize=2, ttl=30)
+        with mock.patch('users.authentication.time.monotonic', return_value=100):
+            users.set('1', 'one')
+        with mock.patch('users.authentication.time.monotonic', return_value=129):
+            self.assertEqual(users.get('1'), 'one')
+        with mock.patch('users.authentication.time.monotonic', return_value=131):
+            self.assertIsNone(users.get('1'))
+
+
+class TokenRevocationTestCase(TestCase):
+    """Test cases for refresh token rotation, blacklisting and pruning"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        revocations.reset()
+        self.user = User.objects.create_user(
+            username='revokeuser',
+            email='revoke@example.com',
+            password='testpass123'
+        )
+        response = self.client.post('/api/token/', {
+            'username': 'revokeuser',
+            'password': 'testpass123'
+        }, format='json')
+        self.refresh = response.data['refresh']
+    
+    def blacklist_queries(self, url, data):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, data, format='json')
+        return response, [q for q in context.captured_queries if 'blacklistedtoken' in q['sql']]
+    
+    def test_login_records_outstanding_token(self):
+        """Test that issued refresh tokens are tracked"""
+        jti = RefreshToken(self.refresh)['jti']
+        self.assertTrue(OutstandingToken.objects.filter(jti=jti, user=self.user).exists())
+    
+    def test_rotation_revokes_previous_refresh_token(self):
+        """Test that a refresh token cannot be reused after rotation"""
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['refresh'], self.refresh)
+        
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_blacklist_endpoint_revokes_token(self):
+        """Test that /api/token/blacklist/ revokes a refresh token"""
+        response = self.client.post('/api/token/blacklist/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.client.post('/api/token/verify/', {'token': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_unrevoked_token_checked_without_query(self):
+        """Test that the not-revoked check is answered by the bloom filter"""
+        # The first check loads the filter
+        self.client.post('/api/token/verify/', {'token': self.refresh}, format='json')
+        
+        response, queries = self.blacklist_queries('/api/token/verify/', {'token': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+    
+    @override_settings(TOKEN_BLACKLIST_SYNC_INTERVAL=0)
+    def test_revocations_from_other_processes_are_synced(self):
+        """Test that tokens blacklisted without this process seeing it are picked up by the sync"""
+        self.client.post('/api/token/verify/', {'token': self.refresh}, format='json')
+        
+        # bulk_create sends no post_save, like a write made by another worker
+        token = OutstandingToken.objects.get(jti=RefreshToken(self.refresh)['jti'])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token)])
+        
+        response = self.client.post('/api/token/verify/', {'token': self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_refresh_confirms_revocation_before_sync(self):
+        """Test that refresh rejects a token blacklisted elsewhere before the filter syncs"""
+        self.client.post('/api/token/verify/', {'token': self.refresh}, format='json')
+        
+        token = OutstandingToken.objects.get(jti=RefreshToken(self.refresh)['jti'])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token)])
+        
+        response, queries = self.blacklist_queries('/api/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(queries), 1)
+    
+    def test_prune_tokens(self):
+        """Test that prune_tokens deletes only expired tokens"""
+        expired = OutstandingToken.objects.create(
+            jti='expired', token='x', user=self.user,
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        BlacklistedToken.objects.create(token=expired)
+        
+        call_command('prune_tokens', batch_size=1, stdout=io.StringIO())
+        self.assertFalse(OutstandingToken.objects.filter(jti='expired').exists())
+        self.assertFalse(BlacklistedToken.objects.filter(token_id=expired.id).exists())
+        self.assertTrue(OutstandingToken.objects.filter(jti=RefreshToken(self.refresh)['jti']).exists())
+
+
+class BloomFilterTestCase(TestCase):
+    """Test cases for users.tokens.BloomFilter"""
+    
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f'member-{i}')
+        
+        self.assertTrue(all(f'member-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+@tag('benchmark')
+@override_settings(INVOICE_CACHE_TIMEOUT=0, JWT_STATELESS_READS=True)
+class StatelessJWTAuthenticationBenchmark(TestCase):
+    """Compare queries and latency per read with and without the stateless path"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            username='benchuser',
+            email='bench@example.com',
+            password='testpass123'
+        )
+        Invoice.objects.bulk_create(
+            Invoice(
+                reference=f'BENCH-{i}',
+                customer_name='Customer',
+                total_amount=Decimal('10.00'),
+                created_by=self.user
+            )
+            for i in range(20)
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token_for(self.user)}')
+    
+    def measure(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/invoices/')
+        
+        def request():
+            # Clear the user cache so the lookup path really hits the database
+            user_cache.clear()
+            self.client.get('/api/invoices/')
+        
+        return len(context.captured_queries), benchmark(request, repeat=20)
+    
+    def test_list_invoices(self):
+        stateless_queries, stateless_seconds = self.measure()
+        with override_settings(JWT_STATELESS_READS=False):
+            user_cache.clear()
+            lookup_queries, lookup_seconds = self.measure()
+        
+        report(
+            'GET /api/invoices/ authentication',
+            stateless_queries=stateless_queries,
+            lookup_queries=lookup_queries,
+            stateless_seconds=stateless_seconds,
+            lookup_seconds=lookup_seconds,
+        )
+        self.assertLess(stateless_queries, lookup_queries)
+
+
+class LastLoginTestCase(TestCase):
+    """Test cases for debounced last_login writes"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='loginuser',
+            email='login@example.com',
+            password='testpass123'
+        )
+    
+    def login(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/token/', {
+                'username': 'loginuser',
+                'password': 'testpass123'
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [q for q in context.captured_queries if q['sql'].startswith('UPDATE "users"')]
+    
+    def test_last_login_written_once_per_interval(self):
+        """Test that repeated logins only write last_login once"""
+        self.assertEqual(len(self.login()), 1)
+        self.assertEqual(len(self.login()), 0)
+        
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+    
+    def test_last_login_written_after_interval(self):
+        """Test that a login after the interval updates last_login again"""
+        stale = timezone.now() - timedelta(hours=1)
+        User.objects.filter(pk=self.user.pk).update(last_login=stale)
+        
+        self.assertEqual(len(self.login()), 1)
+        self.user.refresh_from_db()
+        self.assertGreater(self.user.last_login, stale)
+    
+    @override_settings(LAST_LOGIN_UPDATE_INTERVAL=0)
+    def test_interval_zero_writes_every_login(self):
+        """Test that disabling the debounce writes on every login"""
+        self.assertEqual(len(self.login()), 1)
+        self.assertEqual(len(self.login()), 1)
+    
+    def test_stale_instance_does_not_overwrite(self):
+        """Test that a login racing a more recent one skips the write"""
+        stale_copy = User.objects.get(pk=self.user.pk)
+        self.assertTrue(update_last_login(self.user))
+        self.assertFalse(update_last_login(stale_copy))
+
+
+class PasswordHasherTestCase(TestCase):
+    """Test cases for the configurable password hashers"""
+    
+    @override_settings(
+        PASSWORD_HASHERS=[HASHERS['scrypt'], HASHERS['pbkdf2']],
+        PASSWORD_SCRYPT_WORK_FACTOR=2 ** 12,
+    )
+    def test_scrypt_uses_configured_cost(self):
+        """Test that scrypt hashes carry the work factor from settings"""
+        encoded = make_password('testpass123')
+        self.assertTrue(encoded.startswith(f'scrypt${2 ** 12}$'))
+        self.assertTrue(check_password('testpass123', encoded))
+    
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_pbkdf2_uses_configured_iterations(self):
+        """Test that PBKDF2 hashes carry the iteration count from settings"""
+        self.assertTrue(make_password('testpass123').startswith('pbkdf2_sha256$1000$'))
+    
+    def test_existing_hash_upgraded_on_login(self):
+        """Test that switching hasher re-encodes passwords on the next login"""
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            user = User.objects.create_user(
+                username='upgradeuser',
+                email='upgrade@example.com',
+                password='testpass123'
+            )
+        
+        with override_settings(
+            PASSWORD_HASHERS=[HASHERS['scrypt'], HASHERS['pbkdf2']],
+            PASSWORD_SCRYPT_WORK_FACTOR=2 ** 12,
+        ):
+            response = APIClient().post('/api/token/', {
+                'username': 'upgradeuser',
+                'password': 'testpass123'
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            user.refresh_from_db()
+            self.assertEqual(identify_hasher(user.password).algorithm, 'scrypt')
+
+
+@tag('benchmark')
+class LoginThroughputBenchmark(TestCase):
+    """Measure sequential /api/token/ logins per second, i.e. per CPU core
+    
+    Divide the expected peak login rate by the result to size the number of
+    gunicorn workers needed for logins alone.
+    """
+    
+    logins = 10
+    
+    def measure(self, hasher):
+        with override_settings(PASSWORD_HASHERS=[HASHERS[hasher]]):
+            username = f'bench-{hasher}'
+            User.objects.create_user(
+                username=username,
+                email=f'{username}@example.com',
+                password='testpass123'
+            )
+            client = APIClient()
+            
+            def login():
+                for _ in range(self.logins):
+                    client.post('/api/token/', {
+                        'username': username,
+                        'password': 'testpass123'
+                    }, format='json')
+            
+            seconds = benchmark(login, repeat=3)
+            report(
+                'POST /api/token/',
+                hasher=hasher,
+                logins_per_second=self.logins / seconds,
+            )
+    
+    def test_pbkdf2(self):
+        self.measure('pbkdf2')
+    
+    def test_scrypt(self):
+        self.measure('scrypt')
+    
+    @skipUnless(argon2, 'argon2-cffi is not installed')
+    def test_argon2(self):
+        self.measure('argon2')
@@ -0,0 +1,130 @@
+"""
+Refresh token revocation with an in-process bloom filter in front of the
+token_blacklist tables.
+
+Every worker keeps a bloom filter of blacklisted jtis. A jti the filter has
+never seen is known not to be revoked, so the common check costs no query;
+a possible match (a revoked token or a rare false positive) is confirmed
+against BlacklistedToken. Tokens blacklisted by this process are added
+immediately; those blacklisted elsewhere are picked up by an incremental
+sync at most every ``TOKEN_BLACKLIST_SYNC_INTERVAL`` seconds.
+
+The filter serves token verification only. Refreshing and blacklisting
+load a ``RefreshToken``, which always confirms against the database, so a
+revoked refresh token cannot mint new tokens during that window.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+# Syncs re-read this much history so rows committed late are not missed
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big')
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        if key in self:
+            return
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class RevocationList:
+    """Bloom filter of blacklisted jtis, loaded lazily and synced incrementally"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next check reloads from the database"""
+        with self._lock:
+            self._bloom = None
+            self._synced_at = 0
+            self._since = None
+
+    def add(self, jti):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def is_revoked(self, jti):
+        if jti not in self._current():
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def _current(self):
+        interval = getattr(settings, 'TOKEN_BLACKLIST_SYNC_INTERVAL', 10)
+        with self._lock:
+            if self._bloom is None or self._bloom.count > self._bloom.capacity:
+                self._rebuild()
+            elif time.monotonic() - self._synced_at >= interval:
+                self._sync()
+            return self._bloom
+
+    def _rebuild(self):
+        now = timezone.now()
+        jtis = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=now).values_list('token__jti', flat=True)
+        )
+        # Sized for what's live now, with room to grow before the next rebuild
+        capacity = max(getattr(settings, 'TOKEN_BLACKLIST_BLOOM_CAPACITY', 100_000), 2 * len(jtis))
+        self._bloom = BloomFilter(capacity, getattr(settings, 'TOKEN_BLACKLIST_BLOOM_ERROR_RATE', 0.001))
+        self._load(jtis, now)
+
+    def _sync(self):
+        now = timezone.now()
+        self._load(
+            BlacklistedToken.objects.filter(blacklisted_at__gte=self._since).values_list('token__jti', flat=True),
+            now,
+        )
+
+    def _load(self, jtis, now):
+        for jti in jtis:
+            self._bloom.add(jti)
+        self._since = now - SYNC_OVERLAP
+        self._synced_at = time.monotonic()
+
+
+revocations = RevocationList()
+
+
+class RefreshToken(BaseRefreshToken):
+    """Refresh token checked against BlacklistedToken on every use
+
+    Refreshing mints new tokens, so it must not pass during the sync window;
+    the one query is cheap next to the refresh itself.
+    """
+
+    def check_blacklist(self):
+        if BlacklistedToken.objects.filter(token__jti=self.payload[api_settings.JTI_CLAIM]).exists():
+            raise TokenError(_('Token is blacklisted'))
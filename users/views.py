@@ -8,6 +8,8 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import CustomTokenObtainPairSerializer
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.views.decorators.http import require_GET
+from sales_invoice.asynchronous import json_response, jwt_required
 
 User = get_user_model()
 
@@ -48,3 +50,9 @@ def profile(request):
     serializer = UserSerializer(request.user)
     return Response(serializer.data)
 
+
+@require_GET
+@jwt_required(load_user=True)
+async def profile_async(request):
+    """Async counterpart of GET /api/users/profile/"""
+    return json_response(UserSerializer(request.user).data)